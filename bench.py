@@ -0,0 +1,313 @@
+"""
+Benchmark suite for the SIYI SDK hot paths, the tracking engine control loop and the GUI display
+
+    python bench.py                                # run everything, print JSON results
+    python bench.py --only encode,crc16            # run some benchmarks
+    python bench.py --save baseline.json           # save the results as a baseline
+    python bench.py --compare baseline.json        # compare with a baseline, exit 1 on regression
+
+The GUI display is measured headless (Qt offscreen platform) and skipped when PyQt5 is not installed.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import logging
+import os
+import platform
+import socket
+import sys
+import tempfile
+from datetime import datetime
+from time import perf_counter, sleep
+
+import crc16_python
+from siyi_message import *
+from siyi_sdk import SIYISDK
+from siyi_emulator import SIYIEmulator
+from tracking_engine import TELEMETRY_RECORD, EngineSnapshot, TrackingEngine, _log_row, calculate_focal_length
+from tracker_protocol import decode_sample, encode_reply, encode_sample
+from interface_publisher import BINARY, JSON, InterfacePublisher, ServiceMessage, Subscriber, encode_message
+
+def metric(value, unit, better="higher"): return {"value": value, "unit": unit, "better": better}
+
+def rate(fn, n, repeat=5):
+    """
+    Returns
+    --
+    [float] Best calls per second of `fn` over `repeat` runs of `n` calls
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = perf_counter()
+        for _ in range(n): fn()
+        best = min(best, perf_counter() - t0)
+    return n / best
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+def benchEncode(n):
+    msg = SIYIMESSAGE()
+    return {
+        "speed_frames_per_s": metric(rate(lambda: msg.setGimbalSpeedMsg(10, -5), n), "frames/s"),
+        "attitude_request_frames_per_s": metric(rate(msg.requestGimbalAttitudeMsg, n), "frames/s"),
+        "hex_encode_per_s": metric(rate(lambda: msg.encodeMsg("0afb", COMMAND.GIMBAL_SPEED), n), "frames/s"),
+    }
+
+def benchDecode(n):
+    msg = SIYIMESSAGE()
+    frame = bytes(msg.encode(RESPONSES[COMMAND.ACQUIRE_GIMBAL_ATT].pack(10.5, -20.1, 0.3, 1, 2, 3), COMMAND.ACQUIRE_GIMBAL_ATT))
+    layout = RESPONSES[COMMAND.ACQUIRE_GIMBAL_ATT]
+    def decodeAndUnpack(): layout.unpack(msg.decode(frame)[0])
+    return {
+        "decode_frames_per_s": metric(rate(lambda: msg.decode(frame), n), "frames/s"),
+        "decode_unpack_per_s": metric(rate(decodeAndUnpack, n), "frames/s"),
+        "hex_decode_per_s": metric(rate(lambda: msg.decodeMsg(frame.hex()), n), "frames/s"),
+    }
+
+def benchCrc16(n):
+    results = {}
+    for size in (64, 1024):
+        data = bytes(range(256)) * (size // 256) if size >= 256 else bytes(range(size))
+        for name, fn in crc16_python.BACKENDS.items():
+            calls = max(10, n // 10) if name == 'table' else n
+            results[f"{name}_{size}B_MB_per_s"] = metric(rate(lambda: fn(data), calls) * size / 1e6, "MB/s")
+    return results
+
+def benchTracker(n):
+    json_sample = json.dumps({"dx": 12, "dy": -7, "dz": 153.2, "tracker_status": 1}).encode('utf-8')
+    binary_sample = encode_sample(12, -7, 153.2, 1, 4711, 1234567890)
+    return {
+        "decode_json_per_s": metric(rate(lambda: decode_sample(json_sample), n), "samples/s"),
+        "decode_binary_per_s": metric(rate(lambda: decode_sample(binary_sample), n), "samples/s"),
+        "encode_reply_json_per_s": metric(rate(lambda: encode_reply(37.52, 5.0, 1, 0, binary=False), n), "replies/s"),
+        "encode_reply_binary_per_s": metric(rate(lambda: encode_reply(37.52, 5.0, 1, 0, 4711, 1234567890, 850), n), "replies/s"),
+    }
+
+def benchInterface(n):
+    msg = ServiceMessage(39.9255331, 32.8662871, 945.25, 1, 275.5, 15.2, 39.92077, 32.85411, 1100.0, 135.0)
+    sink = socket.socket(socket.AF_INET, socket.SOCK_DGRAM); sink.bind(("127.0.0.1", 0)); addr = sink.getsockname()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    publisher = InterfacePublisher(); publisher.open()
+    for encoding in (JSON, JSON, BINARY): publisher.add(Subscriber(addr, 0, encoding))
+    data = {"target": {k: getattr(msg, k) for k in msg._fields[:6]}, "gimbal": {k: getattr(msg, k) for k in msg._fields[6:]}}
+    def legacy():
+        # Before the publisher: indented JSON, encoded for every destination
+        for _ in range(3): sock.sendto(json.dumps(data, indent=4).encode('utf-8'), addr)
+    try:
+        return {
+            "encode_json_per_s": metric(rate(lambda: encode_message(msg, JSON), n), "messages/s"),
+            "encode_binary_per_s": metric(rate(lambda: encode_message(msg, BINARY), n), "messages/s"),
+            "legacy_3_subscribers_per_s": metric(rate(legacy, n), "ticks/s"),
+            "publish_3_subscribers_per_s": metric(rate(lambda: publisher.publish(msg), n), "ticks/s"),
+            "json_bytes": metric(len(encode_message(msg, JSON)), "bytes", "lower"),
+            "binary_bytes": metric(len(encode_message(msg, BINARY)), "bytes", "lower"),
+        }
+    finally:
+        publisher.close(); sock.close(); sink.close()
+
+class _ReplayReceiver:
+    """
+    DatagramReceiver stand-in that serves the same datagrams over and over to bufferCallback(), one per wake-up
+    """
+    def __init__(self, datagrams): self._datagrams = datagrams; self._i = 0; self._ready = False
+    def wait(self, timeout): self._ready = True; return True
+    def receive(self, buf):
+        if not self._ready: return None
+        data = self._datagrams[self._i]; self._i = (self._i + 1) % len(self._datagrams); self._ready = False
+        buf[:len(data)] = data
+        return len(data), ("127.0.0.1", 37260), None
+
+def benchParse(n):
+    msg = SIYIMESSAGE()
+    att = RESPONSES[COMMAND.ACQUIRE_GIMBAL_ATT]
+    frames = [bytes(msg.encode(att.pack(i * 0.1, -i * 0.1, 0.0, 0, 0, 0), COMMAND.ACQUIRE_GIMBAL_ATT)) for i in range(8)]
+    corrupted = []
+    for i, f in enumerate(frames):
+        f = bytearray(f)
+        if i % 2: f[len(f) // 2] ^= 0xFF
+        corrupted.append(bytes(f))
+    cases = {"clean": (frames, 1), "corrupted": (corrupted, 1), "concatenated": ([b"".join(frames)], len(frames))}
+
+    results = {}
+    for name, (datagrams, frames_per_datagram) in cases.items():
+        cam = SIYISDK(); cam._receiver = _ReplayReceiver(datagrams)
+        per_s = rate(cam.bufferCallback, n)
+        results[f"{name}_datagrams_per_s"] = metric(per_s, "datagrams/s")
+        results[f"{name}_frames_per_s"] = metric(per_s * frames_per_datagram, "frames/s")
+    return results
+
+def benchRtt(n):
+    emu = SIYIEmulator(port=0); emu.start()
+    cam = SIYISDK(server_ip=emu._addr[0], port=emu._addr[1], local_port=0)
+    try:
+        if not cam.connect(maxWaitTime=3.0): return {"skipped": "emulator did not answer"}
+        results = {}
+        for name, frame, expect in (("center", cam._out_msg.centerGimbalMsg, COMMAND.CENTER),
+                                    ("attitude", cam._out_msg.requestGimbalAttitudeMsg, COMMAND.ACQUIRE_GIMBAL_ATT)):
+            rtts = []
+            for _ in range(n):
+                t0 = perf_counter()
+                cam.sendRequest((frame(),), expect).result(1.0)
+                rtts.append((perf_counter() - t0) * 1e3)
+            for p in (50, 90, 99):
+                results[f"{name}_rtt_p{p}_ms"] = metric(percentile(rtts, p), "ms", "lower")
+            results[f"{name}_rtt_max_ms"] = metric(max(rtts), "ms", "lower")
+        return results
+    finally:
+        cam.disconnect(); emu.stop()
+
+def benchEngine(n):
+    emu = SIYIEmulator(port=0); emu.start()
+    cam = SIYISDK(server_ip=emu._addr[0], port=emu._addr[1], local_port=0)
+    engine = TrackingEngine(cam)
+    try:
+        if not cam.connect(maxWaitTime=3.0): return {"skipped": "emulator did not answer"}
+        sleep(0.2)
+        engine.start_interface_service("127.0.0.1", 9)
+        raw = engine._get_data_from_sources()
+        heading, pitch, roll = engine._process_and_calculate_values(*raw[:3])
+        results = {}
+        for tracking in (False, True):
+            engine.tracking_enabled = tracking; engine.tracker_status = int(tracking); engine.tracker_dz = 100.0
+            stages = {
+                "get_data": engine._get_data_from_sources,
+                "process": lambda: engine._process_and_calculate_values(*raw[:3]),
+                "focal_length": lambda: calculate_focal_length(raw[3], curve_factor=1.25),
+                "control": lambda: engine._execute_control_logic(tracking),
+                "kinematics": lambda: engine._update_target_kinematics(tracking),
+                "target": lambda: engine._update_target(heading, pitch, tracking),
+                "service_data": lambda: engine._send_service_data(heading, tracking),
+                "tick": engine.tick,
+            }
+            mode = "tracking" if tracking else "idle"
+            for name, fn in stages.items():
+                results[f"{mode}_{name}_us"] = metric(1e6 / rate(fn, n, repeat=3), "us/tick", "lower")
+        return results
+    finally:
+        engine.tracking_enabled = False; engine.close()
+        cam.disconnect(); emu.stop()
+
+def benchLog(n):
+    engine = TrackingEngine()
+    snapshot = EngineSnapshot(0.0, 12.5, -30.25, 0.5, 135.42, -30.1, 0.5, 5.0, 37.5, 0, 3, 1, 0, 1, 12, -7, 153.2, True, True, True,
+                              39.9255331, 32.8662871, 950.25, 275.5, 15.2, 12.0, -7.0, 0.42, -0.17, 50, 0, 0, 4711, 12.5)
+    legacy_file = io.StringIO(); legacy_writer = csv.writer(legacy_file)
+    def legacy():
+        # Before the binary log: one formatted CSV row, settings re-read from the entered texts
+        legacy_writer.writerow(_log_row(datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3], snapshot,
+                                        [engine.param_text[name] for name in engine.params._fields]))
+        legacy_file.seek(0); legacy_file.truncate()
+    with tempfile.TemporaryDirectory() as d, contextlib.redirect_stdout(sys.stderr):
+        engine.start_logging(os.path.join(d, "bench.bin"))
+        try:
+            binary = rate(lambda: engine._write_log_entry(snapshot), n)
+        finally:
+            stats = engine.get_log_stats(); engine.stop_logging()
+    return {
+        "csv_row_us": metric(1e6 / rate(legacy, n), "us/record", "lower"),
+        "binary_record_us": metric(1e6 / binary, "us/record", "lower"),
+        "binary_dropped": metric(stats["dropped"], "records", "lower"),
+        "binary_record_bytes": metric(TELEMETRY_RECORD.size, "bytes", "lower"),
+    }
+
+def benchGui(n):
+    try:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        import gui
+    except ImportError as e:
+        return {"skipped": f"GUI not available: {e}"}
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    emu = SIYIEmulator(port=0); emu.start()
+    cam = SIYISDK(server_ip=emu._addr[0], port=emu._addr[1], local_port=0)
+    window = gui.GimbalGUI()
+    try:
+        if not cam.connect(maxWaitTime=3.0): return {"skipped": "emulator did not answer"}
+        window.cam = cam; window.engine.set_camera(cam)
+        sleep(0.2)
+        results = {}
+        for tracking in (False, True):
+            engine = window.engine
+            engine.tracking_enabled = tracking; engine.tracker_status = int(tracking); engine.tracker_dz = 100.0
+            engine.tick(); app.processEvents()
+            snapshot = engine.snapshot
+            mode = "tracking" if tracking else "idle"
+            # The GUI only displays engine snapshots, the control loop is measured by the engine benchmark
+            results[f"{mode}_widgets_us"] = metric(1e6 / rate(lambda: window._update_gui_widgets(snapshot), n, repeat=3), "us/tick", "lower")
+        return results
+    finally:
+        window.engine.close()
+        cam.disconnect(); emu.stop()
+
+BENCHMARKS = {
+    "encode": (benchEncode, 20000), "decode": (benchDecode, 20000), "crc16": (benchCrc16, 20000),
+    "parse": (benchParse, 20000), "tracker": (benchTracker, 20000), "interface": (benchInterface, 5000), "rtt": (benchRtt, 200), "engine": (benchEngine, 200), "log": (benchLog, 2000), "gui": (benchGui, 200),
+}
+
+def run(names, scale=1.0):
+    results = {}
+    for name in names:
+        fn, n = BENCHMARKS[name]
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = fn(max(1, int(n * scale)))
+    return {
+        "meta": {"time": datetime.now().isoformat(timespec='seconds'), "python": platform.python_version(),
+                 "platform": platform.platform(), "crc16_backend": crc16_python.crc16.__name__},
+        "results": results,
+    }
+
+def compare(current, baseline, tolerance):
+    """
+    Prints the relative change of every metric found in both runs
+
+    Returns
+    --
+    [list] Names of the metrics that regressed by more than `tolerance`
+    """
+    regressions = []
+    for bench, metrics in current["results"].items():
+        base = baseline["results"].get(bench, {})
+        for name, m in metrics.items():
+            if not isinstance(m, dict) or not isinstance(base.get(name), dict): continue
+            old, new = base[name]["value"], m["value"]
+            change = (new - old) / old if old else 0.0
+            worse = -change if m["better"] == "higher" else change
+            flag = "REGRESSION" if worse > tolerance else ("improved" if worse < -tolerance else "")
+            if flag == "REGRESSION": regressions.append(f"{bench}.{name}")
+            print(f"{bench + '.' + name:55s} {old:14.3f} -> {new:14.3f} {m['unit']:12s} {change:+7.1%} {flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="SIYI SDK benchmarks")
+    parser.add_argument('--only', default=None, help="Comma separated benchmarks: " + ",".join(BENCHMARKS))
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiplier of the iteration counts")
+    parser.add_argument('--save', default=None, help="Write the results to this JSON file")
+    parser.add_argument('--compare', default=None, help="Baseline JSON file to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="Relative change reported as a regression")
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.realpath(__file__)))
+    logging.disable(logging.WARNING)
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown: parser.error(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    current = run(names, args.scale)
+    if args.save:
+        with open(args.save, 'w') as f: json.dump(current, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f: baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+    elif not args.save:
+        print(json.dumps(current, indent=2))
+
+if __name__ == "__main__":
+    main()
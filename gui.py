@@ -1,18 +1,13 @@
 import sys
 import threading
-import socket
 import json
-import math
 import time
-import queue
-import collections
-import csv
-from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
                              QPushButton, QSlider, QLabel, QGridLayout, QGroupBox,
                              QLineEdit, QComboBox, QDialog, QDialogButtonBox, QCheckBox)
 from PyQt5.QtCore import Qt, QTimer, QPointF, QObject, pyqtSignal
 from PyQt5.QtGui import (QPainter, QColor, QFont, QPen, QBrush, QPolygonF, QPainterPath)
+from tracking_engine import LOOP_RATES, TrackingEngine
 
 try:
     import pygame
@@ -333,55 +328,26 @@ if PYGAME_AVAILABLE:
         def stop(self): self._stop_event.set()
 
 class GimbalGUI(QWidget):
+    snapshot_ready = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.cam=None; self.gimbal_speed=50; self.motion_modes={"Kilit Modu":3, "Takip Modu":4, "FPV Modu":5}; self.record_map={0:"Durdu", 1:"Kaydediyor", 2:"Kart Yok", 3:"Veri Kaybı"}
         self.mode_map={0:"Kilit", 1:"Takip", 2:"FPV"}; self.mount_map={1:"Normal", 2:"Ters"}; self.hdr_map={0:"Kapalı", 1:"Açık"}
-        self.tracker_socket=None; self.tracker_client_addr=None
-        self.tracker_handler_thread=None; self.tracker_thread_stop_flag=threading.Event(); self.interface_socket=None
-        self.tracker_dx=0; self.tracker_dy=0; self.tracker_dz=0.0; self.tracker_status=0; self.gui_tracker_enabled=False; self.is_manual_control=False; self.yaw_integral_error=0.0; self.pitch_integral_error=0.0
-        self.yaw_error = 0.0; self.pitch_error = 0.0
-        self.last_control_time=time.time(); self.target_lat=0.0; self.target_lon=0.0; self.target_alt=0.0; self.tracker_data_queue=queue.Queue()
-        self.last_tracker_data_time = 0
-        self.joystick_handler=None; self.joystick_thread=None; self.joystick_values={}
+        self.gui_tracker_enabled=False
+        self.joystick_handler=None; self.joystick_thread=None
         self.joystick_config = self.load_joystick_config()
         self.gui_config = self.load_gui_config()
         self._define_stylesheets(); self.is_dark_theme=True
-        self.image_tracker_reset_flag = 0
-        
-        self.filtered_dx = 0.0
-        self.filtered_dy = 0.0
-        self.filtered_heading = 0.0
-        self.filtered_pitch = 0.0
-        
-        self.prev_target_lat = 0.0
-        self.prev_target_lon = 0.0
-        self.prev_target_alt = 0.0
-        self.last_target_update_time = time.time()
 
-        self.current_target_heading = 0.0
-        self.current_target_velocity = 0.0
+        # Takip hattı ayrı bir thread'de çalışır, arayüz sadece yayınlanan durumu gösterir
+        self.engine = TrackingEngine(config=self.gui_config, rate_hz=float(self.gui_config.get("control_rate_hz", 50)))
+        if PYGAME_AVAILABLE: self.engine.set_joystick_config(self.joystick_config)
+        self._snapshot_pending = False; self._snapshot_speed = self.gimbal_speed
+        self.snapshot_ready.connect(self._show_snapshot); self.engine.subscribe(self._on_engine_snapshot)
 
-        self.velocity_buffer = []
-        self.heading_buffer = []
-        self.MEDIAN_FILTER_WINDOW_SIZE = 30
-        
-        # --- Veri Kaydı (Loglama) Durumları ---
-        self.is_logging = False
-        self.log_file = None
-        self.csv_writer = None
-        
-        # Yumuşatma Filtresi Değişkenleri
-        self.filter_initialized = False
-        self.smoothed_lat = 0.0
-        self.lat_trend = 0.0
-        self.smoothed_lon = 0.0
-        self.lon_trend = 0.0
-        self.smoothed_alt = 0.0
-        self.alt_trend = 0.0
-        
         self.initUI()
-        self.main_update_timer=QTimer(self); self.main_update_timer.timeout.connect(self._main_update_loop); self.loop_counter=0
+        self._connect_engine_inputs()
         self.blink_timer=QTimer(self); self.blink_timer.timeout.connect(self.toggle_tracker_button_blink); self.blink_on=False
     
     def initUI(self):
@@ -400,246 +366,74 @@ class GimbalGUI(QWidget):
         if PYGAME_AVAILABLE:
             self.setup_joystick()
 
-    # --- Core Logic & Main Loop ---
-    def _calculate_focal_length(self, zoom_level, curve_factor=1.0):
-        MIN_FOCAL_LENGTH = 4.5; MAX_FOCAL_LENGTH = 148.4; MAX_OPTICAL_ZOOM = 30.0; DIGITAL_ZOOM_DAMPENING_FACTOR = 0.5
-        if zoom_level > MAX_OPTICAL_ZOOM:
-            dampened_ratio = math.pow(zoom_level / MAX_OPTICAL_ZOOM, DIGITAL_ZOOM_DAMPENING_FACTOR)
-            return MAX_FOCAL_LENGTH * dampened_ratio
-        if zoom_level <= 1.0: return MIN_FOCAL_LENGTH
-        log_zoom_ratio = math.log(zoom_level) / math.log(MAX_OPTICAL_ZOOM)
-        curved_ratio = math.pow(log_zoom_ratio, curve_factor)
-        focal_length = MIN_FOCAL_LENGTH * math.pow(MAX_FOCAL_LENGTH / MIN_FOCAL_LENGTH, curved_ratio)
-        return focal_length
-    
-    def _haversine_distance(self, lat1, lon1, lat2, lon2):
-        R = 6371000; lat1_rad, lon1_rad = math.radians(lat1), math.radians(lon1); lat2_rad, lon2_rad = math.radians(lat2), math.radians(lon2)
-        dlat, dlon = lat2_rad - lat1_rad, lon2_rad - lon1_rad
-        a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)); return R * c
-
-    def _calculate_bearing(self, lat1, lon1, lat2, lon2):
-        lat1_rad, lon1_rad = math.radians(lat1), math.radians(lon1); lat2_rad, lon2_rad = math.radians(lat2), math.radians(lon2)
-        dlon = lon2_rad - lon1_rad
-        y = math.sin(dlon) * math.cos(lat2_rad); x = math.cos(lat1_rad) * math.sin(lat2_rad) - math.sin(lat1_rad) * math.cos(lat2_rad) * math.cos(dlon)
-        bearing_rad = math.atan2(y, x); return (math.degrees(bearing_rad) + 360) % 360
-    
-    def _apply_median_filter(self, new_value, buffer):
-        buffer.append(new_value)
-        if len(buffer) > self.MEDIAN_FILTER_WINDOW_SIZE: buffer.pop(0)
-        if not buffer: return 0.0
-        sorted_buffer, mid = sorted(buffer), len(buffer) // 2
-        return (sorted_buffer[mid - 1] + sorted_buffer[mid]) / 2 if len(sorted_buffer) % 2 == 0 else sorted_buffer[mid]
-    
-    def _apply_angular_median_filter(self, new_value, buffer):
-        buffer.append(new_value)
-        if len(buffer) > self.MEDIAN_FILTER_WINDOW_SIZE: buffer.pop(0)
-        if not buffer: return 0.0
-        sorted_buffer = sorted(buffer)
-        if len(sorted_buffer) > 2 and (sorted_buffer[-1] - sorted_buffer[0]) > 180.0:
-            shifted_buffer = sorted([val + 360 if val < 180 else val for val in sorted_buffer])
-        else: shifted_buffer = sorted_buffer
-        mid = len(shifted_buffer) // 2
-        median = (shifted_buffer[mid - 1] + shifted_buffer[mid]) / 2.0 if len(shifted_buffer) % 2 == 0 else shifted_buffer[mid]
-        return median % 360.0
-
-    def _send_focal_length_response(self, focal_length, zoom, gimbal_tracker_status):
-        if self.tracker_socket and self.tracker_client_addr:
-            try:
-                response_data = {"focal_length": round(focal_length, 2), "zoom": round(zoom, 2), "gimbal_tracker_status": gimbal_tracker_status, "image_tracker_reset": self.image_tracker_reset_flag}
-                self.tracker_socket.sendto(json.dumps(response_data).encode('utf-8'), self.tracker_client_addr)
-            except (socket.error, Exception): pass
-    
-    def _main_update_loop(self):
-        if not(self.cam and self.cam.isConnected()): return
-        if self.tracker_button.isChecked() and self.tracker_client_addr and self.last_tracker_data_time != 0 and (time.time() - self.last_tracker_data_time > 2.0):
-            print("Tracker data timeout!"); self.reset_tracker_state()
-        self.loop_counter+=1 
-        raw_yaw,raw_pitch,raw_roll,zoom,info=self._get_data_from_sources()
-        heading,pitch,roll=self._process_and_calculate_values(raw_yaw,raw_pitch,raw_roll)
-        focal_length = self._calculate_focal_length(zoom,curve_factor=1.25)
-        self._send_focal_length_response(focal_length, zoom, 1 if self.gui_tracker_enabled else 0)
-        is_tracking=self.gui_tracker_enabled and self.tracker_status==1
-        self._execute_control_logic(is_tracking)
-        self._update_target_kinematics(is_tracking)
-        self._update_gui_widgets(raw_yaw,heading,pitch,roll,zoom,focal_length,info,is_tracking)
-        if self.loop_counter%3==0: self._send_service_data(heading,is_tracking)
-
-        if self.is_logging and self.loop_counter % 5 == 0:
-            log_data = collections.OrderedDict()
-            # --- Sensör ve Hesaplanan Veriler ---
-            log_data['raw_yaw'] = f"{raw_yaw:.2f}"; log_data['raw_pitch'] = f"{raw_pitch:.2f}"; log_data['raw_roll'] = f"{raw_roll:.2f}"
-            log_data['filtered_heading'] = f"{heading:.2f}"; log_data['filtered_pitch'] = f"{pitch:.2f}"
-            log_data['zoom_level'] = f"{zoom:.1f}"; log_data['focal_length'] = f"{focal_length:.1f}"
-            log_data['record_state'] = info.record_state; log_data['motion_mode'] = info.motion_mode
-            log_data['mount_dir'] = info.mount_dir; log_data['hdr_state'] = info.hdr_sta
-            log_data['tracker_status'] = self.tracker_status; log_data['tracker_dx'] = self.tracker_dx
-            log_data['tracker_dy'] = self.tracker_dy; log_data['tracker_dz'] = f"{self.tracker_dz:.2f}"
-            log_data['is_gui_tracking_enabled'] = self.gui_tracker_enabled
-            log_data['target_latitude'] = f"{self.target_lat:.7f}"; log_data['target_longitude'] = f"{self.target_lon:.7f}"
-            log_data['target_altitude'] = f"{self.target_alt:.2f}"; log_data['target_velocity'] = f"{self.current_target_velocity:.2f}"
-            log_data['target_heading'] = f"{self.current_target_heading:.2f}"; log_data['yaw_pi_error'] = f"{self.yaw_error:.2f}"
-            log_data['pitch_pi_error'] = f"{self.pitch_error:.2f}"; log_data['yaw_pi_integrator'] = f"{self.yaw_integral_error:.2f}"
-            log_data['pitch_pi_integrator'] = f"{self.pitch_integral_error:.2f}"
-            # --- Arayüzden Girilen Değerler ---
-            log_data['kp_yaw'] = self.kp_yaw_input.text(); log_data['ki_yaw'] = self.ki_yaw_input.text()
-            log_data['kp_pitch'] = self.kp_pitch_input.text(); log_data['ki_pitch'] = self.ki_pitch_input.text()
-            log_data['pixel_filter_alpha'] = self.filter_alpha_input.text(); log_data['pi_speed_limit'] = self.pi_speed_limit_input.text()
-            log_data['gimbal_filter_alpha'] = self.gimbal_filter_alpha_input.text()
-            log_data['max_jump_distance'] = self.max_jump_distance_input.text()
-            log_data['smoothing_alpha'] = self.smoothing_alpha_input.text()
-            log_data['smoothing_beta'] = self.smoothing_beta_input.text()
-            log_data['gimbal_lat_input'] = self.gimbal_lat_input.text(); log_data['gimbal_lon_input'] = self.gimbal_lon_input.text()
-            log_data['gimbal_alt_input'] = self.gimbal_alt_input.text(); log_data['north_offset_input'] = self.true_north_offset_input.text()
-            log_data['home_lat_input'] = self.home_lat_input.text(); log_data['home_lon_input'] = self.home_lon_input.text()
-            log_data['home_alt_input'] = self.home_alt_input.text(); log_data['min_speed_input'] = self.min_speed_input.text()
-            log_data['max_speed_input'] = self.max_speed_input.text()
-            self._write_log_entry(log_data)
-
-    def _get_data_from_sources(self):
-        try: 
-            tracker_data = self.tracker_data_queue.get_nowait()
-            raw_dx = tracker_data.get('dx', 0); raw_dy = tracker_data.get('dy', 0)
-            try: alpha = max(0.0, min(1.0, float(self.filter_alpha_input.text())))
-            except (ValueError, TypeError): alpha = 0.3
-            self.filtered_dx = (alpha * raw_dx) + (1 - alpha) * self.filtered_dx
-            self.filtered_dy = (alpha * raw_dy) + (1 - alpha) * self.filtered_dy
-            self.tracker_dx = int(self.filtered_dx); self.tracker_dy = int(self.filtered_dy)
-            raw_dz  = tracker_data.get('dz', 0.0)
-            self.tracker_dz = (alpha * raw_dz) + (1 - alpha) * self.tracker_dz
-            self.tracker_status = tracker_data.get('tracker_status', 0)
-            self.last_tracker_data_time = time.time()
-        except queue.Empty: pass
-        raw_yaw, raw_pitch, raw_roll = self.cam.getAttitude()
-        zoom = self.cam.getCurrentZoomLevel(); info = self.cam.getGimbalInfo()
-        return raw_yaw, raw_pitch, raw_roll, zoom, info
-
-    def _process_and_calculate_values(self,raw_yaw,raw_pitch,raw_roll):
-        normalized_pitch=(raw_pitch+360)%360; raw_pitch_processed=180.0-normalized_pitch; raw_pitch_processed=max(-90.0,min(90.0,raw_pitch_processed)); roll=-raw_roll
-        try: true_north_offset=float(self.true_north_offset_input.text())
-        except(ValueError,TypeError): true_north_offset=0.0
-        raw_heading=(raw_yaw+true_north_offset)%360
-        try: alpha = max(0.0, min(1.0, float(self.gimbal_filter_alpha_input.text())))
-        except(ValueError,TypeError): alpha = 0.2
-        if self.filtered_heading == 0.0 and self.filtered_pitch == 0.0:
-            self.filtered_heading, self.filtered_pitch = raw_heading, raw_pitch_processed
-        diff = (raw_heading - self.filtered_heading + 180) % 360 - 180
-        self.filtered_heading = (self.filtered_heading + alpha * diff + 360) % 360
-        self.filtered_pitch = (alpha * raw_pitch_processed) + (1 - alpha) * self.filtered_pitch
-        return self.filtered_heading,self.filtered_pitch,roll
-        
-    def _execute_control_logic(self, is_tracking):
-        if self.is_manual_control: return
-        if not self.gui_tracker_enabled:
-            if not PYGAME_AVAILABLE: return
-            try: min_speed, max_speed = int(self.min_speed_input.text()), int(self.max_speed_input.text())
-            except ValueError: min_speed, max_speed = 1, 100
-            speed_range = max_speed - min_speed
-            speed_axis_str, yaw_axis_str, pitch_axis_str = self.joystick_config.get("SPEED_AXIS"), self.joystick_config.get("YAW_AXIS"), self.joystick_config.get("PITCH_AXIS")
-            speed_axis_index, yaw_axis_index, pitch_axis_index = -1, -1, -1
-            if isinstance(speed_axis_str, str) and speed_axis_str.startswith("Eksen "): speed_axis_index = int(speed_axis_str.split(" ")[-1])
-            if isinstance(yaw_axis_str, str) and yaw_axis_str.startswith("Eksen "): yaw_axis_index = int(yaw_axis_str.split(" ")[-1])
-            if isinstance(pitch_axis_str, str) and pitch_axis_str.startswith("Eksen "): pitch_axis_index = int(pitch_axis_str.split(" ")[-1])
-            speed_axis_val=self.joystick_values.get(speed_axis_index,-1.0);joystick_yaw_val=self.joystick_values.get(yaw_axis_index,0.0);joystick_pitch_val=self.joystick_values.get(pitch_axis_index,0.0)
-            if self.joystick_config.get("REVERSE_SPEED"): speed_axis_val *= -1
-            if speed_axis_val > -0.99:
-                new_speed = int(min_speed + speed_range * ((speed_axis_val + 1.0) / 2.0))
-                if abs(new_speed - self.gimbal_speed) > 1: self.speed_slider.setValue(new_speed)
-            if self.joystick_config.get("REVERSE_YAW"): joystick_yaw_val *= -1
-            if self.joystick_config.get("REVERSE_PITCH"): joystick_pitch_val *= -1
-            if abs(joystick_yaw_val) > 0 or abs(joystick_pitch_val) > 0:
-                self.cam.setGimbalSpeed(int(self.gimbal_speed*joystick_yaw_val),int(-self.gimbal_speed*joystick_pitch_val)); return
-        self._run_pi_controller(is_tracking)
-
-    def _update_target_kinematics(self, is_tracking):
-        if is_tracking and self.target_lat != 0.0 and self.prev_target_lat != 0.0:
-            current_time, dt = time.time(), time.time() - self.last_target_update_time
-            if dt > 0.01:
-                horizontal_dist = self._haversine_distance(self.prev_target_lat, self.prev_target_lon, self.target_lat, self.target_lon)
-                raw_velocity = math.sqrt(horizontal_dist**2 + (self.target_alt-self.prev_target_alt)**2) / dt
-                self.current_target_velocity = self._apply_median_filter(raw_velocity, self.velocity_buffer)
-                raw_heading = self._calculate_bearing(self.prev_target_lat, self.prev_target_lon, self.target_lat, self.target_lon)
-                self.current_target_heading = self._apply_angular_median_filter(raw_heading, self.heading_buffer)
-            self.prev_target_lat,self.prev_target_lon,self.prev_target_alt=self.target_lat,self.target_lon,self.target_alt
-            self.last_target_update_time = current_time
-        elif is_tracking and self.target_lat != 0.0 and self.prev_target_lat == 0.0:
-            self.prev_target_lat,self.prev_target_lon,self.prev_target_alt = self.target_lat,self.target_lon,self.target_alt
-            self.last_target_update_time = time.time()
-            self.current_target_velocity, self.current_target_heading = 0.0, 0.0
-            self.velocity_buffer.clear(); self.heading_buffer.clear()
-        elif not is_tracking:
-            self.prev_target_lat,self.prev_target_lon,self.prev_target_alt=0.0,0.0,0.0
-            self.current_target_heading, self.current_target_velocity = 0.0, 0.0
-            self.velocity_buffer.clear(); self.heading_buffer.clear()
-
-    def _update_gui_widgets(self,raw_yaw,heading,pitch,roll,zoom,focal_length,info,is_tracking):
-
-        self.attitude_widget.set_attitude(heading,pitch,roll); self.yaw_value.setText(f"{raw_yaw:.2f}°(H:{heading:.2f}°)"); self.pitch_value.setText(f"{pitch:.2f}°"); self.roll_value.setText(f"{roll:.2f}°")
-        self.zoom_value.setText(f"{zoom:.1f}x"); self.focal_length_value.setText(f"{focal_length:.1f} mm"); self.record_value.setText(f"{self.record_map.get(info.record_state,'-')}")
-        self.mode_value.setText(f"{self.mode_map.get(info.motion_mode,'-')}"); self.mount_value.setText(f"{self.mount_map.get(info.mount_dir,'-')}"); self.hdr_value.setText(f"{self.hdr_map.get(info.hdr_sta,'-')}")
-        self.tracker_status_label.setText(f"{self.tracker_status}"); self.dx_label.setText(f"{self.tracker_dx}"); self.dy_label.setText(f"{self.tracker_dy}"); self.dz_label.setText(f"{self.tracker_dz:.2f}")
-        
-        if is_tracking:
-            try:
-                # Gerekli verileri al
-                gimbal_lat,gimbal_lon,gimbal_alt=(float(self.gimbal_lat_input.text()),float(self.gimbal_lon_input.text()),float(self.gimbal_alt_input.text()))
-                alpha = float(self.smoothing_alpha_input.text())
-                beta = float(self.smoothing_beta_input.text())
-
-                # Ham hedef koordinatlarını hesapla
-                raw_target_lat, raw_target_lon, raw_target_alt = self.calculate_target_coordinates(gimbal_lat,gimbal_lon,gimbal_alt,heading,pitch,self.tracker_dz)
-
-                if not self.filter_initialized:
-                    self._initialize_smoothing(raw_target_lat, raw_target_lon, raw_target_alt)
-                    self.filter_initialized = True
-                else:
-                    self._apply_smoothing(raw_target_lat, raw_target_lon, raw_target_alt, alpha, beta)
-
-                # Nihai yumuşatılmış hedefi `self.target_*` değişkenlerine ata
-                self.target_lat, self.target_lon, self.target_alt = self.smoothed_lat, self.smoothed_lon, self.smoothed_alt
-
-                # GUI'yi güncelle
-                self.target_lat_label.setText(f"{self.target_lat:.7f}"); self.target_lon_label.setText(f"{self.target_lon:.7f}"); self.target_alt_label.setText(f"{self.target_alt:.2f} m")
-                self.target_heading_label.setText(f"{self.current_target_heading:.2f}°"); self.target_velocity_label.setText(f"{self.current_target_velocity:.2f} m/s")
-                
-            except (ValueError, TypeError):
+    # --- Engine Snapshot Display ---
+    def _connect_engine_inputs(self):
+        param_inputs = {
+            "kp_yaw": self.kp_yaw_input, "ki_yaw": self.ki_yaw_input, "kp_pitch": self.kp_pitch_input, "ki_pitch": self.ki_pitch_input,
+            "pixel_filter_alpha": self.filter_alpha_input, "pi_speed_limit": self.pi_speed_limit_input,
+            "gimbal_filter_alpha": self.gimbal_filter_alpha_input, "max_jump_distance": self.max_jump_distance_input,
+            "smoothing_alpha": self.smoothing_alpha_input, "smoothing_beta": self.smoothing_beta_input,
+            "gimbal_lat": self.gimbal_lat_input, "gimbal_lon": self.gimbal_lon_input, "gimbal_alt": self.gimbal_alt_input,
+            "north_offset": self.true_north_offset_input, "home_lat": self.home_lat_input, "home_lon": self.home_lon_input,
+            "home_alt": self.home_alt_input, "min_speed": self.min_speed_input, "max_speed": self.max_speed_input,
+        }
+        for name, line_edit in param_inputs.items():
+            self.engine.set_param(name, line_edit.text())
+            line_edit.textChanged.connect(lambda text, name=name: self.engine.set_param(name, text))
+        update_interface_target = lambda _: self.engine.set_interface_target(self.interface_ip_input.text(), self.interface_port_input.text())
+        self.interface_ip_input.textChanged.connect(update_interface_target); self.interface_port_input.textChanged.connect(update_interface_target)
+        update_interface_target(None)
+
+    def _on_engine_snapshot(self, snapshot):
+        # Engine thread'inden çağrılır, arayüz en son durumu gösterir ve bekleyen güncellemeler birikmez
+        if self._snapshot_pending: return
+        self._snapshot_pending = True; self.snapshot_ready.emit()
+
+    def _show_snapshot(self):
+        self._snapshot_pending = False
+        snapshot = self.engine.snapshot
+        if snapshot and self.cam and self.cam.isConnected(): self._update_gui_widgets(snapshot)
+
+    def _update_gui_widgets(self, s):
+        self.attitude_widget.set_attitude(s.heading,s.pitch,s.roll); self.yaw_value.setText(f"{s.raw_yaw:.2f}°(H:{s.heading:.2f}°)"); self.pitch_value.setText(f"{s.pitch:.2f}°"); self.roll_value.setText(f"{s.roll:.2f}°")
+        self.zoom_value.setText(f"{s.zoom:.1f}x"); self.focal_length_value.setText(f"{s.focal_length:.1f} mm"); self.record_value.setText(f"{self.record_map.get(s.record_state,'-')}")
+        self.mode_value.setText(f"{self.mode_map.get(s.motion_mode,'-')}"); self.mount_value.setText(f"{self.mount_map.get(s.mount_dir,'-')}"); self.hdr_value.setText(f"{self.hdr_map.get(s.hdr_sta,'-')}")
+        self.loop_value.setText(f"{self.engine.rate_hz:.0f} Hz, {s.deadline_misses} kaçırma")
+        self.tracker_status_label.setText(f"{s.tracker_status}"); self.dx_label.setText(f"{s.tracker_dx}"); self.dy_label.setText(f"{s.tracker_dy}"); self.dz_label.setText(f"{s.tracker_dz:.2f}")
+        self.tracker_age_label.setText(f"{s.tracker_age_ms:.0f}" if s.tracker_seq else "-")
+
+        # Takip engine tarafından durdurulduysa (ör. tracker zaman aşımı) düğmeleri eşitle
+        if s.tracking_enabled != self.gui_tracker_enabled: self._set_tracker_buttons(s.tracking_enabled)
+        # Hız joystick ile değiştiyse kaydırıcıyı güncelle
+        if s.gimbal_speed != self._snapshot_speed:
+            self._snapshot_speed = s.gimbal_speed
+            if s.gimbal_speed != self.gimbal_speed: self.speed_slider.setValue(s.gimbal_speed)
+
+        if s.is_tracking:
+            if s.target_valid:
+                self.target_lat_label.setText(f"{s.target_lat:.7f}"); self.target_lon_label.setText(f"{s.target_lon:.7f}"); self.target_alt_label.setText(f"{s.target_alt:.2f} m")
+                self.target_heading_label.setText(f"{s.target_heading:.2f}°"); self.target_velocity_label.setText(f"{s.target_velocity:.2f} m/s")
+            else:
                 self.target_lat_label.setText("Hatalı Veri"); self.target_lon_label.setText("Hatalı Veri"); self.target_alt_label.setText("Hatalı Veri")
 
             # PI Kontrolcü hata göstergelerini güncelle
-            self.yaw_error_label.setText(f"{self.yaw_error:.2f}"); self.pitch_error_label.setText(f"{self.pitch_error:.2f}")
-            self.yaw_integrator_label.setText(f"{self.yaw_integral_error:.2f}"); self.pitch_integrator_label.setText(f"{self.pitch_integral_error:.2f}")
+            self.yaw_error_label.setText(f"{s.yaw_error:.2f}"); self.pitch_error_label.setText(f"{s.pitch_error:.2f}")
+            self.yaw_integrator_label.setText(f"{s.yaw_integrator:.2f}"); self.pitch_integrator_label.setText(f"{s.pitch_integrator:.2f}")
         else: 
-            self.reset_target_info()
+            self.reset_target_labels()
         
-        if self.tracker_status==1 and not self.gui_tracker_enabled:
+        if s.tracker_status==1 and not self.gui_tracker_enabled:
             if not self.blink_timer.isActive(): self.blink_timer.start(300)
         else:
             if self.blink_timer.isActive(): self.blink_timer.stop()
             self.start_tracker_button.setStyleSheet("")
-
-    def _send_service_data(self,heading,is_tracking):
-        if self.interface_socket:
-            try:
-                gimbal_lat, gimbal_lon, gimbal_alt = float(self.gimbal_lat_input.text()), float(self.gimbal_lon_input.text()), float(self.gimbal_alt_input.text())
-                target_status = 1 if is_tracking else 0
-                if target_status == 1:
-                    target_payload = {"target_latitude": round(self.target_lat,7), "target_longitude": round(self.target_lon,7), "target_altitude": round(self.target_alt,2) - 5, "target_status": target_status, "target_heading": round(self.current_target_heading,2), "target_velocity": round(self.current_target_velocity,2)}
-                else:
-                    try: home_lat, home_lon, home_alt = float(self.home_lat_input.text()), float(self.home_lon_input.text()), float(self.home_alt_input.text())
-                    except (ValueError, TypeError): home_lat, home_lon, home_alt = 0.0, 0.0, 0.0
-                    target_payload = {"target_latitude": home_lat, "target_longitude": home_lon, "target_altitude": home_alt, "target_status": target_status, "target_heading": 0.0, "target_velocity": 0.0}
-                data_to_send = {"target": target_payload, "gimbal": {"gimbal_latitude": round(gimbal_lat,14), "gimbal_longitude": round(gimbal_lon,14), "gimbal_altitude": round(gimbal_alt,2), "gimbal_heading": round(heading,0)}, "tracker": {"tracker_x":0.0,"tracker_y":0.0,"tracker_z":0.0,"tracker_status":0.0}}
-                message = json.dumps(data_to_send, indent=4).encode('utf-8')
-                target_ip, target_port = self.interface_ip_input.text(), int(self.interface_port_input.text())
-                self.interface_socket.sendto(message, (target_ip, target_port))
-            except(ValueError, socket.error): pass
     
     # --- Configuration Management ---
     def load_gui_config(self):
         try:
             with open("gui_config.json", 'r') as f: return json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
-            return {"kp_yaw":"0.8","ki_yaw":"0.01","kp_pitch":"0.8","ki_pitch":"0.01","gimbal_lat":"0.0","gimbal_lon":"0.0","gimbal_alt":"0.0","home_lat":"0.0","home_lon":"0.0","home_alt":"0.0","north_offset":"0.0","filter_alpha":"0.3","gimbal_filter_alpha":"0.2","pi_speed_limit":"100","connection_ip":"192.168.144.25","connection_port":"37260","min_speed":"5","max_speed":"100","tracker_listen_ip":"0.0.0.0","tracker_listen_port":"8888","interface_target_ip":"127.0.0.1","interface_target_port":"8889", "max_jump_distance": "50.0", "smoothing_alpha": "0.4", "smoothing_beta": "0.2"}
+            return {"kp_yaw":"0.8","ki_yaw":"0.01","kp_pitch":"0.8","ki_pitch":"0.01","gimbal_lat":"0.0","gimbal_lon":"0.0","gimbal_alt":"0.0","home_lat":"0.0","home_lon":"0.0","home_alt":"0.0","north_offset":"0.0","filter_alpha":"0.3","gimbal_filter_alpha":"0.2","pi_speed_limit":"100","connection_ip":"192.168.144.25","connection_port":"37260","min_speed":"5","max_speed":"100","tracker_listen_ip":"0.0.0.0","tracker_listen_port":"8888","interface_target_ip":"127.0.0.1","interface_target_port":"8889", "max_jump_distance": "50.0", "smoothing_alpha": "0.4", "smoothing_beta": "0.2", "control_rate_hz": "50"}
 
     def save_gui_config(self):
         config_to_save = {
@@ -656,8 +450,11 @@ class GimbalGUI(QWidget):
             "interface_target_ip": self.interface_ip_input.text(), "interface_target_port": self.interface_port_input.text(),
             "max_jump_distance": self.max_jump_distance_input.text(),
             "smoothing_alpha": self.smoothing_alpha_input.text(),
-            "smoothing_beta": self.smoothing_beta_input.text()
+            "smoothing_beta": self.smoothing_beta_input.text(),
+            "control_rate_hz": self.control_rate_combo.currentText()
         }
+        # Ek arayüz aboneleri sadece dosyadan düzenlenir
+        if "interface_subscribers" in self.gui_config: config_to_save["interface_subscribers"] = self.gui_config["interface_subscribers"]
         try:
             with open("gui_config.json", 'w') as f: json.dump(config_to_save, f, indent=4)
         except Exception as e: print(f"GUI yapılandırması kaydedilemedi: {e}")
@@ -680,7 +477,7 @@ class GimbalGUI(QWidget):
     
     def update_joystick_config(self,new_config):
         self.joystick_config=new_config;self.save_joystick_config(new_config)
-        if PYGAME_AVAILABLE: self.setup_joystick()
+        if PYGAME_AVAILABLE: self.engine.set_joystick_config(new_config); self.setup_joystick()
         print("Joystick ayarları güncellendi ve kaydedildi.")
     
     def setup_joystick(self):
@@ -695,7 +492,7 @@ class GimbalGUI(QWidget):
         self.joystick_handler.joystick_disconnected.connect(lambda:print("Joystick bağlı değil!"))
         self.joystick_thread.start()
 
-    def _handle_joystick_axis(self, axis, value): self.joystick_values[axis]=value
+    def _handle_joystick_axis(self, axis, value): self.engine.set_joystick_axis(axis, value)
     
     def _handle_joystick_button_press(self, button):
         config,button_str = self.joystick_config,f"Düğme {button}" 
@@ -739,29 +536,11 @@ class GimbalGUI(QWidget):
             if should_stop_zoom: self.stop_zoom()
             if should_stop_focus: self.stop_manual_focus()
     
-    # --- Service & Communication Methods ---
-    def receive_tracker_data_loop(self):
-        while not self.tracker_thread_stop_flag.is_set():
-            try:
-                data, addr = self.tracker_socket.recvfrom(1024)
-                if not data: continue
-                if self.tracker_client_addr != addr:
-                    print(f"Görüntü işleme istemcisinden ilk veri alındı: {addr}")
-                    self.tracker_client_addr=addr; self.last_tracker_data_time=time.time()
-                try:
-                    self.tracker_data_queue.put(json.loads(data.decode('utf-8')))
-                except (json.JSONDecodeError, UnicodeDecodeError) as e: print(f"Hatalı tracker verisi: {e}. Alınan: {data}")
-            except socket.error:
-                if self.tracker_thread_stop_flag.is_set(): break
-                else: print(f"Tracker soket hatası."); break
-            except Exception as e: print(f"Tracker dinleme döngüsünde beklenmedik hata: {e}"); break
-        print("Tracker dinleme döngüsü durdu.")
-
     # --- UI Creation Methods ---
     def create_status_group(self):
         group_box=QGroupBox("Gimbal Durumu"); group_box.setObjectName("StatusGroup"); main_layout=QHBoxLayout(); self.attitude_widget=AttitudeIndicator(); main_layout.addWidget(self.attitude_widget,1); main_layout.addSpacing(15); text_layout=QGridLayout()
-        self.yaw_value=QLabel("-");self.pitch_value=QLabel("-");self.roll_value=QLabel("-");self.zoom_value=QLabel("-");self.focal_length_value=QLabel("-");self.record_value=QLabel("-");self.mode_value=QLabel("-");self.mount_value=QLabel("-");self.hdr_value=QLabel("-");self.model_value=QLabel("-")
-        labels={"Sapma:":self.yaw_value,"Tırmanış:":self.pitch_value,"Yatış:":self.roll_value,"Yakınlaştırma:":self.zoom_value,"Odak Uzaklığı:":self.focal_length_value,"Kayıt:":self.record_value,"Mod:":self.mode_value,"Yön:":self.mount_value,"HDR:":self.hdr_value,"Model:":self.model_value}
+        self.yaw_value=QLabel("-");self.pitch_value=QLabel("-");self.roll_value=QLabel("-");self.zoom_value=QLabel("-");self.focal_length_value=QLabel("-");self.record_value=QLabel("-");self.mode_value=QLabel("-");self.mount_value=QLabel("-");self.hdr_value=QLabel("-");self.model_value=QLabel("-");self.loop_value=QLabel("-")
+        labels={"Sapma:":self.yaw_value,"Tırmanış:":self.pitch_value,"Yatış:":self.roll_value,"Yakınlaştırma:":self.zoom_value,"Odak Uzaklığı:":self.focal_length_value,"Kayıt:":self.record_value,"Mod:":self.mode_value,"Yön:":self.mount_value,"HDR:":self.hdr_value,"Model:":self.model_value,"Döngü:":self.loop_value}
         for row,(header_text,value_label) in enumerate(labels.items()):
             header_label=QLabel(header_text);header_label.setObjectName("StatusHeader");value_label.setObjectName("StatusValue");text_layout.addWidget(header_label,row,0);text_layout.addWidget(value_label,row,1)
         text_layout.setColumnStretch(2,1);main_layout.addLayout(text_layout,1);group_box.setLayout(main_layout);return group_box
@@ -780,6 +559,9 @@ class GimbalGUI(QWidget):
         self.smoothing_beta_input=QLineEdit(self.gui_config.get("smoothing_beta", "0.2"))
 
         # left_layout.addWidget(QLabel("Maks. Sıçrama (m):"), 3, 2); left_layout.addWidget(self.max_jump_distance_input, 3, 3)
+        self.control_rate_combo=QComboBox(); self.control_rate_combo.addItems([str(rate) for rate in LOOP_RATES])
+        self.control_rate_combo.setCurrentText(str(self.gui_config.get("control_rate_hz", "50"))); self.control_rate_combo.currentTextChanged.connect(lambda text: self.engine.set_rate(float(text)))
+        left_layout.addWidget(QLabel("Kontrol Hızı (Hz):"), 3, 2); left_layout.addWidget(self.control_rate_combo, 3, 3)
         
         left_layout.addWidget(QLabel("Konum Düzeltme α:"), 4, 0); left_layout.addWidget(self.smoothing_alpha_input, 4, 1)
         left_layout.addWidget(QLabel("Trend Düzeltme β:"), 4, 2); left_layout.addWidget(self.smoothing_beta_input, 4, 3)
@@ -800,54 +582,18 @@ class GimbalGUI(QWidget):
         left_layout.addLayout(button_layout,10,0,1,4)
         
         right_group = QGroupBox("Anlık Takip Verisi"); right_layout = QVBoxLayout()
-        self.tracker_status_label=QLabel("-");self.dx_label=QLabel("-");self.dy_label=QLabel("-");self.dz_label=QLabel("-");self.yaw_error_label=QLabel("-");self.pitch_error_label=QLabel("-");self.yaw_integrator_label=QLabel("-");self.pitch_integrator_label=QLabel("-")
-        for label in [self.tracker_status_label,self.dx_label,self.dy_label,self.dz_label,self.yaw_error_label,self.pitch_error_label,self.yaw_integrator_label,self.pitch_integrator_label]:label.setObjectName("TrackerValue")
+        self.tracker_status_label=QLabel("-");self.dx_label=QLabel("-");self.dy_label=QLabel("-");self.dz_label=QLabel("-");self.yaw_error_label=QLabel("-");self.pitch_error_label=QLabel("-");self.yaw_integrator_label=QLabel("-");self.pitch_integrator_label=QLabel("-");self.tracker_age_label=QLabel("-")
+        for label in [self.tracker_age_label,self.tracker_status_label,self.dx_label,self.dy_label,self.dz_label,self.yaw_error_label,self.pitch_error_label,self.yaw_integrator_label,self.pitch_integrator_label]:label.setObjectName("TrackerValue")
         form_layout=QGridLayout(); form_layout.addWidget(QLabel("Takip Durum:"),0,0); form_layout.addWidget(self.tracker_status_label,0,1); form_layout.addWidget(QLabel("dx (pixel):"),1,0); form_layout.addWidget(self.dx_label,1,1); form_layout.addWidget(QLabel("dy (pixel):"),2,0); form_layout.addWidget(self.dy_label,2,1); form_layout.addWidget(QLabel("dz (metre):"),3,0); form_layout.addWidget(self.dz_label,3,1)
         form_layout.addWidget(QLabel("Sapma Hata (px):"),4,0); form_layout.addWidget(self.yaw_error_label,4,1); form_layout.addWidget(QLabel("Tırmanış Hata (px):"),5,0); form_layout.addWidget(self.pitch_error_label,5,1)
         form_layout.addWidget(QLabel("Sapma İntegratör:"),6,0); form_layout.addWidget(self.yaw_integrator_label,6,1); form_layout.addWidget(QLabel("Tırmanış İntegratör:"),7,0); form_layout.addWidget(self.pitch_integrator_label,7,1)
+        form_layout.addWidget(QLabel("Veri Yaşı (ms):"),8,0); form_layout.addWidget(self.tracker_age_label,8,1)
         right_layout.addLayout(form_layout); right_layout.addStretch(); right_group.setLayout(right_layout)
         main_h_layout.addLayout(left_layout,3); main_h_layout.addWidget(right_group,1); group_box.setLayout(main_h_layout); return group_box
     
     # --- Tracker & PI Controller Methods ---
     def trigger_image_tracker_reset(self):
-        self.image_tracker_reset_flag = 1 - self.image_tracker_reset_flag
-        self.reset_tracker_button.setChecked(self.image_tracker_reset_flag == 1)
-        
-    def calculate_target_coordinates(self, gimbal_lat, gimbal_lon, gimbal_alt, heading, pitch, distance):
-        if distance <= 0: return gimbal_lat, gimbal_lon, gimbal_alt
-        EARTH_RADIUS=6378137.0; heading_rad,pitch_rad,gimbal_lat_rad=math.radians(heading),math.radians(pitch),math.radians(gimbal_lat)
-        horizontal_distance,delta_up = distance*math.cos(pitch_rad),distance*math.sin(pitch_rad)
-        delta_north,delta_east = horizontal_distance*math.cos(heading_rad),horizontal_distance*math.sin(heading_rad)
-        delta_lat=math.degrees(delta_north/EARTH_RADIUS); delta_lon=math.degrees(delta_east/(EARTH_RADIUS*math.cos(gimbal_lat_rad)))
-        return gimbal_lat + delta_lat, gimbal_lon + delta_lon, gimbal_alt + delta_up
-
-    def _initialize_smoothing(self, lat, lon, alt):
-        """Çift Üstel Düzeltme filtresini ilk geçerli veriyle başlatır."""
-        self.smoothed_lat = lat
-        self.smoothed_lon = lon
-        self.smoothed_alt = alt
-        # Trend (hız) başlangıçta sıfırdır.
-        self.lat_trend = 0.0
-        self.lon_trend = 0.0
-        self.alt_trend = 0.0
-
-    def _apply_smoothing(self, raw_lat, raw_lon, raw_alt, alpha, beta):
-        """Verilen ham koordinatlara Holt's Method'u uygular ve sınıf değişkenlerini günceller."""
-        
-        # Enlem için hesaplama
-        last_smoothed_lat = self.smoothed_lat
-        self.smoothed_lat = alpha * raw_lat + (1 - alpha) * (last_smoothed_lat + self.lat_trend)
-        self.lat_trend = beta * (self.smoothed_lat - last_smoothed_lat) + (1 - beta) * self.lat_trend
-        
-        # Boylam için hesaplama
-        last_smoothed_lon = self.smoothed_lon
-        self.smoothed_lon = alpha * raw_lon + (1 - alpha) * (last_smoothed_lon + self.lon_trend)
-        self.lon_trend = beta * (self.smoothed_lon - last_smoothed_lon) + (1 - beta) * self.lon_trend
-        
-        # İrtifa için hesaplama
-        last_smoothed_alt = self.smoothed_alt
-        self.smoothed_alt = alpha * raw_alt + (1 - alpha) * (last_smoothed_alt + self.alt_trend)
-        self.alt_trend = beta * (self.smoothed_alt - last_smoothed_alt) + (1 - beta) * self.alt_trend
+        self.reset_tracker_button.setChecked(self.engine.toggle_image_tracker_reset() == 1)
 
     def toggle_tracker_button_blink(self):
         COLOR_STANDBY = "#A9A9A9" if self.is_dark_theme else "#D3D3D3"
@@ -857,42 +603,18 @@ class GimbalGUI(QWidget):
         self.blink_on = not self.blink_on
 
     def start_gui_tracker(self):
-        self.gui_tracker_enabled = True; self.is_manual_control = False
-        self.yaw_integral_error, self.pitch_integral_error = 0.0, 0.0
-        self.last_control_time = time.time()
-        self.start_tracker_button.setEnabled(False); self.stop_tracker_button.setEnabled(True)
-        self._set_manual_movement_enabled(False)  
-        if self.cam and self.cam.isConnected(): self.cam.setGimbalSpeed(0, 0)
+        self.engine.start_tracking(); self._set_tracker_buttons(True)
     
     def stop_gui_tracker(self):
-        self.gui_tracker_enabled = False
-        self.yaw_error, self.pitch_error = 0.0, 0.0
-        self.yaw_integral_error, self.pitch_integral_error = 0.0, 0.0
-        self.start_tracker_button.setEnabled(True); self.stop_tracker_button.setEnabled(False)
-        self._set_manual_movement_enabled(True)
-        if self.cam and self.cam.isConnected(): self.cam.setGimbalSpeed(0, 0)
+        self.engine.stop_tracking(); self._set_tracker_buttons(False)
 
-    def _run_pi_controller(self, is_tracking):
-        if not is_tracking:
-            if self.cam and self.cam.isConnected(): self.cam.setGimbalSpeed(0, 0)
-            return
-        current_time=time.time(); dt=current_time - self.last_control_time
-        if dt <= 0.001: return
-        self.last_control_time = current_time
-        try:
-            kp_yaw,ki_yaw,kp_pitch,ki_pitch = float(self.kp_yaw_input.text()),float(self.ki_yaw_input.text()),float(self.kp_pitch_input.text()),float(self.ki_pitch_input.text())
-            speed_limit = max(1, min(100, int(self.pi_speed_limit_input.text())))
-        except ValueError: return
-        self.yaw_error,self.pitch_error = self.tracker_dx,self.tracker_dy
-        self.yaw_integral_error = max(-50,min(50,self.yaw_integral_error + self.yaw_error * dt))
-        yaw_speed = (kp_yaw * self.yaw_error) + (ki_yaw * self.yaw_integral_error)
-        self.pitch_integral_error = max(-50,min(50,self.pitch_integral_error + self.pitch_error * dt))
-        pitch_speed = (kp_pitch * self.pitch_error) + (ki_pitch * self.pitch_integral_error)
-        final_yaw_speed=int(max(-speed_limit,min(speed_limit,yaw_speed))); final_pitch_speed=int(max(-speed_limit,min(speed_limit,pitch_speed)))
-        self.cam.setGimbalSpeed(final_yaw_speed, final_pitch_speed)
+    def _set_tracker_buttons(self, enabled):
+        self.gui_tracker_enabled = enabled
+        self.start_tracker_button.setEnabled(not enabled); self.stop_tracker_button.setEnabled(enabled)
+        self._set_manual_movement_enabled(not enabled)
 
     def reset_status_labels(self):
-        self.attitude_widget.set_attitude(0,0,0);self.yaw_value.setText("-");self.pitch_value.setText("-");self.roll_value.setText("-");self.zoom_value.setText("-");self.focal_length_value.setText("-");self.record_value.setText("-");self.mode_value.setText("-");self.mount_value.setText("-");self.hdr_value.setText("-");self.model_value.setText("-");self.target_lat_label.setText("-");self.target_lon_label.setText("-");self.target_alt_label.setText("-");self.target_heading_label.setText("-");self.target_velocity_label.setText("-")
+        self.attitude_widget.set_attitude(0,0,0);self.yaw_value.setText("-");self.pitch_value.setText("-");self.roll_value.setText("-");self.zoom_value.setText("-");self.focal_length_value.setText("-");self.record_value.setText("-");self.mode_value.setText("-");self.mount_value.setText("-");self.hdr_value.setText("-");self.model_value.setText("-");self.loop_value.setText("-");self.target_lat_label.setText("-");self.target_lon_label.setText("-");self.target_alt_label.setText("-");self.target_heading_label.setText("-");self.target_velocity_label.setText("-")
     
     # --- UI Creation Methods ---
     def create_settings_group(self):
@@ -919,7 +641,7 @@ class GimbalGUI(QWidget):
     def start_movement(self,direction):
         if not(self.cam and self.cam.isConnected()):return
         if self.gui_tracker_enabled: self.stop_gui_tracker()
-        self.is_manual_control=True;yaw,pitch=(0,0)
+        self.engine.set_manual_control(True);yaw,pitch=(0,0)
         if direction=='up':pitch=self.gimbal_speed
         elif direction=='down':pitch=-self.gimbal_speed
         elif direction=='left':yaw=-self.gimbal_speed
@@ -927,7 +649,7 @@ class GimbalGUI(QWidget):
         self.cam.setGimbalSpeed(yaw,pitch)
     
     def stop_movement(self):
-        self.is_manual_control=False
+        self.engine.set_manual_control(False)
         if self.cam and self.cam.isConnected():self.cam.setGimbalSpeed(0,0)
     
     # --- UI Creation Methods ---
@@ -987,14 +709,15 @@ class GimbalGUI(QWidget):
     
     def toggle_connection(self):
         if self.cam and self.cam.isConnected():
-            self.main_update_timer.stop();self.cam.disconnect();self.cam=None;self.status_label.setText("Bağlı Değil");self.status_label.setStyleSheet("color:#FF5555;");self.connect_button.setText("Bağlan");self.toggle_controls(False);self.reset_status_labels()
+            self.engine.stop();self.engine.set_camera(None);self.cam.disconnect();self.cam=None;self.status_label.setText("Bağlı Değil");self.status_label.setStyleSheet("color:#FF5555;");self.connect_button.setText("Bağlan");self.toggle_controls(False);self.reset_status_labels()
         else:
             try:
                 ip,port=self.ip_input.text(),int(self.port_input.text());self.status_label.setText("Bağlanılıyor...");self.status_label.setStyleSheet("color:#F0E68C;");threading.Thread(target=self.connect_worker,args=(ip,port),daemon=True).start()
             except (ValueError, TypeError): self.status_label.setText("Geçersiz IP/Port"); self.status_label.setStyleSheet("color:#FF5555;")
     
     def connection_successful(self):
-        self.status_label.setText("Bağlandı");self.status_label.setStyleSheet("color:#55FF55;");self.connect_button.setText("Bağlantıyı Kes");self.toggle_controls(True);self.main_update_timer.start(20)
+        self.status_label.setText("Bağlandı");self.status_label.setStyleSheet("color:#55FF55;");self.connect_button.setText("Bağlantıyı Kes");self.toggle_controls(True)
+        self.engine.set_camera(self.cam);self.engine.start()
         model_name=self.cam.getCameraTypeString()or"Bilinmiyor";self.model_value.setText(f"{model_name}")
     
     def _set_manual_movement_enabled(self,enabled):
@@ -1007,7 +730,7 @@ class GimbalGUI(QWidget):
         else: self._set_manual_movement_enabled(False)
 
     # --- Action & Event Handlers ---
-    def speed_changed(self,value):self.gimbal_speed=value;self.speed_label.setText(f"Hız: {self.gimbal_speed}%")
+    def speed_changed(self,value):self.gimbal_speed=value;self.engine.set_gimbal_speed(value);self.speed_label.setText(f"Hız: {self.gimbal_speed}%")
     def center_gimbal(self):
         if self.gui_tracker_enabled: self.stop_gui_tracker()
         if self.cam and self.cam.isConnected():self.cam.requestCenterGimbal()
@@ -1035,62 +758,28 @@ class GimbalGUI(QWidget):
     # --- Service & Communication Methods ---
     def toggle_tracker_service(self, checked):
         if checked:
-            try:
-                listen_ip,port=self.tracker_ip_input.text(),int(self.tracker_port_input.text())
-                self.tracker_socket=socket.socket(socket.AF_INET, socket.SOCK_DGRAM); self.tracker_socket.bind((listen_ip, port))
-                self.tracker_thread_stop_flag.clear(); self.tracker_handler_thread=threading.Thread(target=self.receive_tracker_data_loop,daemon=True); self.tracker_handler_thread.start()
-                self.tracker_button.setText("Servisi Durdur"); print(f"UDP Tracker servisi {listen_ip}:{port} üzerinde başlatıldı.")
-            except Exception as e:
-                print(f"UDP Tracker servisi başlatılamadı: {e}"); self.tracker_button.setChecked(False)
-                if self.tracker_socket: self.tracker_socket.close(); self.tracker_socket=None
+            try: listen_ip,port=self.tracker_ip_input.text(),int(self.tracker_port_input.text())
+            except (ValueError, TypeError) as e: print(f"UDP Tracker servisi başlatılamadı: {e}"); self.tracker_button.setChecked(False); return
+            if self.engine.start_tracker_service(listen_ip, port): self.tracker_button.setText("Servisi Durdur")
+            else: self.tracker_button.setChecked(False)
         else:
-            self.tracker_thread_stop_flag.set()
-            if self.tracker_socket: self.tracker_socket.close() 
-            if self.tracker_handler_thread and self.tracker_handler_thread.is_alive(): self.tracker_handler_thread.join(timeout=0.2)
-            self.tracker_socket, self.tracker_handler_thread = None, None
-            self.tracker_button.setText("Servisi Başlat"); self.reset_tracker_state(); print("UDP Tracker servisi durduruldu.")
+            self.engine.stop_tracker_service()
+            self.tracker_button.setText("Servisi Başlat"); self._set_tracker_buttons(self.engine.tracking_enabled); self.reset_target_labels()
 
-    def reset_target_info(self):
-        """GUI üzerindeki hedef etiketlerini temizler ve filtre durumlarını sıfırlar."""
-        self.target_lat, self.target_lon, self.target_alt = 0.0, 0.0, 0.0
+    def reset_target_labels(self):
+        """GUI üzerindeki hedef etiketlerini temizler."""
         self.target_lat_label.setText("-"); self.target_lon_label.setText("-")
         self.target_alt_label.setText("-"); self.target_heading_label.setText("-")
         self.target_velocity_label.setText("-"); self.yaw_error_label.setText("-")
         self.pitch_error_label.setText("-"); self.yaw_integrator_label.setText("-")
         self.pitch_integrator_label.setText("-")
-        
-        # Filtre durumlarını sıfırla
-        self.filter_initialized = False
-        self.smoothed_lat, self.lat_trend = 0.0, 0.0
-        self.smoothed_lon, self.lon_trend = 0.0, 0.0
-        self.smoothed_alt, self.alt_trend = 0.0, 0.0
-
-    def reset_tracker_state(self):
-        self.tracker_status=0;self.tracker_dx=0;self.tracker_dy=0;self.tracker_dz=0.0
-        self.tracker_client_addr = None; self.last_tracker_data_time = 0 
-        if self.gui_tracker_enabled: self.stop_gui_tracker()
-        with self.tracker_data_queue.mutex:self.tracker_data_queue.queue.clear()
-
-        self.reset_target_info() # Filtreleri ve GUI'yi temizler
-
-        self.filtered_heading, self.filtered_pitch = 0.0, 0.0
-        self.prev_target_lat, self.prev_target_lon, self.prev_target_alt = 0.0, 0.0, 0.0
-        self.last_target_update_time = time.time()
-        self.current_target_heading, self.current_target_velocity = 0.0, 0.0
-        self.velocity_buffer.clear(); self.heading_buffer.clear()
-        QTimer.singleShot(0, self.update_tracker_gui_labels)
-
-    def update_tracker_gui_labels(self):
-        self.tracker_status_label.setText(f"{self.tracker_status}"); self.dx_label.setText(f"{self.tracker_dx}"); self.dy_label.setText(f"{self.tracker_dy}"); self.dz_label.setText(f"{self.tracker_dz:.2f}")
 
     def toggle_interface_service(self,checked):
         if checked:
-            try:
-                self.interface_socket=socket.socket(socket.AF_INET,socket.SOCK_DGRAM);self.interface_button.setText("Servisi Durdur")
-            except Exception as e:print(f"Arayüz servisi başlatılamadı: {e}");self.interface_button.setChecked(False)
+            if self.engine.start_interface_service(): self.interface_button.setText("Servisi Durdur")
+            else: self.interface_button.setChecked(False)
         else:
-            if self.interface_socket:self.interface_socket.close()
-            self.interface_socket=None;self.interface_button.setText("Servisi Başlat")
+            self.engine.stop_interface_service();self.interface_button.setText("Servisi Başlat")
     
     # --- Styling and Theming ---
     def _toggle_theme(self):
@@ -1109,41 +798,15 @@ class GimbalGUI(QWidget):
     # --- Veri Kaydı (Loglama) Metodları ---
     def toggle_logging(self, checked):
         if checked:
-            try:
-                timestamp=datetime.now().strftime("%Y%m%d_%H%M%S");filename=f"gimbal_log_{timestamp}.csv"
-                self.log_file=open(filename,'w',newline='',encoding='utf-8');self.csv_writer=csv.writer(self.log_file)
-                self._write_log_header();self.is_logging=True;self.log_button.setText("Kaydı Durdur");print(f"Veri kaydı başlatıldı: {filename}")
-            except Exception as e: print(f"Veri kaydı başlatılamadı: {e}"); self.log_button.setChecked(False)
+            if self.engine.start_logging(): self.log_button.setText("Kaydı Durdur")
+            else: self.log_button.setChecked(False)
         else:
-            if self.log_file: self.log_file.close()
-            self.log_file,self.csv_writer,self.is_logging=None,None,False;self.log_button.setText("Kaydı Başlat");print("Veri kaydı durduruldu.")
-
-    def _write_log_header(self):
-        if not self.csv_writer: return
-        headers = [
-            "time", "raw_yaw", "raw_pitch", "raw_roll", "filtered_heading", "filtered_pitch", "zoom_level", 
-            "focal_length", "record_state", "motion_mode", "mount_dir", "hdr_state", "tracker_status", 
-            "tracker_dx", "tracker_dy", "tracker_dz", "is_gui_tracking_enabled", "target_latitude", 
-            "target_longitude", "target_altitude", "target_velocity", "target_heading", "yaw_pi_error", 
-            "pitch_pi_error", "yaw_pi_integrator", "pitch_pi_integrator", "kp_yaw", "ki_yaw", "kp_pitch", 
-            "ki_pitch", "pixel_filter_alpha", "pi_speed_limit", "gimbal_filter_alpha", "max_jump_distance",
-            "smoothing_alpha", "smoothing_beta", "gimbal_lat_input", "gimbal_lon_input", "gimbal_alt_input",
-            "north_offset_input", "home_lat_input", "home_lon_input", "home_alt_input",
-            "min_speed_input", "max_speed_input"
-        ]
-        self.csv_writer.writerow(headers)
-
-    def _write_log_entry(self, log_data):
-        if not self.csv_writer: return
-        self.csv_writer.writerow([datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]] + list(log_data.values()))
+            self.engine.stop_logging();self.log_button.setText("Kaydı Başlat")
 
     # --- Cleanup ---
     def closeEvent(self,event):
         self.save_gui_config()
-        if self.is_logging: self.toggle_logging(False)
-        self.main_update_timer.stop()
-        if self.tracker_button.isChecked():self.toggle_tracker_service(False)
-        if self.interface_button.isChecked():self.toggle_interface_service(False)
+        self.engine.close()
         if PYGAME_AVAILABLE:
             if self.joystick_handler:self.joystick_handler.stop()
             if self.joystick_thread and self.joystick_thread.is_alive():self.joystick_thread.join()
@@ -0,0 +1,167 @@
+"""
+Interface service: publishes the gimbal and target positions to several UDP subscribers (ground station,
+mission computer, recorder, ...), each at its own rate, with an optional dead-band and its own encoding.
+
+Encodings:
+- JSON: the {"target": ..., "gimbal": ..., "tracker": ...} object of the interface service, compact
+- BINARY: 56 bytes little endian: magic b'CI', version B, target_status B, target_latitude d, target_longitude d,
+  target_altitude f, target_heading f, target_velocity f, gimbal_latitude d, gimbal_longitude d,
+  gimbal_altitude f, gimbal_heading f
+
+A message is encoded at most once per tick and encoding, the bytes are shared by all subscribers.
+"""
+import json
+import math
+import socket
+import struct
+import threading
+from collections import namedtuple
+from time import monotonic
+
+JSON = 'json'; BINARY = 'binary'
+ENCODINGS = (JSON, BINARY)
+MAGIC = b'CI'
+VERSION = 1
+BINARY_MESSAGE = struct.Struct('<2sBBddfffddff')
+
+ServiceMessage = namedtuple('ServiceMessage', 'target_latitude target_longitude target_altitude target_status target_heading '
+                                              'target_velocity gimbal_latitude gimbal_longitude gimbal_altitude gimbal_heading')
+# Changes below these are not sent, a status change always is. 0 sends any change
+Deadband = namedtuple('Deadband', 'position_m altitude_m heading_deg velocity_mps', defaults=(0.0, 0.0, 0.0, 0.0))
+
+def encode_message(msg, encoding):
+    if encoding == BINARY:
+        return BINARY_MESSAGE.pack(MAGIC, VERSION, msg.target_status, msg.target_latitude, msg.target_longitude, msg.target_altitude,
+                                   msg.target_heading, msg.target_velocity, msg.gimbal_latitude, msg.gimbal_longitude,
+                                   msg.gimbal_altitude, msg.gimbal_heading)
+    data = {"target": {"target_latitude": msg.target_latitude, "target_longitude": msg.target_longitude, "target_altitude": msg.target_altitude,
+                       "target_status": msg.target_status, "target_heading": msg.target_heading, "target_velocity": msg.target_velocity},
+            "gimbal": {"gimbal_latitude": msg.gimbal_latitude, "gimbal_longitude": msg.gimbal_longitude, "gimbal_altitude": msg.gimbal_altitude,
+                       "gimbal_heading": msg.gimbal_heading},
+            "tracker": {"tracker_x": 0.0, "tracker_y": 0.0, "tracker_z": 0.0, "tracker_status": 0.0}}
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+def decode_message(data):
+    """
+    Returns
+    --
+    [ServiceMessage] from a JSON or binary interface message
+    """
+    if data[:2] == MAGIC:
+        if len(data) < BINARY_MESSAGE.size: raise ValueError(f"short interface message ({len(data)} bytes)")
+        magic, version, status, *fields = BINARY_MESSAGE.unpack_from(data)
+        if version != VERSION: raise ValueError(f"unsupported interface message v{version}")
+        t_lat, t_lon, t_alt, t_heading, t_velocity, g_lat, g_lon, g_alt, g_heading = fields
+        return ServiceMessage(t_lat, t_lon, t_alt, status, t_heading, t_velocity, g_lat, g_lon, g_alt, g_heading)
+    d = json.loads(bytes(data).decode('utf-8')); t = d["target"]; g = d["gimbal"]
+    return ServiceMessage(t["target_latitude"], t["target_longitude"], t["target_altitude"], t["target_status"], t["target_heading"],
+                          t["target_velocity"], g["gimbal_latitude"], g["gimbal_longitude"], g["gimbal_altitude"], g["gimbal_heading"])
+
+def _distance_m(lat1, lon1, lat2, lon2):
+    # Equirectangular, exact enough for dead-band distances
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2)); y = math.radians(lat2 - lat1)
+    return 6371000 * math.hypot(x, y)
+
+def _angle_deg(a, b): return abs((a - b + 180) % 360 - 180)
+
+class Subscriber:
+    """
+    Params
+    --
+    - addr [tuple] (ip, port) destination
+    - rate_hz [float] Maximum message rate
+    - encoding [str] JSON or BINARY
+    - deadband [Deadband] Only send when a value moved more than this since the last sent message, None sends at rate_hz
+    - keepalive [float] With a dead-band, seconds after which an unchanged message is sent again
+    """
+    def __init__(self, addr, rate_hz=50.0 / 3, encoding=JSON, deadband=None, keepalive=1.0):
+        if encoding not in ENCODINGS: raise ValueError(f"unknown encoding {encoding}")
+        self.addr = addr; self.encoding = encoding; self.deadband = deadband; self.keepalive = keepalive
+        self.period = 1.0 / rate_hz if rate_hz else 0.0
+        self._next = 0.0; self._last = None; self._last_time = 0.0
+        self.sent = 0; self.suppressed = 0; self.errors = 0
+
+    def _changed(self, msg, now):
+        last, db = self._last, self.deadband
+        if db is None or last is None or msg.target_status != last.target_status or now - self._last_time >= self.keepalive: return True
+        return (_distance_m(last.target_latitude, last.target_longitude, msg.target_latitude, msg.target_longitude) > db.position_m
+                or _distance_m(last.gimbal_latitude, last.gimbal_longitude, msg.gimbal_latitude, msg.gimbal_longitude) > db.position_m
+                or abs(msg.target_altitude - last.target_altitude) > db.altitude_m
+                or abs(msg.gimbal_altitude - last.gimbal_altitude) > db.altitude_m
+                or _angle_deg(msg.target_heading, last.target_heading) > db.heading_deg
+                or _angle_deg(msg.gimbal_heading, last.gimbal_heading) > db.heading_deg
+                or abs(msg.target_velocity - last.target_velocity) > db.velocity_mps)
+
+    def stats(self):
+        return {"addr": f"{self.addr[0]}:{self.addr[1]}", "encoding": self.encoding, "sent": self.sent,
+                "suppressed": self.suppressed, "errors": self.errors}
+
+class InterfacePublisher:
+    """
+    Fans interface messages out to the subscribers. publish() is called by the engine thread, subscribers
+    can be added and removed from any thread.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._socket = None
+        self._subscribers = ()
+
+    def open(self):
+        """
+        Returns
+        --
+        [bool] True if the socket is open
+        """
+        if self._socket is None: self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        return True
+
+    def close(self):
+        sock, self._socket = self._socket, None
+        if sock: sock.close()
+
+    def isOpen(self): return self._socket is not None
+
+    def add(self, subscriber):
+        with self._lock: self._subscribers = self._subscribers + (subscriber,)
+        return subscriber
+
+    def remove(self, subscriber):
+        with self._lock: self._subscribers = tuple(s for s in self._subscribers if s is not subscriber)
+
+    def subscribers(self): return self._subscribers
+
+    def due(self, now=None):
+        """
+        Returns
+        --
+        [bool] True if a subscriber is due, the caller only builds the message then
+        """
+        if self._socket is None: return False
+        now = monotonic() if now is None else now
+        return any(now >= s._next for s in self._subscribers)
+
+    def publish(self, msg, now=None):
+        """
+        Sends `msg` [ServiceMessage] to the due subscribers whose dead-band it exceeds
+
+        Returns
+        --
+        [int] Number of datagrams sent
+        """
+        sock = self._socket
+        if sock is None: return 0
+        now = monotonic() if now is None else now
+        payloads = {}; n = 0
+        for s in self._subscribers:
+            if now < s._next: continue
+            # Keep the schedule of the subscriber, or restart it after a pause
+            s._next = s._next + s.period if now - s._next < s.period else now + s.period
+            if not s._changed(msg, now): s.suppressed += 1; continue
+            payload = payloads.get(s.encoding)
+            if payload is None: payload = payloads[s.encoding] = encode_message(msg, s.encoding)
+            try: sock.sendto(payload, s.addr)
+            except OSError: s.errors += 1; continue
+            s._last = msg; s._last_time = now; s.sent += 1; n += 1
+        return n
+
+    def stats(self): return [s.stats() for s in self._subscribers]
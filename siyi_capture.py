@@ -0,0 +1,178 @@
+"""
+Binary capture and replay of SIYI UDP traffic
+
+File layout, little endian:
+- header: magic b'SIYICAP1', wall clock start [ns], monotonic start [ns]
+- records, append only: monotonic time [ns] (Q), direction (B, 0 received / 1 sent), length (H), datagram bytes
+A capture holds one session: record times are relative to the header's monotonic start, so an existing
+capture is never appended to.
+The time index is a sidecar file (<capture>.idx) of (monotonic time [ns], record offset) pairs, one per
+second by default. It is rebuilt by scanning when missing.
+
+    python siyi_capture.py info capture.bin
+    python siyi_capture.py dump capture.bin
+"""
+import argparse
+import bisect
+import mmap
+import os
+import struct
+import threading
+from time import monotonic_ns, perf_counter_ns, sleep, time_ns
+from siyi_message import PROTOCOL, SIYIParser
+
+MAGIC = b'SIYICAP1'
+FILE_HEADER = struct.Struct('<8sQQ')
+RECORD = struct.Struct('<QBH')
+INDEX_ENTRY = struct.Struct('<QQ')
+RX = 0; TX = 1
+DIRECTIONS = ('rx', 'tx')
+
+class CaptureWriter:
+    """
+    Writes datagrams to a new capture file. Thread-safe, the receive and sender threads write to the same file, writes after close() are ignored.
+
+    Params
+    --
+    - path [str] Capture file, created. Raises FileExistsError if a non-empty file exists
+    - index_interval [float] Seconds between time index entries
+    """
+    def __init__(self, path, index_interval=1.0):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            raise FileExistsError(f"{path} already holds a capture, captures are not appended to")
+        self._file = open(path, 'wb')
+        self._file.write(FILE_HEADER.pack(MAGIC, time_ns(), monotonic_ns()))
+        self._index = open(path + '.idx', 'wb')
+        self._offset = self._file.tell()
+        self._interval_ns = int(index_interval * 1e9); self._next_index = 0
+        self.records = 0
+
+    def write(self, direction, data, t_ns=None):
+        t_ns = monotonic_ns() if t_ns is None else t_ns
+        with self._lock:
+            if self._file is None: return
+            if t_ns >= self._next_index:
+                self._index.write(INDEX_ENTRY.pack(t_ns, self._offset)); self._next_index = t_ns + self._interval_ns
+            self._file.write(RECORD.pack(t_ns, direction, len(data))); self._file.write(data)
+            self._offset += RECORD.size + len(data); self.records += 1
+
+    def flush(self):
+        with self._lock:
+            if self._file: self._file.flush(); self._index.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is None: return
+            self._file.close(); self._index.close(); self._file = None
+
+class CaptureReader:
+    """
+    Memory-mapped reader of a capture file
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f: self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.wall_start_ns, self.mono_start_ns = FILE_HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC: raise ValueError(f"{path} is not a SIYI capture file")
+        self._index = self._loadIndex()
+
+    def close(self):
+        try: self._mm.close()
+        except BufferError: pass   # record views still held by the caller, unmapped when they are released
+
+    def _loadIndex(self):
+        try:
+            with open(self.path + '.idx', 'rb') as f: raw = f.read()
+            entries = [INDEX_ENTRY.unpack_from(raw, i) for i in range(0, len(raw) - INDEX_ENTRY.size + 1, INDEX_ENTRY.size)]
+            if entries: return entries
+        except OSError: pass
+        entries = []; next_t = 0
+        for offset, t_ns, _, _, _ in self._scan(FILE_HEADER.size):
+            if t_ns >= next_t: entries.append((t_ns, offset)); next_t = t_ns + 1_000_000_000
+        return entries
+
+    def _scan(self, offset):
+        mm = self._mm; end = len(mm)
+        while offset + RECORD.size <= end:
+            t_ns, direction, n = RECORD.unpack_from(mm, offset)
+            start = offset + RECORD.size
+            if start + n > end: return   # last record cut short by a crash
+            yield offset, t_ns, direction, start, n
+            offset = start + n
+
+    def records(self, start_ns=None, end_ns=None, direction=None):
+        """
+        Yields (t_ns, direction, data memoryview) in file order
+
+        Params
+        --
+        - start_ns, end_ns [int] Monotonic time range, located with the time index
+        - direction [int] RX or TX only
+        """
+        offset = FILE_HEADER.size
+        if start_ns is not None and self._index:
+            i = bisect.bisect_right([t for t, _ in self._index], start_ns) - 1
+            if i >= 0: offset = self._index[i][1]
+        view = memoryview(self._mm)
+        for _, t_ns, d, start, n in self._scan(offset):
+            if start_ns is not None and t_ns < start_ns: continue
+            if end_ns is not None and t_ns > end_ns: return
+            if direction is not None and d != direction: continue
+            yield t_ns, d, view[start:start + n]
+
+    def summary(self):
+        counts = [0, 0]; sizes = [0, 0]; first = last = None
+        for t_ns, d, data in self.records():
+            counts[d] += 1; sizes[d] += len(data)
+            if first is None: first = t_ns
+            last = t_ns
+        return {"records": sum(counts), "rx": counts[RX], "tx": counts[TX], "rx_bytes": sizes[RX], "tx_bytes": sizes[TX],
+                "duration_s": (last - first) / 1e9 if first is not None else 0.0, "index_entries": len(self._index)}
+
+def replay(reader, sdk, speed=1.0, start_ns=None, end_ns=None):
+    """
+    Feeds the received datagrams of a capture into an SDK instance, through the same path as the socket
+
+    Params
+    --
+    - reader [CaptureReader]
+    - sdk [SIYISDK] Receiver, it does not need to be connected
+    - speed [float] Replay speed, 1.0 is real time. None replays as fast as possible
+    - start_ns, end_ns [int] Monotonic time range of the capture to replay
+
+    Returns
+    --
+    [int] Number of datagrams replayed
+    """
+    n = 0; t0 = None; wall0 = perf_counter_ns()
+    for t_ns, _, data in reader.records(start_ns, end_ns, RX):
+        if t0 is None: t0 = t_ns
+        if speed:
+            delay = ((t_ns - t0) / speed - (perf_counter_ns() - wall0)) / 1e9
+            if delay > 0: sleep(delay)
+        sdk.datagramReceived(data, None, t_ns)
+        n += 1
+    return n
+
+def main():
+    parser = argparse.ArgumentParser(description="SIYI capture tools")
+    parser.add_argument('command', choices=('info', 'dump'))
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    reader = CaptureReader(args.path)
+    if args.command == 'info':
+        for k, v in reader.summary().items(): print(f"{k}: {v}")
+    else:
+        parsers = (SIYIParser(), SIYIParser())
+        for t_ns, d, data in reader.records():
+            p = parsers[d]; p.feed(data)
+            for cmd_id, seq, payload in p.frames():
+                name = PROTOCOL[cmd_id][0] if cmd_id in PROTOCOL else f"{cmd_id:02x}"
+                print(f"{(t_ns - reader.mono_start_ns) / 1e9:12.6f} {DIRECTIONS[d]} seq={seq:5d} {name:18s} {bytes(payload).hex()}")
+    reader.close()
+
+if __name__ == "__main__":
+    main()
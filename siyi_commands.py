@@ -0,0 +1,91 @@
+"""
+Prioritised outgoing command queue for the SIYI SDK
+"""
+import threading
+from collections import deque
+from time import monotonic
+from siyi_message import COMMAND, frameCmd
+
+# Priority classes, lower is sent first
+MOTION = 0; ACTION = 1; POLL = 2
+PRIORITY_NAMES = ('motion', 'action', 'poll')
+
+# Commands not listed are user actions (photo, record, zoom, focus, settings)
+COMMAND_PRIORITY = {
+    COMMAND.GIMBAL_SPEED: MOTION, COMMAND.SET_GIMBAL_ATTITUDE: MOTION, COMMAND.CENTER: MOTION,
+    COMMAND.ACQUIRE_FW_VER: POLL, COMMAND.ACQUIRE_HW_ID: POLL, COMMAND.ACQUIRE_GIMBAL_INFO: POLL,
+    COMMAND.ACQUIRE_GIMBAL_ATT: POLL, COMMAND.REQUEST_MAX_ZOOM: POLL, COMMAND.CURRENT_ZOOM_VALUE: POLL,
+    COMMAND.REQUEST_IMAGE_MODE: POLL, COMMAND.REQUEST_WORKING_MODE: POLL, COMMAND.REQUEST_CODEC_SPECS: POLL,
+}
+
+class CommandQueue:
+    """
+    Encoded frames waiting for the single writer, one FIFO per priority class.
+    A queued motion command is dropped when a newer one with the same command ID arrives.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._queues = tuple(deque() for _ in PRIORITY_NAMES)
+        self._stats = tuple(dict(queued=0, sent=0, superseded=0, max_depth=0, latency_sum=0.0, latency_max=0.0) for _ in PRIORITY_NAMES)
+
+    def __len__(self): return sum(len(q) for q in self._queues)
+
+    def put(self, frame, now=None):
+        """
+        Returns
+        --
+        [int] Priority class of the frame
+        """
+        now = monotonic() if now is None else now
+        cmd_id = frameCmd(frame); cls = COMMAND_PRIORITY.get(cmd_id, ACTION)
+        with self._cond:
+            q = self._queues[cls]; stats = self._stats[cls]
+            if cls == MOTION and q:
+                kept = [item for item in q if item[1] != cmd_id]
+                stats['superseded'] += len(q) - len(kept)
+                q.clear(); q.extend(kept)
+            q.append((now, cmd_id, frame))
+            stats['queued'] += 1; stats['max_depth'] = max(stats['max_depth'], len(q))
+            self._cond.notify()
+        return cls
+
+    def pop(self, now=None):
+        """
+        Returns
+        --
+        The next frame to send, highest priority first, or None if empty
+        """
+        with self._cond:
+            for q, stats in zip(self._queues, self._stats):
+                if not q: continue
+                t, _, frame = q.popleft()
+                latency = (monotonic() if now is None else now) - t
+                stats['sent'] += 1; stats['latency_sum'] += latency
+                if latency > stats['latency_max']: stats['latency_max'] = latency
+                return frame
+        return None
+
+    def wait(self, timeout=None):
+        """
+        Blocks until a frame is queued, wake() is called or `timeout` seconds have passed
+        """
+        with self._cond:
+            if not any(self._queues): self._cond.wait(timeout)
+
+    def wake(self):
+        with self._cond: self._cond.notify_all()
+
+    def clear(self):
+        with self._cond:
+            for q in self._queues: q.clear()
+
+    def stats(self):
+        """
+        Returns
+        --
+        [dict] Per priority class: current depth, max depth, frames queued/sent/superseded, mean and max queue latency [s]
+        """
+        with self._cond:
+            return {name: dict(depth=len(q), max_depth=s['max_depth'], queued=s['queued'], sent=s['sent'], superseded=s['superseded'],
+                               latency_mean=s['latency_sum'] / s['sent'] if s['sent'] else 0.0, latency_max=s['latency_max'])
+                    for name, q, s in zip(PRIORITY_NAMES, self._queues, self._stats)}
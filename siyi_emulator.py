@@ -0,0 +1,248 @@
+"""
+SIYI gimbal emulator. Answers the SDK requests over UDP like a real gimbal, so the SDK and GUI
+can be tested and benchmarked without hardware.
+
+    python siyi_emulator.py --port 37260 --latency 0.01 --loss 0.02
+
+Connect with SIYISDK(server_ip="127.0.0.1", port=37260, local_port=37261): on one host the
+SDK cannot bind the port the emulator listens on.
+"""
+import argparse
+import heapq
+import logging
+import math
+import random
+import select
+import socket
+import threading
+from time import monotonic, sleep
+from siyi_message import *
+
+class SIYIEmulator:
+    FREQ_HZ = {code: hz for hz, code in RequestDataStreamMsg.FREQ.items()}
+    MAX_RATE = 90.0         # [deg/s] gimbal rate at speed command 100
+    SPEED_TAU = 0.1         # [s] time constant of the rate response
+    ZOOM_RATE = 2.0         # [x/s] zoom change rate
+    YAW_LIMITS = (-135.0, 135.0); PITCH_LIMITS = (-90.0, 25.0)
+
+    def __init__(self, ip="127.0.0.1", port=37260, model='73', max_zoom=6.0,
+                 latency=0.0, jitter=0.0, loss=0.0, corrupt=0.0, seed=None, debug=False):
+        """
+        Params
+        --
+        - ip, port [str, int] Address the emulated gimbal listens on
+        - model [str] Hardware ID model code, see HardwareIDMsg.CAM_DICT
+        - max_zoom [float] Maximum zoom level
+        - latency [float] One-way delay [s] added to every packet sent back
+        - jitter [float] Uniform random extra delay [s] in [0, jitter]
+        - loss [float] Probability of dropping a packet, applied to both directions
+        - corrupt [float] Probability of flipping one bit of a packet sent back
+        - seed [int] Random seed for reproducible fault patterns
+        - debug [bool] print debug messages
+        """
+        self._debug = debug
+        # Handlers and the format are left to the application, see main()
+        self._logger = logging.getLogger(self.__class__.__name__)
+        if self._debug: self._logger.setLevel(logging.DEBUG)
+
+        self._addr = (ip, port)
+        self.model = model; self.max_zoom = max_zoom
+        self.latency = latency; self.jitter = jitter; self.loss = loss; self.corrupt = corrupt
+        self._rng = random.Random(seed)
+        self._out = SIYIMESSAGE(); self._parser = SIYIParser()
+        self._socket = None; self._thread = None; self._stop = True
+        self._lock = threading.Lock()
+        self._outq = []; self._out_n = 0
+        self.stats = dict(received=0, answered=0, sent=0, dropped_in=0, dropped_out=0, corrupted=0, streamed=0)
+        self.reset()
+
+        self._handlers = {
+            COMMAND.ACQUIRE_FW_VER: lambda f: (0x030201, 0x030105, 0x010203),
+            COMMAND.ACQUIRE_HW_ID: lambda f: (self.model.encode('ascii'), b'EMU0000001'),
+            COMMAND.AUTO_FOCUS: lambda f: (1,),
+            COMMAND.MANUAL_ZOOM: self._manualZoom,
+            COMMAND.MANUAL_FOCUS: lambda f: (1,),
+            COMMAND.GIMBAL_SPEED: self._gimbalSpeed,
+            COMMAND.CENTER: self._center,
+            COMMAND.ACQUIRE_GIMBAL_INFO: lambda f: (0, self.hdr, 0, self.record, self.motion_mode, 1, self.video_output),
+            COMMAND.PHOTO_VIDEO_HDR: self._photoVideoHdr,
+            COMMAND.ACQUIRE_GIMBAL_ATT: lambda f: self._attitude(),
+            COMMAND.SET_GIMBAL_ATTITUDE: self._setAttitude,
+            COMMAND.ABSOLUTE_ZOOM: self._absoluteZoom,
+            COMMAND.REQUEST_IMAGE_MODE: lambda f: (self.image_mode,),
+            COMMAND.SEND_IMAGE_MODE: self._setImageMode,
+            COMMAND.REQUEST_MAX_ZOOM: lambda f: divmod(round(self.max_zoom * 10), 10),
+            COMMAND.CURRENT_ZOOM_VALUE: lambda f: divmod(round(self.zoom * 10), 10),
+            COMMAND.REQUEST_WORKING_MODE: lambda f: (self.motion_mode,),
+            COMMAND.REQUEST_CODEC_SPECS: lambda f: (f.stream_type, 2, 1920, 1080, 4000, 0),
+            COMMAND.SET_CODEC_SPECS: lambda f: (f.stream_type, 1),
+            COMMAND.SET_DATA_STREAM: self._setDataStream,
+            COMMAND.SET_UTC_TIME: lambda f: (1,),
+            COMMAND.FORMAT_SD_CARD: lambda f: (1,),
+        }
+
+    def reset(self):
+        with self._lock:
+            self.yaw = 0.0; self.pitch = 0.0; self.roll = 0.0
+            self.yaw_rate = 0.0; self.pitch_rate = 0.0
+            self.yaw_speed_cmd = 0; self.pitch_speed_cmd = 0; self.target = None
+            self.zoom = 1.0; self.zoom_dir = 0; self.zoom_target = None
+            self.record = 0; self.hdr = 0; self.motion_mode = 1; self.video_output = 0; self.image_mode = 0
+            self.stream_hz = 0; self._client = None; self._next_stream = 0.0; self._t = monotonic()
+
+    def start(self):
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind(self._addr)
+        self._addr = self._socket.getsockname()
+        self._stop = False
+        self._thread = threading.Thread(target=self.loop, daemon=True)
+        self._thread.start()
+        self._logger.info(f"Emulating {HardwareIDMsg.CAM_DICT.get(self.model, self.model)} on {self._addr[0]}:{self._addr[1]}")
+        return self._addr
+
+    def stop(self):
+        self._stop = True
+        if self._thread: self._thread.join()
+        if self._socket: self._socket.close(); self._socket = None
+
+    def getAttitude(self):
+        with self._lock: self._advance(monotonic()); return (self.yaw, self.pitch, self.roll)
+
+    def loop(self):
+        while not self._stop:
+            now = monotonic()
+            with self._lock:
+                self._advance(now)
+                if self.stream_hz and self._client and now >= self._next_stream:
+                    self._send(self._frame(COMMAND.ACQUIRE_GIMBAL_ATT, self._attitude()), self._client, now)
+                    self.stats['streamed'] += 1
+                    # Late ticks are skipped, not bunched
+                    self._next_stream = max(self._next_stream + 1.0 / self.stream_hz, now)
+            self._flush(now)
+            wake = now + 0.1
+            if self.stream_hz and self._client: wake = min(wake, self._next_stream)
+            if self._outq: wake = min(wake, self._outq[0][0])
+            readable, _, _ = select.select([self._socket], [], [], max(0.0, wake - monotonic()))
+            if readable: self._receive()
+
+    def _receive(self):
+        try: data, addr = self._socket.recvfrom(1024)
+        except OSError: return
+        if self.loss and self._rng.random() < self.loss: self.stats['dropped_in'] += 1; return
+        self._parser.feed(data)
+        now = monotonic()
+        with self._lock:
+            self._advance(now)
+            for cmd_id, seq, payload in self._parser.frames():
+                self.stats['received'] += 1; self._client = addr
+                handler = self._handlers.get(cmd_id)
+                if handler is None: self._logger.debug(f"Unhandled command {cmd_id:02x}"); continue
+                layout = REQUESTS.get(cmd_id)
+                fields = layout.unpack(payload) if layout is not None else None
+                values = handler(fields)
+                if values is None or RESPONSES.get(cmd_id) is None: continue
+                self._send(self._frame(cmd_id, values), addr, now)
+                self.stats['answered'] += 1
+
+    def _frame(self, cmd_id, values): return bytes(self._out.encode(RESPONSES[cmd_id].pack(*values), cmd_id))
+
+    def _send(self, frame, addr, now):
+        if self.loss and self._rng.random() < self.loss: self.stats['dropped_out'] += 1; return
+        if self.corrupt and self._rng.random() < self.corrupt:
+            frame = bytearray(frame); frame[self._rng.randrange(len(frame))] ^= 1 << self._rng.randrange(8)
+            frame = bytes(frame); self.stats['corrupted'] += 1
+        due = now + self.latency + (self._rng.uniform(0.0, self.jitter) if self.jitter else 0.0)
+        self._out_n += 1
+        heapq.heappush(self._outq, (due, self._out_n, frame, addr))
+
+    def _flush(self, now):
+        while self._outq and self._outq[0][0] <= now:
+            _, _, frame, addr = heapq.heappop(self._outq)
+            try: self._socket.sendto(frame, addr); self.stats['sent'] += 1
+            except OSError as e: self._logger.debug(f"Failed to send to {addr}: {e}")
+
+    def _advance(self, now):
+        dt = now - self._t; self._t = now
+        if dt <= 0: return
+        if self.target is not None:
+            # Angle command: slew at the maximum rate, then hold
+            step = self.MAX_RATE * dt
+            dy = self.target[0] - self.yaw; dp = self.target[1] - self.pitch
+            self.yaw_rate = math.copysign(min(abs(dy), step), dy) / dt
+            self.pitch_rate = math.copysign(min(abs(dp), step), dp) / dt
+        else:
+            k = 1.0 - math.exp(-dt / self.SPEED_TAU)
+            self.yaw_rate += (self.yaw_speed_cmd / 100.0 * self.MAX_RATE - self.yaw_rate) * k
+            self.pitch_rate += (self.pitch_speed_cmd / 100.0 * self.MAX_RATE - self.pitch_rate) * k
+        self.yaw = min(max(self.yaw + self.yaw_rate * dt, self.YAW_LIMITS[0]), self.YAW_LIMITS[1])
+        self.pitch = min(max(self.pitch + self.pitch_rate * dt, self.PITCH_LIMITS[0]), self.PITCH_LIMITS[1])
+
+        if self.zoom_target is not None:
+            dz = self.zoom_target - self.zoom
+            self.zoom += math.copysign(min(abs(dz), self.ZOOM_RATE * dt), dz)
+            if self.zoom == self.zoom_target: self.zoom_target = None
+        elif self.zoom_dir:
+            self.zoom = min(max(self.zoom + self.zoom_dir * self.ZOOM_RATE * dt, 1.0), self.max_zoom)
+
+    def _attitude(self): return (self.yaw, self.pitch, self.roll, self.yaw_rate, self.pitch_rate, 0.0)
+
+    def _manualZoom(self, f):
+        self.zoom_dir = (f.zoom > 0) - (f.zoom < 0); self.zoom_target = None
+        return (self.zoom,)
+    def _absoluteZoom(self, f):
+        self.zoom_target = min(max(f.zoom_int + f.zoom_float / 10.0, 1.0), self.max_zoom); self.zoom_dir = 0
+        return (1,)
+    def _gimbalSpeed(self, f):
+        self.yaw_speed_cmd = f.turn_yaw; self.pitch_speed_cmd = f.turn_pitch; self.target = None
+        return (1,)
+    def _center(self, f):
+        self.target = (0.0, 0.0)
+        return (1,)
+    def _setAttitude(self, f):
+        self.target = (min(max(f.yaw, self.YAW_LIMITS[0]), self.YAW_LIMITS[1]), min(max(f.pitch, self.PITCH_LIMITS[0]), self.PITCH_LIMITS[1]))
+        return (self.yaw, self.pitch, self.roll)
+    def _setImageMode(self, f):
+        self.image_mode = f.vdisp_mode
+        return (self.image_mode,)
+    def _setDataStream(self, f):
+        if f.data_type == RequestDataStreamMsg.ATTITUDE_DATA:
+            self.stream_hz = self.FREQ_HZ.get(f.data_freq, 0); self._next_stream = monotonic()
+        return (f.data_type,)
+    def _photoVideoHdr(self, f):
+        # No direct answer, results are pushed as FUNC_FEEDBACK_INFO or read from gimbal info
+        func = f.func_type
+        if func == 0: self._send(self._frame(COMMAND.FUNC_FEEDBACK_INFO, (0,)), self._client, monotonic())
+        elif func == 1:
+            self.hdr ^= 1
+            self._send(self._frame(COMMAND.FUNC_FEEDBACK_INFO, (2 if self.hdr else 3,)), self._client, monotonic())
+        elif func == 2: self.record ^= 1
+        elif func in (3, 4, 5): self.motion_mode = func - 3
+        elif func in (6, 7): self.video_output = func - 6
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="SIYI gimbal emulator")
+    parser.add_argument('--ip', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=37260)
+    parser.add_argument('--model', default='73', help="Hardware ID model code, e.g. 73 (A8 mini), 78 (ZR30)")
+    parser.add_argument('--max-zoom', type=float, default=6.0)
+    parser.add_argument('--latency', type=float, default=0.0, help="One-way delay [s]")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Random extra delay [s]")
+    parser.add_argument('--loss', type=float, default=0.0, help="Packet loss probability")
+    parser.add_argument('--corrupt', type=float, default=0.0, help="Packet corruption probability")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--debug', action='store_true')
+    args = parser.parse_args()
+
+    LOG_FORMAT = ' [%(levelname)s] %(asctime)s [%(name)s::%(funcName)s] :\t%(message)s'
+    logging.basicConfig(format=LOG_FORMAT, level=logging.DEBUG if args.debug else logging.INFO)
+    emu = SIYIEmulator(args.ip, args.port, args.model, args.max_zoom, args.latency, args.jitter,
+                       args.loss, args.corrupt, args.seed, args.debug)
+    emu.start()
+    try:
+        while True: sleep(1)
+    except KeyboardInterrupt: pass
+    emu.stop()
+
+if __name__ == "__main__":
+    main()
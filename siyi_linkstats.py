@@ -0,0 +1,179 @@
+"""
+Link quality counters for the SIYI SDK: per command traffic, round trip times, sequence gaps and
+attitude stream jitter
+"""
+import math
+from bisect import bisect_left
+from collections import deque
+from time import monotonic
+from siyi_message import COMMAND, PROTOCOL
+
+class LatencyHistogram:
+    """
+    Fixed log-spaced histogram of durations in milliseconds. Percentiles are the upper bound of the
+    bucket they fall in, clamped to the largest value seen.
+    """
+    BOUNDS_MS = (0.25, 0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 50, 75, 100, 150, 200, 300, 500, 750, 1000, 2000, 5000)
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0; self.total = 0.0; self.total_sq = 0.0; self.min = math.inf; self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.count += 1; self.total += ms; self.total_sq += ms * ms
+        if ms < self.min: self.min = ms
+        if ms > self.max: self.max = ms
+
+    def percentile(self, p):
+        if not self.count: return None
+        rank = p / 100.0 * self.count; seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank: return min(self.BOUNDS_MS[i], self.max) if i < len(self.BOUNDS_MS) else self.max
+        return self.max
+
+    def snapshot(self):
+        """
+        Returns
+        --
+        [dict] count, mean, std, min, max, p50, p90, p99 [ms]
+        """
+        if not self.count: return {"count": 0}
+        mean = self.total / self.count
+        std = math.sqrt(max(0.0, self.total_sq / self.count - mean * mean))
+        return {"count": self.count, "mean": mean, "std": std, "min": self.min, "max": self.max,
+                "p50": self.percentile(50), "p90": self.percentile(90), "p99": self.percentile(99)}
+
+class CommandStats:
+    """
+    Traffic of one command ID. The gimbal does not echo the request sequence number, so a response is
+    matched to the newest send of the same command and the older ones are counted as unanswered, as are
+    sends without a response within `window` seconds. The RTT is exact as long as the command is not
+    sent again before its response arrives, which holds for polls and user commands.
+    """
+    __slots__ = ('sent', 'received', 'unanswered', 'overflow', 'rtt', '_outstanding')
+
+    def __init__(self):
+        self.sent = 0; self.received = 0; self.unanswered = 0; self.overflow = 0
+        self.rtt = LatencyHistogram(); self._outstanding = deque(maxlen=64)
+
+    def expire(self, cutoff):
+        q = self._outstanding
+        while q and q[0] < cutoff: q.popleft(); self.unanswered += 1
+
+    def snapshot(self, cutoff):
+        # The receive path expires old sends lazily, count those it has not seen yet
+        late = sum(1 for t in list(self._outstanding) if t < cutoff)
+        return {"sent": self.sent, "received": self.received, "unanswered": self.unanswered + self.overflow + late,
+                "rtt_ms": self.rtt.snapshot()}
+
+class LinkStats:
+    """
+    Link quality counters. `sent()` is called by the writer and `received()` by the receive path, each
+    from a single thread; `snapshot()` can be called from any thread and only reads the counters.
+
+    Params
+    --
+    - window [float] Seconds a response is expected within, older sends are counted as unanswered
+    - stream_cmds [tuple] Command IDs also sent unsolicited by the gimbal. Their responses are not
+      matched to requests, their RTT would be the time to the next stream message
+    """
+    SEQ_WINDOW = 1024   # larger jumps of the gimbal sequence number are a restart, not lost frames
+
+    def __init__(self, window=2.0, stream_cmds=(COMMAND.ACQUIRE_GIMBAL_ATT,)):
+        self.window = window; self.stream_cmds = frozenset(stream_cmds)
+        self.clear()
+
+    def clear(self):
+        # Created up front, the writer and receive threads never insert the same key concurrently
+        self._commands = {cmd_id: CommandStats() for cmd_id in PROTOCOL}
+        self._started = monotonic()
+        self.rx_datagrams = 0; self.rx_bytes = 0; self.rx_frames = 0
+        self.seq_gaps = 0; self.frames_lost = 0; self.reordered = 0; self.seq_resets = 0; self._last_seq = None
+        self.attitude_interval = LatencyHistogram(); self._last_attitude = None
+
+    def _command(self, cmd_id):
+        stats = self._commands.get(cmd_id)
+        if stats is None: stats = self._commands[cmd_id] = CommandStats()
+        return stats
+
+    def sent(self, cmd_id, now):
+        stats = self._command(cmd_id); stats.sent += 1
+        if cmd_id in self.stream_cmds: return
+        q = stats._outstanding
+        if len(q) == q.maxlen: stats.overflow += 1   # the oldest send is dropped by append()
+        q.append(now)
+
+    def datagram(self, n):
+        self.rx_datagrams += 1; self.rx_bytes += n
+
+    def received(self, cmd_id, seq, now):
+        """
+        Counts a valid frame received at monotonic time `now`
+        """
+        self.rx_frames += 1
+        last = self._last_seq
+        if last is None or seq == (last + 1) & 0xFFFF: self._last_seq = seq
+        else: self._seqJump(seq, last)
+
+        stats = self._commands.get(cmd_id) or self._command(cmd_id)
+        stats.received += 1
+        if cmd_id in self.stream_cmds:
+            if self._last_attitude is not None: self.attitude_interval.add((now - self._last_attitude) * 1e3)
+            self._last_attitude = now
+            return
+        stats.expire(now - self.window)
+        q = stats._outstanding
+        if not q: return
+        while len(q) > 1: q.popleft(); stats.unanswered += 1
+        stats.rtt.add((now - q.popleft()) * 1e3)
+
+    def _seqJump(self, seq, last):
+        step = ((seq - last + 0x8000) & 0xFFFF) - 0x8000
+        if 1 < step < self.SEQ_WINDOW: self.seq_gaps += 1; self.frames_lost += step - 1; self._last_seq = seq
+        elif -self.SEQ_WINDOW < step <= 0:
+            # Reordered: it was counted as lost when the newer frame arrived
+            self.reordered += 1
+            if self.frames_lost: self.frames_lost -= 1
+        else: self.seq_resets += 1; self._last_seq = seq
+
+    def resetStream(self):
+        """
+        Forgets the last stream message time, so that a pause (e.g. a reconnection) is not counted as jitter
+        """
+        self._last_attitude = None
+
+    def snapshot(self, parser=None, receiver=None, now=None):
+        """
+        Params
+        --
+        - parser [SIYIParser] Adds its CRC and resync counters
+        - receiver [DatagramReceiver] Adds its wake-up and kernel timestamp counters
+
+        Returns
+        --
+        [dict] uptime_s, rx (datagram, frame, error and sequence counters), commands (sent, received,
+        unanswered and rtt_ms per command name), attitude_interval_ms (stream inter-arrival times)
+        """
+        now = monotonic() if now is None else now
+        rx = {"datagrams": self.rx_datagrams, "bytes": self.rx_bytes, "frames": self.rx_frames,
+              "seq_gaps": self.seq_gaps, "frames_lost": self.frames_lost, "reordered": self.reordered,
+              "seq_resets": self.seq_resets}
+        if parser is not None:
+            rx.update(crc_errors=parser.crc_errors, length_errors=parser.length_errors, skipped_bytes=parser.skipped_bytes)
+        if receiver is not None:
+            r = receiver.stats()
+            rx.update(wakeups=r["wakeups"], max_burst=r["max_burst"], kernel_timestamps=r["kernel_stamped"])
+        received = self.rx_frames + self.frames_lost
+        rx["loss_ratio"] = self.frames_lost / received if received else 0.0
+        commands = {}
+        for cmd_id, stats in list(self._commands.items()):
+            if not (stats.sent or stats.received): continue
+            name = PROTOCOL[cmd_id][0] if cmd_id in PROTOCOL else f"{cmd_id:02x}"
+            commands[name] = stats.snapshot(now - self.window)
+        return {"uptime_s": now - self._started, "rx": rx, "commands": commands,
+                "attitude_interval_ms": self.attitude_interval.snapshot()}
@@ -0,0 +1,205 @@
+"""
+Multi-gimbal manager for the SIYI SDK.
+Several gimbals share one UDP socket and one event loop thread, datagrams are routed to the
+gimbal they come from by source address.
+"""
+import socket
+import selectors
+import threading
+import logging
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeoutError, wait
+from time import monotonic
+from siyi_sdk import SIYISDK
+from siyi_receive import DatagramReceiver
+
+class GimbalHandle(SIYISDK):
+    """
+    One gimbal served by a SIYIManager. It has the request/getter API of SIYISDK
+    (getAttitude, getCurrentZoomLevel, setGimbalSpeed, ...) but no socket or thread of its own.
+    """
+    def __init__(self, manager, server_ip, port=37260, debug=False):
+        super().__init__(server_ip=server_ip, port=port, debug=debug)
+        self._manager = manager
+        self._addr = (socket.gethostbyname(server_ip), port)
+        self._stop = True
+
+    def connect(self, maxWaitTime=5.0):
+        req = self.startConnect(maxWaitTime)
+        try: req.result(maxWaitTime)
+        except (TimeoutError, FutureTimeoutError, CancelledError): pass
+        return self._finishHandshake()
+
+    def startConnect(self, maxWaitTime=5.0):
+        """
+        Starts the connection handshake without waiting, see SIYIManager.connectAll()
+
+        Returns
+        --
+        [PendingRequest] Completed by the hardware ID response
+        """
+        self._stop = False; self._parser.reset()
+        self._manager.start()
+        self._startTimers()
+        return self._startHandshake(maxWaitTime)
+
+    def disconnect(self):
+        self._logger.info("Disconnecting..."); self._stop = True; self._setConnected(False)
+        self._wheel.clear()
+        self._pending.cancelAll()
+        self.drainCommands()
+        self.stopCapture()
+
+    def sendMsg(self, msg):
+        if msg and not self._stop:
+            if isinstance(msg, str): msg = bytes.fromhex(msg)
+            self._commands.put(msg)
+            self._manager.wakeup()
+            return True
+        return False
+
+    def _writeMsg(self, msg): self._manager.sendto(msg, self._addr)
+
+    def _sendAttempt(self, req, once=()):
+        super()._sendAttempt(req, once)
+        self._manager.wakeup()
+
+    def _wakeLoop(self): self._manager.wakeup()
+
+    def runDue(self, now=None):
+        """
+        Runs the connection check, request retries and telemetry polls that are due
+
+        Returns
+        --
+        [float] Monotonic time of the next due work, or None if stopped
+        """
+        if self._stop: return None
+        return super().runDue(now)
+
+class SIYIManager:
+    def __init__(self, local_ip="0.0.0.0", local_port=37260, debug=False):
+        """
+        Params
+        --
+        - local_ip, local_port Local address of the shared socket
+        - debug [bool] print debug messages
+        """
+        self._debug = debug
+        if self._debug: d_level = logging.DEBUG
+        else: d_level = logging.INFO
+        LOG_FORMAT = ' [%(levelname)s] %(asctime)s [SIYIManager::%(funcName)s] :\t%(message)s'
+        logging.basicConfig(format=LOG_FORMAT, level=d_level)
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+        self._local_addr = (local_ip, local_port)
+        self._RECV_SIZE = 1024
+        self._recv_buf = bytearray(self._RECV_SIZE)
+        self._handles = {}
+        self._socket = None; self._receiver = None; self._selector = None; self._wake_r = None; self._wake_w = None
+        self._thread = None; self._loop_ident = None
+        self._lock = threading.Lock()
+        self._stop = True
+        self.IDLE_PERIOD = 1.0
+
+    def add(self, server_ip, port=37260):
+        """
+        Returns
+        --
+        [GimbalHandle] Handle of the gimbal at server_ip:port
+        """
+        handle = GimbalHandle(self, server_ip, port, self._debug)
+        with self._lock: self._handles[handle._addr] = handle
+        return handle
+
+    def remove(self, handle):
+        handle.disconnect()
+        with self._lock: self._handles.pop(handle._addr, None)
+
+    def handles(self): return list(self._handles.values())
+
+    def connectAll(self, maxWaitTime=5.0):
+        """
+        Connects all gimbals at once
+
+        Returns
+        --
+        [list] Connection result of every handle
+        """
+        handles = self.handles()
+        wait([h.startConnect(maxWaitTime) for h in handles], maxWaitTime)
+        return [h._finishHandshake() for h in handles]
+
+    def start(self):
+        with self._lock:
+            if not self._stop: return True
+            try:
+                self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self._socket.bind(self._local_addr)
+            except OSError as e:
+                self._logger.error(f"Failed to bind socket to {self._local_addr[0]}:{self._local_addr[1]}. Error: {e}")
+                self._socket.close(); self._socket = None
+                return False
+            self._receiver = DatagramReceiver(self._socket)
+            self._wake_r, self._wake_w = socket.socketpair()
+            self._wake_r.setblocking(False); self._wake_w.setblocking(False)
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self._socket, selectors.EVENT_READ)
+            self._selector.register(self._wake_r, selectors.EVENT_READ)
+            self._stop = False
+            self._thread = threading.Thread(target=self.loop, daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self):
+        for h in self.handles(): h.disconnect()
+        with self._lock:
+            if self._stop: return
+            self._stop = True
+        self.wakeup()
+        if self._thread and self._thread is not threading.current_thread(): self._thread.join()
+        self._selector.close(); self._socket.close(); self._wake_r.close(); self._wake_w.close()
+
+    def sendto(self, msg, addr):
+        if self._socket is None: return False
+        try: self._socket.sendto(msg, addr)
+        except OSError as e:
+            self._logger.debug(f"Failed to send to {addr}: {e}"); return False
+        return True
+
+    def wakeup(self):
+        """
+        Makes the loop re-compute its next wake-up, needed when called from another thread
+        """
+        if self._wake_w is None or threading.get_ident() == self._loop_ident: return
+        try: self._wake_w.send(b'\x00')
+        except OSError: pass
+
+    def loop(self):
+        self._loop_ident = threading.get_ident()
+        while not self._stop:
+            now = monotonic(); wake = now + self.IDLE_PERIOD
+            handles = self.handles()
+            for h in handles:
+                t = h.runDue(now)
+                if t is not None and t < wake: wake = t
+            for h in handles: h.drainCommands()
+            for key, _ in self._selector.select(max(0.0, wake - monotonic())):
+                if key.fileobj is self._socket:
+                    self._drain()
+                    for h in self.handles(): h.drainCommands()
+                else:
+                    try: self._wake_r.recv(64)
+                    except OSError: pass
+        self._loop_ident = None
+
+    def _drain(self):
+        buf = memoryview(self._recv_buf)
+        while True:
+            try: datagram = self._receiver.receive(self._recv_buf)
+            except OSError as e:
+                self._logger.debug(f"Receive error: {e}"); return
+            if datagram is None: return
+            n, addr, t_ns = datagram
+            handle = self._handles.get(addr)
+            if handle is None: self._logger.debug(f"Datagram from unknown source {addr}"); continue
+            handle.datagramReceived(buf[:n], addr, t_ns)
@@ -1,9 +1,20 @@
 """
 Python implementation of SIYI SDK - Updated for ZR30
 """
-from crc16_python import crc16_str_swap
+import struct
 import logging
-from utils import toHex
+import threading
+from collections import namedtuple
+import crc16_python
+
+# Frame: STX(2) CTRL(1) DATA_LEN(2) SEQ(2) CMD_ID(1) DATA(n) CRC16(2), all fields little-endian
+FRAME_HEADER = struct.Struct('<2sBHHB'); FRAME_CRC = struct.Struct('<H')
+HEADER_SIZE = FRAME_HEADER.size; CRC_SIZE = FRAME_CRC.size; MIN_FRAME_SIZE = HEADER_SIZE + CRC_SIZE
+STX = b'\x55\x66'; CTRL_NEED_ACK = 0x01
+SEQ_OFFSET = 5; _SEQ = struct.Struct('<H'); CMD_OFFSET = 7
+
+def frameSeq(frame): return _SEQ.unpack_from(frame, SEQ_OFFSET)[0]
+def frameCmd(frame): return frame[CMD_OFFSET]
 
 class FirmwareMsg:
     seq=0; code_board_ver=''; gimbal_firmware_ver=''; zoom_firmware_ver=''
@@ -29,8 +40,8 @@ class AttitdueMsg:
 class SetGimbalAnglesMsg:
     seq = 0; yaw = 0.0; pitch = 0.0
 class RequestDataStreamMsg:
-    ATTITUDE_DATA = '01'; LASER_DATA = '02'
-    FREQ = {0: '00', 2: '01', 4: '02', 5: '03', 10: '04', 20: '05', 50: '06', 100: '07'}
+    ATTITUDE_DATA = 0x01; LASER_DATA = 0x02
+    FREQ = {0: 0x00, 2: 0x01, 4: 0x02, 5: 0x03, 10: 0x04, 20: 0x05, 50: 0x06, 100: 0x07}
     seq = 0; data_type = 1; data_frequency = 0
 class CurrentZoomValueMsg:
     seq = 0; level=0.0
@@ -38,68 +49,311 @@ class MaxZoomValueMsg:
     seq = 0; level = 0.0
 class FormatSDCardMsg:
     seq = 0; success = False
+class AbsoluteZoomMsg:
+    seq = 0; success = False
+class ImageModeMsg:
+    seq = 0; mode = -1
+class WorkingModeMsg:
+    seq = 0; mode = -1
+class CodecSpecsMsg:
+    seq = 0; stream_type = -1; video_enc_type = -1; resolution_l = 0; resolution_h = 0; video_bitrate = 0; success = False
+class UtcTimeMsg:
+    seq = 0; success = False
 
 class COMMAND:
-    ACQUIRE_FW_VER = '01'; ACQUIRE_HW_ID = '02'; AUTO_FOCUS = '04'
-    MANUAL_ZOOM = '05'; MANUAL_FOCUS = '06'; GIMBAL_SPEED = '07'
-    CENTER = '08'; ACQUIRE_GIMBAL_INFO = '0a'; FUNC_FEEDBACK_INFO = '0b'
-    PHOTO_VIDEO_HDR = '0c'; ACQUIRE_GIMBAL_ATT = '0d'; SET_GIMBAL_ATTITUDE = '0e'
-    ABSOLUTE_ZOOM = '0f'; REQUEST_IMAGE_MODE = '10'; SEND_IMAGE_MODE = '11'
-    REQUEST_MAX_ZOOM = '16'; CURRENT_ZOOM_VALUE = '18'; REQUEST_WORKING_MODE = '19'
-    REQUEST_CODEC_SPECS = '20'; SET_CODEC_SPECS = '21'; SET_DATA_STREAM = '25'
-    SET_UTC_TIME = '30'; FORMAT_SD_CARD = '48'
+    ACQUIRE_FW_VER = 0x01; ACQUIRE_HW_ID = 0x02; AUTO_FOCUS = 0x04
+    MANUAL_ZOOM = 0x05; MANUAL_FOCUS = 0x06; GIMBAL_SPEED = 0x07
+    CENTER = 0x08; ACQUIRE_GIMBAL_INFO = 0x0a; FUNC_FEEDBACK_INFO = 0x0b
+    PHOTO_VIDEO_HDR = 0x0c; ACQUIRE_GIMBAL_ATT = 0x0d; SET_GIMBAL_ATTITUDE = 0x0e
+    ABSOLUTE_ZOOM = 0x0f; REQUEST_IMAGE_MODE = 0x10; SEND_IMAGE_MODE = 0x11
+    REQUEST_MAX_ZOOM = 0x16; CURRENT_ZOOM_VALUE = 0x18; REQUEST_WORKING_MODE = 0x19
+    REQUEST_CODEC_SPECS = 0x20; SET_CODEC_SPECS = 0x21; SET_DATA_STREAM = 0x25
+    SET_UTC_TIME = 0x30; FORMAT_SD_CARD = 0x48
+
+# A payload field. The wire value is the field value multiplied by `scale`.
+# Optional fields must come last, they read as 0 when a short payload leaves them out.
+Field = namedtuple('Field', 'name fmt scale optional', defaults=(1, False))
+
+class Layout:
+    """
+    Binary layout of a request or response payload, compiled once into struct formats
+    """
+    _BOUNDS = {'b': (-0x80, 0x7F), 'B': (0, 0xFF), 'h': (-0x8000, 0x7FFF), 'H': (0, 0xFFFF),
+               'i': (-0x80000000, 0x7FFFFFFF), 'I': (0, 0xFFFFFFFF), 'Q': (0, 0xFFFFFFFFFFFFFFFF)}
+
+    def __init__(self, name, fields):
+        self.name = name; self.fields = tuple(fields)
+        required = [f for f in self.fields if not f.optional]
+        self._struct = struct.Struct('<' + ''.join(f.fmt for f in self.fields))
+        self._required = struct.Struct('<' + ''.join(f.fmt for f in required))
+        self.size = self._struct.size; self.min_size = self._required.size
+        self.type = namedtuple(name, [f.name for f in self.fields])
+        self._scales = tuple(f.scale for f in self.fields) if any(f.scale != 1 for f in self.fields) else None
+        self._bounds = tuple(self._BOUNDS.get(f.fmt) for f in self.fields)
+
+    def pack(self, *values):
+        """
+        Packs field values, in layout order, into a payload. Optional fields may be left out.
+        Integer values are clamped to the range of their wire type.
+        """
+        packer = self._struct if len(values) == len(self.fields) else self._required
+        if self._scales: values = [round(v * sc) if sc != 1 else v for v, sc in zip(values, self._scales)]
+        return packer.pack(*[v if b is None else min(max(int(v), b[0]), b[1]) for v, b in zip(values, self._bounds)])
+
+    def unpack(self, payload):
+        """
+        Decodes a payload into a namedtuple of field values, or None if it is too short
+        """
+        n = len(payload)
+        if n >= self.size: values = self._struct.unpack_from(payload)
+        elif n >= self.min_size: values = self._struct.unpack(bytes(payload) + bytes(self.size - n))
+        else: return None
+        if self._scales: values = [v / sc if sc != 1 else v for v, sc in zip(values, self._scales)]
+        return self.type._make(values)
+
+# cmd_id: (name, request fields, response fields). None marks a direction that is never sent.
+PROTOCOL = {
+    COMMAND.ACQUIRE_FW_VER: ('FirmwareVersion', (),
+        (Field('code_board_ver', 'I'), Field('gimbal_firmware_ver', 'I'), Field('zoom_firmware_ver', 'I', optional=True))),
+    COMMAND.ACQUIRE_HW_ID: ('HardwareID', (), (Field('model', '2s'), Field('serial', '10s', optional=True))),
+    COMMAND.AUTO_FOCUS: ('AutoFocus',
+        (Field('auto_focus', 'B'), Field('touch_x', 'H', optional=True), Field('touch_y', 'H', optional=True)),
+        (Field('sta', 'B'),)),
+    COMMAND.MANUAL_ZOOM: ('ManualZoom', (Field('zoom', 'b'),), (Field('zoom_multiple', 'H', 10),)),
+    COMMAND.MANUAL_FOCUS: ('ManualFocus', (Field('focus', 'b'),), (Field('sta', 'B'),)),
+    COMMAND.GIMBAL_SPEED: ('GimbalSpeed', (Field('turn_yaw', 'b'), Field('turn_pitch', 'b')), (Field('sta', 'B'),)),
+    COMMAND.CENTER: ('Center', (Field('center_pos', 'B'),), (Field('sta', 'B'),)),
+    COMMAND.ACQUIRE_GIMBAL_INFO: ('GimbalInfo', (),
+        (Field('reserved_0', 'B'), Field('hdr_sta', 'B'), Field('reserved_2', 'B'), Field('record_sta', 'B'),
+         Field('gimbal_motion_mode', 'B'), Field('gimbal_mounting_dir', 'B'), Field('video_hdmi_or_cvbs', 'B', optional=True))),
+    COMMAND.FUNC_FEEDBACK_INFO: ('FuncFeedbackInfo', None, (Field('info_type', 'B'),)),
+    COMMAND.PHOTO_VIDEO_HDR: ('PhotoVideoHDR', (Field('func_type', 'B'),), None),
+    COMMAND.ACQUIRE_GIMBAL_ATT: ('GimbalAttitude', (),
+        (Field('yaw', 'h', 10), Field('pitch', 'h', 10), Field('roll', 'h', 10), Field('yaw_velocity', 'h', 10, True),
+         Field('pitch_velocity', 'h', 10, True), Field('roll_velocity', 'h', 10, True))),
+    COMMAND.SET_GIMBAL_ATTITUDE: ('SetGimbalAttitude', (Field('yaw', 'h', 10), Field('pitch', 'h', 10)),
+        (Field('yaw', 'h', 10), Field('pitch', 'h', 10), Field('roll', 'h', 10))),
+    COMMAND.ABSOLUTE_ZOOM: ('AbsoluteZoom', (Field('zoom_int', 'B'), Field('zoom_float', 'B')), (Field('ack', 'B'),)),
+    COMMAND.REQUEST_IMAGE_MODE: ('ImageMode', (), (Field('vdisp_mode', 'B'),)),
+    COMMAND.SEND_IMAGE_MODE: ('SetImageMode', (Field('vdisp_mode', 'B'),), (Field('vdisp_mode', 'B'),)),
+    COMMAND.REQUEST_MAX_ZOOM: ('MaxZoom', (), (Field('zoom_max_int', 'B'), Field('zoom_max_float', 'B'))),
+    COMMAND.CURRENT_ZOOM_VALUE: ('CurrentZoom', (), (Field('zoom_int', 'B'), Field('zoom_float', 'B'))),
+    COMMAND.REQUEST_WORKING_MODE: ('WorkingMode', (), (Field('gimbal_mode', 'B'),)),
+    COMMAND.REQUEST_CODEC_SPECS: ('CodecSpecs', (Field('stream_type', 'B'),),
+        (Field('stream_type', 'B'), Field('video_enc_type', 'B'), Field('resolution_l', 'H'), Field('resolution_h', 'H'),
+         Field('video_bitrate', 'H'), Field('reserve', 'B', optional=True))),
+    COMMAND.SET_CODEC_SPECS: ('SetCodecSpecs',
+        (Field('stream_type', 'B'), Field('video_enc_type', 'B'), Field('resolution_l', 'H'), Field('resolution_h', 'H'),
+         Field('video_bitrate', 'H'), Field('reserve', 'B')),
+        (Field('stream_type', 'B'), Field('sta', 'B'))),
+    COMMAND.SET_DATA_STREAM: ('DataStream', (Field('data_type', 'B'), Field('data_freq', 'B')), (Field('data_type', 'B'),)),
+    COMMAND.SET_UTC_TIME: ('UtcTime', (Field('timestamp', 'Q'),), (Field('ack', 'b'),)),
+    COMMAND.FORMAT_SD_CARD: ('FormatSDCard', (), (Field('format_sta', 'B'),)),
+}
+
+REQUESTS = {cmd_id: Layout(name + 'Request', req) for cmd_id, (name, req, _) in PROTOCOL.items() if req is not None}
+RESPONSES = {cmd_id: Layout(name + 'Response', resp) for cmd_id, (name, _, resp) in PROTOCOL.items() if resp is not None}
 
 class SIYIMESSAGE:
+    # Only frames whose payload has at most this many bytes are cached (polls, center, zoom and focus steps),
+    # at most 257 frames per command. Speed and attitude payloads take too many values, they are built directly
+    CACHED_PAYLOAD_SIZE = 1
+
     def __init__(self, debug=False):
+        """
+        Params
+        --
+        - debug [bool] print debug messages
+        """
         self._debug=debug; LOG_FORMAT='[%(levelname)s] %(asctime)s [SIYIMessage::%(funcName)s] :\t%(message)s'
         logging.basicConfig(format=LOG_FORMAT, level=logging.DEBUG if self._debug else logging.INFO)
         self._logger = logging.getLogger(self.__class__.__name__)
-        self.HEADER='5566'; self._ctr ='01'; self._seq= 0
+        self.HEADER=STX; self._ctr=CTRL_NEED_ACK; self._seq= 0
+        # encode() is called from the engine, poll, GUI and retry threads, the lock guards _seq and _frames
+        self._lock = threading.Lock()
+        # (cmd_id, payload) -> (frame with seq 0, CRC of the bytes before the seq field)
+        self._frames = {}
+
+    def _buildFrame(self, payload, cmd_id, seq):
+        n = len(payload); end = HEADER_SIZE + n
+        frame = bytearray(end + CRC_SIZE)
+        FRAME_HEADER.pack_into(frame, 0, STX, self._ctr, n, seq, cmd_id)
+        frame[HEADER_SIZE:end] = payload
+        FRAME_CRC.pack_into(frame, end, crc16_python.crc16(memoryview(frame)[:end]))
+        return frame
+
+    def _cacheFrame(self, key, payload, cmd_id):
+        frame = self._buildFrame(payload, cmd_id, 0)
+        entry = (bytes(frame), crc16_python.crc16(memoryview(frame)[:SEQ_OFFSET]))
+        with self._lock: return self._frames.setdefault(key, entry)
+
+    def encode(self, payload, cmd_id):
+        """
+        Builds a complete frame around a binary payload. Frames of small payloads (see CACHED_PAYLOAD_SIZE)
+        are built once per (cmd_id, payload) and cached; later calls only patch the sequence number and
+        continue the CRC from the cached header value. Thread-safe.
 
+        Params
+        --
+        - payload [bytes] Message data, already packed
+        - cmd_id [int] Command ID, see COMMAND
+
+        Returns
+        --
+        [bytearray] Frame ready to be sent, CRC included
+        """
+        with self._lock: seq = self._seq = (self._seq + 1) & 0xFFFF
+        if len(payload) > self.CACHED_PAYLOAD_SIZE: return self._buildFrame(payload, cmd_id, seq)
+        key = (cmd_id, bytes(payload))
+        entry = self._frames.get(key) or self._cacheFrame(key, payload, cmd_id)
+        frame = bytearray(entry[0]); end = len(frame) - CRC_SIZE
+        _SEQ.pack_into(frame, SEQ_OFFSET, seq)
+        FRAME_CRC.pack_into(frame, end, crc16_python.crc16(memoryview(frame)[SEQ_OFFSET:end], entry[1]))
+        return frame
+
+    def decode(self, buff, offset=0):
+        """
+        Decodes the frame that starts at `offset` in a bytes-like buffer, without copying the payload
+
+        Returns
+        --
+        (payload [memoryview], data_len [int], cmd_id [int], seq [int]), or None if the frame is incomplete or its CRC does not match
+        """
+        view = memoryview(buff)
+        if len(view) - offset < MIN_FRAME_SIZE: return None
+        stx, _, data_len, seq, cmd_id = FRAME_HEADER.unpack_from(view, offset)
+        end = offset + HEADER_SIZE + data_len
+        if stx != STX or end + CRC_SIZE > len(view): return None
+        if FRAME_CRC.unpack_from(view, end)[0] != crc16_python.crc16(view[offset:end]): return None
+        return view[offset + HEADER_SIZE:end], data_len, cmd_id, seq
+
+    # Hex-string API, kept for backward compatibility
     def encodeMsg(self, data, cmd_id):
-        seq = self._seq = (self._seq + 1) & 0xFFFF; seq_hex = toHex(seq, 16); seq_str = seq_hex[2:4] + seq_hex[0:2]
-        data_len = self.computeDataLen(data); msg_front = self.HEADER + self._ctr + data_len + seq_str + cmd_id + data
-        crc = crc16_str_swap(msg_front)
-        if crc: return msg_front + crc
-        return ''
+        if isinstance(cmd_id, str): cmd_id = int(cmd_id, 16)
+        return self.encode(bytes.fromhex(data), cmd_id).hex()
     def decodeMsg(self, msg):
-        MINIMUM_DATA_LENGTH=10*2
-        if not isinstance(msg, str) or len(msg) < MINIMUM_DATA_LENGTH: return None
-        payload=msg[:-4]; expected_crc=crc16_str_swap(payload)
-        if expected_crc != msg[-4:]: return None
-        low_b_len, high_b_len = msg[6:8], msg[8:10]; data_len = int('0x' + high_b_len + low_b_len, 16)
-        low_b_seq, high_b_seq = msg[10:12], msg[12:14]; seq = int('0x' + high_b_seq + low_b_seq, 16)
-        cmd_id = msg[14:16]; data = msg[16:16 + data_len*2]
-        return data, data_len, cmd_id, seq
+        if not isinstance(msg, str): return None
+        try: val = self.decode(bytes.fromhex(msg))
+        except ValueError: return None
+        if val is None: return None
+        data, data_len, cmd_id, seq = val
+        return data.hex(), data_len, format(cmd_id, '02x'), seq
     def computeDataLen(self, data):
         L = len(data) // 2; len_hex = format(L, '04x'); return len_hex[2:4] + len_hex[0:2]
     
-    def requestFirmwareVersionMsg(self): return self.encodeMsg("", COMMAND.ACQUIRE_FW_VER)
-    def requestHardwareIDMsg(self): return self.encodeMsg("", COMMAND.ACQUIRE_HW_ID)
-    def requestGimbalInfoMsg(self): return self.encodeMsg("", COMMAND.ACQUIRE_GIMBAL_INFO)
-    def requestGimbalAttitudeMsg(self): return self.encodeMsg("", COMMAND.ACQUIRE_GIMBAL_ATT)
-    def requestMaxZoomMsg(self): return self.encodeMsg("", COMMAND.REQUEST_MAX_ZOOM)
-    def requestCurrentZoomMsg(self): return self.encodeMsg("", COMMAND.CURRENT_ZOOM_VALUE)
-    def takePhotoMsg(self): return self.encodeMsg(toHex(0, 8), COMMAND.PHOTO_VIDEO_HDR)
-    def recordMsg(self): return self.encodeMsg(toHex(2, 8), COMMAND.PHOTO_VIDEO_HDR)
-    def setMotionModeMsg(self, mode): return self.encodeMsg(toHex(mode, 8), COMMAND.PHOTO_VIDEO_HDR)
-    def setVideoOutputMsg(self, output_type): return self.encodeMsg(toHex(output_type, 8), COMMAND.PHOTO_VIDEO_HDR)
+    def encodeRequest(self, cmd_id, *values):
+        """
+        Packs field values with the request layout of `cmd_id` (see PROTOCOL) and builds the frame
+        """
+        return self.encode(REQUESTS[cmd_id].pack(*values), cmd_id)
+
+    def requestFirmwareVersionMsg(self): return self.encodeRequest(COMMAND.ACQUIRE_FW_VER)
+    def requestHardwareIDMsg(self): return self.encodeRequest(COMMAND.ACQUIRE_HW_ID)
+    def requestGimbalInfoMsg(self): return self.encodeRequest(COMMAND.ACQUIRE_GIMBAL_INFO)
+    def requestGimbalAttitudeMsg(self): return self.encodeRequest(COMMAND.ACQUIRE_GIMBAL_ATT)
+    def requestMaxZoomMsg(self): return self.encodeRequest(COMMAND.REQUEST_MAX_ZOOM)
+    def requestCurrentZoomMsg(self): return self.encodeRequest(COMMAND.CURRENT_ZOOM_VALUE)
+    def requestImageModeMsg(self): return self.encodeRequest(COMMAND.REQUEST_IMAGE_MODE)
+    def requestWorkingModeMsg(self): return self.encodeRequest(COMMAND.REQUEST_WORKING_MODE)
+    def requestCodecSpecsMsg(self, stream_type): return self.encodeRequest(COMMAND.REQUEST_CODEC_SPECS, stream_type)
+    def takePhotoMsg(self): return self.encodeRequest(COMMAND.PHOTO_VIDEO_HDR, 0)
+    def recordMsg(self): return self.encodeRequest(COMMAND.PHOTO_VIDEO_HDR, 2)
+    def setMotionModeMsg(self, mode): return self.encodeRequest(COMMAND.PHOTO_VIDEO_HDR, mode)
+    def setVideoOutputMsg(self, output_type): return self.encodeRequest(COMMAND.PHOTO_VIDEO_HDR, output_type)
     def autoFocusMsg(self, touch_x=None, touch_y=None):
-        data = "01" + (toHex(touch_x, 16) + toHex(touch_y, 16) if touch_x is not None else "")
-        return self.encodeMsg(data, COMMAND.AUTO_FOCUS)
-    def manualZoomMsg(self, direction): return self.encodeMsg(toHex(direction, 8), COMMAND.MANUAL_ZOOM)
-    def manualFocusMsg(self, direction): return self.encodeMsg(toHex(direction, 8), COMMAND.MANUAL_FOCUS)
-    def centerGimbalMsg(self): return self.encodeMsg("01", COMMAND.CENTER)
-    def setGimbalSpeedMsg(self, yaw_speed, pitch_speed):
-        return self.encodeMsg(toHex(yaw_speed, 8) + toHex(pitch_speed, 8), COMMAND.GIMBAL_SPEED)
-    def setGimbalAttitudeMsg(self, yaw_deg, pitch_deg):
-        return self.encodeMsg(toHex(int(yaw_deg * 10), 16) + toHex(int(pitch_deg * 10), 16), COMMAND.SET_GIMBAL_ATTITUDE)
+        if touch_x is None: return self.encodeRequest(COMMAND.AUTO_FOCUS, 1)
+        return self.encodeRequest(COMMAND.AUTO_FOCUS, 1, touch_x, touch_y)
+    def manualZoomMsg(self, direction): return self.encodeRequest(COMMAND.MANUAL_ZOOM, direction)
+    def manualFocusMsg(self, direction): return self.encodeRequest(COMMAND.MANUAL_FOCUS, direction)
+    def centerGimbalMsg(self): return self.encodeRequest(COMMAND.CENTER, 1)
+    def setGimbalSpeedMsg(self, yaw_speed, pitch_speed): return self.encodeRequest(COMMAND.GIMBAL_SPEED, yaw_speed, pitch_speed)
+    def setGimbalAttitudeMsg(self, yaw_deg, pitch_deg): return self.encodeRequest(COMMAND.SET_GIMBAL_ATTITUDE, yaw_deg, pitch_deg)
     def absoluteZoomMsg(self, zoom_level):
         integer_part, decimal_part = int(zoom_level), int((zoom_level * 10) % 10)
-        return self.encodeMsg(toHex(integer_part, 8) + toHex(decimal_part, 8), COMMAND.ABSOLUTE_ZOOM)
-    def formatSDCardMsg(self): return self.encodeMsg("", COMMAND.FORMAT_SD_CARD)
-    def setUtcTimeMsg(self, timestamp): return self.encodeMsg(toHex(timestamp, 64), COMMAND.SET_UTC_TIME)
+        return self.encodeRequest(COMMAND.ABSOLUTE_ZOOM, integer_part, decimal_part)
+    def setImageModeMsg(self, mode): return self.encodeRequest(COMMAND.SEND_IMAGE_MODE, mode)
+    def setCodecSpecsMsg(self, stream_type, video_enc_type, resolution_l, resolution_h, video_bitrate):
+        return self.encodeRequest(COMMAND.SET_CODEC_SPECS, stream_type, video_enc_type, resolution_l, resolution_h, video_bitrate, 0)
+    def formatSDCardMsg(self): return self.encodeRequest(COMMAND.FORMAT_SD_CARD)
+    def setUtcTimeMsg(self, timestamp): return self.encodeRequest(COMMAND.SET_UTC_TIME, timestamp)
     
     def setDataStreamMsg(self, data_type, freq_code):
-        data = data_type + freq_code
-        return self.encodeMsg(data, COMMAND.SET_DATA_STREAM)
+        return self.encodeRequest(COMMAND.SET_DATA_STREAM, data_type, freq_code)
+
+class SIYIParser:
+    """
+    Incremental frame parser that owns a preallocated receive buffer.
+
+    Datagrams are received straight into `writable()` (e.g. with `socket.recvfrom_into`) and
+    committed with `commit()`. `frames()` then yields every complete frame found so far; bytes of
+    a frame split across datagrams stay in the buffer until the rest arrives.
+
+    The payloads yielded are memoryviews into the buffer: they are only valid until the next
+    `writable()`/`feed()` call, so parsers must convert them right away.
+    """
+    MAX_DATA_LEN = 512
+
+    def __init__(self, recv_size=1024):
+        self._recv_size = recv_size
+        self._buf = bytearray(2 * recv_size + MIN_FRAME_SIZE + self.MAX_DATA_LEN)
+        self._view = memoryview(self._buf)
+        self._start = 0; self._end = 0
+        # Link quality counters, kept across reset()
+        self.crc_errors = 0; self.length_errors = 0; self.skipped_bytes = 0
+
+    def writable(self):
+        """
+        Returns a memoryview of the free space at the end of the buffer, at least `recv_size` bytes long
+        """
+        if len(self._buf) - self._end < self._recv_size:
+            n = self._end - self._start
+            self._buf[0:n] = self._buf[self._start:self._end]
+            self._start = 0; self._end = n
+        return self._view[self._end:]
+
+    def commit(self, n):
+        """
+        Marks `n` bytes written into the last `writable()` view as received
+        """
+        self._end += n
+
+    def feed(self, data):
+        """
+        Copies a received datagram into the buffer, for callers that did not receive into `writable()`
+        """
+        data = memoryview(data)
+        while len(data):
+            space = self.writable(); n = min(len(space), len(data))
+            space[:n] = data[:n]; self.commit(n); data = data[n:]
+
+    def reset(self):
+        self._start = self._end = 0
+
+    def frames(self):
+        """
+        Yields (cmd_id [int], seq [int], payload [memoryview]) for each valid frame in the buffer.
+        Garbage before a header and frames with a bad length or CRC are skipped, and counted in
+        `skipped_bytes`, `length_errors` and `crc_errors`.
+        """
+        buf = self._buf; view = self._view; pos = self._start; end = self._end
+        while True:
+            i = buf.find(STX, pos, end)
+            if i < 0:
+                # Keep a trailing first header byte, the rest of the header may be in the next datagram
+                i = end - 1 if end > pos and buf[end - 1] == STX[0] else end
+                self.skipped_bytes += i - pos; pos = i
+                break
+            if i > pos: self.skipped_bytes += i - pos
+            pos = i
+            if end - pos < HEADER_SIZE: break
+            data_len, seq, cmd_id = FRAME_HEADER.unpack_from(buf, pos)[2:]
+            if data_len > self.MAX_DATA_LEN: self.length_errors += 1; self.skipped_bytes += 1; pos += 1; continue
+            data_end = pos + HEADER_SIZE + data_len
+            if data_end + CRC_SIZE > end: break
+            if FRAME_CRC.unpack_from(buf, data_end)[0] != crc16_python.crc16(view[pos:data_end]):
+                self.crc_errors += 1; self.skipped_bytes += 1; pos += 1; continue
+            self._start = data_end + CRC_SIZE
+            yield cmd_id, seq, view[pos + HEADER_SIZE:data_end]
+            pos = self._start; end = self._end
+        if pos >= end: self._start = self._end = 0
+        else: self._start = pos
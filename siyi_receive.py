@@ -0,0 +1,97 @@
+"""
+UDP receive path with kernel receive timestamps and burst reads for the SIYI SDK
+"""
+import select
+import socket
+import struct
+import sys
+from time import monotonic_ns, time_ns
+
+# SO_TIMESTAMPNS is not exported by the socket module, 35 is its Linux value
+SO_TIMESTAMPNS = getattr(socket, 'SO_TIMESTAMPNS', 35 if sys.platform.startswith('linux') else None)
+TIMESPEC = struct.Struct('@ll')   # struct timespec: time_t tv_sec, long tv_nsec
+
+def enableKernelTimestamps(sock):
+    """
+    Asks the kernel to attach a receive timestamp to every datagram
+
+    Returns
+    --
+    [bool] True if supported
+    """
+    if SO_TIMESTAMPNS is None or not hasattr(sock, 'recvmsg_into'): return False
+    try: sock.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+    except OSError: return False
+    return True
+
+class DatagramReceiver:
+    """
+    Reads datagrams from a non-blocking UDP socket. On Linux every datagram carries the time the kernel
+    received it (SO_TIMESTAMPNS), converted to the monotonic clock; elsewhere, or if a datagram has no
+    timestamp, the time is None and the caller stamps it itself.
+
+    After wait() returns, receive() is called until it returns None, so a burst of datagrams queued
+    during one wake-up is read without waiting again.
+
+    Params
+    --
+    - sock [socket] UDP socket, switched to non-blocking
+    - timestamps [bool] Use kernel timestamps when available
+    """
+    def __init__(self, sock, timestamps=True):
+        self._socket = sock
+        sock.setblocking(False)
+        self.kernel_timestamps = timestamps and enableKernelTimestamps(sock)
+        self._ancsize = socket.CMSG_SPACE(TIMESPEC.size) if self.kernel_timestamps else 0
+        if hasattr(select, 'poll'):
+            self._poll = select.poll(); self._poll.register(sock, select.POLLIN)
+        else: self._poll = None
+        self.wakeups = 0; self.datagrams = 0; self.kernel_stamped = 0; self.max_burst = 0; self._burst = 0
+
+    def wait(self, timeout):
+        """
+        Blocks until a datagram is queued or `timeout` [s] elapses
+
+        Returns
+        --
+        [bool] True if a datagram can be read
+        """
+        if self._burst > self.max_burst: self.max_burst = self._burst
+        self._burst = 0
+        if self._poll is not None: ready = self._poll.poll(None if timeout is None else timeout * 1e3)
+        else: ready = select.select([self._socket], [], [], timeout)[0]
+        if ready: self.wakeups += 1
+        return bool(ready)
+
+    def receive(self, buf):
+        """
+        Reads one datagram into `buf`
+
+        Returns
+        --
+        (n [int], addr [tuple], t_ns [int] monotonic receive time or None), or None if no datagram is queued
+        """
+        try:
+            if not self.kernel_timestamps:
+                n, addr = self._socket.recvfrom_into(buf); t_ns = None
+            else:
+                n, ancdata, _, addr = self._socket.recvmsg_into((buf,), self._ancsize)
+                t_ns = self._timestamp(ancdata)
+        except (BlockingIOError, InterruptedError): return None
+        self.datagrams += 1; self._burst += 1
+        return n, addr, t_ns
+
+    def _timestamp(self, ancdata):
+        for level, kind, data in ancdata:
+            if level == socket.SOL_SOCKET and kind == SO_TIMESTAMPNS and len(data) >= TIMESPEC.size:
+                sec, nsec = TIMESPEC.unpack_from(data)
+                # Wall clock to monotonic, never later than now if the wall clock was stepped
+                now = monotonic_ns()
+                t_ns = sec * 1_000_000_000 + nsec - (time_ns() - now)
+                self.kernel_stamped += 1
+                return t_ns if t_ns < now else now
+        return None
+
+    def stats(self):
+        return {"wakeups": self.wakeups, "datagrams": self.datagrams, "kernel_stamped": self.kernel_stamped,
+                "max_burst": max(self.max_burst, self._burst)}
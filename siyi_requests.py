@@ -0,0 +1,108 @@
+"""
+Request/response correlation for the SIYI SDK
+"""
+import threading
+from collections import namedtuple
+from concurrent.futures import Future
+from time import monotonic
+
+# timeout [s] to wait for the response of one attempt, retries [int] number of re-sends after the first attempt
+RequestPolicy = namedtuple('RequestPolicy', 'timeout retries', defaults=(0.5, 2))
+
+class PendingRequest(Future):
+    """
+    Handle of a request waiting for its response. It is a concurrent.futures.Future whose result is
+    the decoded response fields, or a TimeoutError once every attempt has timed out.
+
+    Params
+    --
+    - frames [tuple] Encoded frames sent on every attempt
+    - expect [int] Command ID of the response that completes the request
+    - match [callable] Optional predicate on the response fields, for responses that are not an ack
+    - policy [RequestPolicy] Timeout and retries
+    - seq [int] Sequence number of the first frame, preferred when several requests wait for the same response
+    """
+    def __init__(self, frames, expect, match=None, policy=RequestPolicy(), seq=None):
+        super().__init__()
+        self.frames = frames; self.expect = expect; self.match = match; self.policy = policy; self.seq = seq
+        self.attempts = 0; self.deadline = 0.0; self.sent_at = 0.0
+
+class PendingRequests:
+    """
+    Table of requests waiting for a response, keyed by the expected command ID.
+    Responses are matched by sequence number first, then in sending order.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending = {}
+
+    def __len__(self): return sum(len(reqs) for reqs in self._pending.values())
+
+    def add(self, req, now=None):
+        """
+        Registers an attempt of `req` that has just been sent
+        """
+        now = monotonic() if now is None else now
+        with self._cond:
+            req.attempts += 1; req.sent_at = now; req.deadline = now + req.policy.timeout
+            reqs = self._pending.setdefault(req.expect, [])
+            if req not in reqs: reqs.append(req)
+            self._cond.notify_all()
+
+    def complete(self, cmd_id, seq, fields):
+        """
+        Completes the request waiting for this response, if any
+
+        Returns
+        --
+        [PendingRequest] The completed request, or None
+        """
+        if not self._pending: return None
+        with self._cond:
+            reqs = self._pending.get(cmd_id)
+            if not reqs: return None
+            candidates = [r for r in reqs if r.match is None or r.match(fields)]
+            if not candidates: return None
+            req = next((r for r in candidates if r.seq == seq), candidates[0])
+            reqs.remove(req)
+            if not reqs: del self._pending[cmd_id]
+        if not req.done(): req.set_result(fields)
+        return req
+
+    def expire(self, now=None):
+        """
+        Removes and returns the requests whose current attempt has timed out
+        """
+        now = monotonic() if now is None else now
+        expired = []
+        with self._cond:
+            for cmd_id in list(self._pending):
+                reqs = self._pending[cmd_id]
+                late = [r for r in reqs if r.deadline <= now or r.done()]
+                if not late: continue
+                expired += [r for r in late if not r.done()]
+                reqs[:] = [r for r in reqs if r not in late]
+                if not reqs: del self._pending[cmd_id]
+        return expired
+
+    def nextDeadline(self):
+        with self._cond:
+            return min((r.deadline for reqs in self._pending.values() for r in reqs), default=None)
+
+    def wait(self, timeout):
+        """
+        Blocks until a request is added or `timeout` seconds have passed
+        """
+        with self._cond: self._cond.wait(timeout)
+
+    def wake(self):
+        """
+        Wakes the threads blocked in wait()
+        """
+        with self._cond: self._cond.notify_all()
+
+    def cancelAll(self):
+        with self._cond:
+            reqs = [r for rs in self._pending.values() for r in rs]; self._pending.clear()
+            self._cond.notify_all()
+        for r in reqs: r.cancel()
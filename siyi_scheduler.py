@@ -0,0 +1,87 @@
+"""
+Timer scheduling for the SIYI SDK telemetry polls
+"""
+import threading
+from collections import namedtuple
+
+# fast [s] poll period while the value is changing, slow [s] period when idle, hold [s] time fast polling lasts after a trigger
+PollPolicy = namedtuple('PollPolicy', 'fast slow hold', defaults=(0.2, 2.0, 2.0))
+
+class TimerWheel:
+    """
+    Hashed timer wheel. Timers are bucketed by their due tick, so runDue() only visits the buckets
+    of the ticks elapsed since the previous call. Timers are keyed, scheduling a key again replaces it.
+
+    Params
+    --
+    - tick [float] Bucket width in seconds
+    - slots [int] Number of buckets, timers further than one turn away wait in their bucket for the next turn
+    """
+    def __init__(self, tick=0.005, slots=512):
+        self._tick = tick
+        self._slots = [{} for _ in range(slots)]
+        self._timers = {}
+        self._cursor = None
+        self._lock = threading.Lock()
+
+    def __len__(self): return len(self._timers)
+    def __contains__(self, key): return key in self._timers
+
+    def schedule(self, key, when, callback):
+        """
+        Calls callback(now) once at monotonic time `when`
+
+        Returns
+        --
+        [bool] True if this is now the earliest timer, the loop running the wheel must then wake up earlier
+        """
+        with self._lock:
+            self._cancel(key)
+            t = int(when / self._tick)
+            if self._cursor is not None and t < self._cursor: t = self._cursor
+            earliest = all(when < w for w, _, _ in self._timers.values())
+            self._timers[key] = (when, callback, t)
+            self._slots[t % len(self._slots)][key] = t
+            return earliest
+
+    def cancel(self, key):
+        with self._lock: self._cancel(key)
+
+    def _cancel(self, key):
+        timer = self._timers.pop(key, None)
+        if timer: self._slots[timer[2] % len(self._slots)].pop(key, None)
+
+    def when(self, key):
+        timer = self._timers.get(key)
+        return timer[0] if timer else None
+
+    def clear(self):
+        with self._lock:
+            self._timers.clear(); self._cursor = None
+            for slot in self._slots: slot.clear()
+
+    def nextDeadline(self):
+        with self._lock: return min((w for w, _, _ in self._timers.values()), default=None)
+
+    def runDue(self, now):
+        """
+        Fires the timers due at `now`, in deadline order
+        """
+        now_tick = int(now / self._tick); n = len(self._slots)
+        fired = []
+        with self._lock:
+            start = self._cursor
+            if start is None: start = min((t for _, _, t in self._timers.values()), default=now_tick)
+            # After a stall longer than one turn every bucket is visited once
+            for t in range(max(start, now_tick - n + 1), now_tick + 1):
+                slot = self._slots[t % n]
+                if not slot: continue
+                for key, due_tick in list(slot.items()):
+                    when, callback, _ = self._timers[key]
+                    if due_tick <= now_tick and when <= now:
+                        del slot[key]; del self._timers[key]
+                        fired.append((when, callback))
+            if self._cursor is None or now_tick > self._cursor: self._cursor = now_tick
+        fired.sort(key=lambda timer: timer[0])
+        for _, callback in fired: callback(now)
+        return len(fired)
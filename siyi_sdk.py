@@ -3,14 +3,41 @@ Python implementation of SIYI SDK - Updated for ZR30
 """
 import socket
 from siyi_message import *
-from time import sleep, time
+from siyi_requests import PendingRequest, PendingRequests, RequestPolicy
+from siyi_scheduler import PollPolicy, TimerWheel
+from siyi_commands import CommandQueue
+from siyi_capture import CaptureWriter, RX, TX
+from siyi_linkstats import LinkStats
+from siyi_receive import DatagramReceiver
+from siyi_telemetry import (TelemetryRing, TelemetryBus, CallbackSubscription, QueueSubscription, LatestSubscription,
+                            AttitudeEvent, ZoomEvent, GimbalInfoEvent, HardwareIDEvent, LinkEvent, EVENT_TYPES)
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeoutError
+from time import time, monotonic, monotonic_ns
 import logging
-from utils import toInt
 import threading
 import cameras
 
 class SIYISDK:
-    def __init__(self, server_ip="192.168.144.25", port=37260, debug=False):
+    # Response timeout and re-sends, per expected response command ID
+    REQUEST_POLICIES = {
+        COMMAND.ACQUIRE_HW_ID: RequestPolicy(0.5, 9), COMMAND.CENTER: RequestPolicy(0.5, 2),
+        COMMAND.ACQUIRE_GIMBAL_INFO: RequestPolicy(0.5, 4), COMMAND.FUNC_FEEDBACK_INFO: RequestPolicy(2.0, 0),
+    }
+    # Telemetry poll periods while the value is changing and when idle, per polled command ID
+    POLL_POLICIES = {
+        COMMAND.ACQUIRE_GIMBAL_INFO: PollPolicy(1.0 / 5, 2.0, 2.0),
+        COMMAND.CURRENT_ZOOM_VALUE: PollPolicy(1.0 / 20, 1.0, 1.0),
+    }
+
+    def __init__(self, server_ip="192.168.144.25", port=37260, debug=False, local_port=None):
+        """
+        Params
+        --
+        - server_ip [str] Gimbal IP
+        - port [int] Gimbal UDP port
+        - debug [bool] print debug messages
+        - local_port [int] Local UDP port, defaults to `port`. Set it to reach an emulator on the same host
+        """
         self._debug = debug
         if self._debug: d_level = logging.DEBUG
         else: d_level = logging.INFO
@@ -24,25 +51,60 @@ class SIYISDK:
         self._server_ip = "0.0.0.0"   
 
         self._port = port
+        self._local_port = port if local_port is None else local_port
         self._BUFF_SIZE = 1024
+        self._parser = SIYIParser(self._BUFF_SIZE)
         self._socket = None
+        self._receiver = None
         self._rcv_wait_t = 5
+        self.RECV_BATCH = 32   # datagrams read per wake-up at most
         
         self.resetVars()
         self._stop = False
         
-        self._info_update_period = 1.0 / 5
-        self._zoom_update_period = 1.0 / 20
+        self._wheel = TimerWheel()
+        self._polls = {COMMAND.ACQUIRE_GIMBAL_INFO: self.requestGimbalInfo, COMMAND.CURRENT_ZOOM_VALUE: self.requestCurrentZoomLevel}
+        self._fast_until = {}   # cmd_id -> monotonic time the fast poll rate ends
         
         self._last_message_time = 0
+        self._rx_time = 0.0; self._rx_time_ns = 0   # monotonic receive time of the datagram being dispatched
+        self._capture = None
         self.CONNECTION_TIMEOUT = 3.0
+        self.CONNECTION_CHECK_PERIOD = 1.0
+        self._pending = PendingRequests()
+        self._bus = TelemetryBus()
+        self._link = LinkStats()
+
+        # Speed command coalescing, see setGimbalSpeed()
+        self.SPEED_MAX_RATE = 25.0
+        self.SPEED_KEEPALIVE = 1.0
+        self._SPEED_STOP = REQUESTS[COMMAND.GIMBAL_SPEED].pack(0, 0)
+        self._speed_lock = threading.Lock()
+        self._speed_last = None; self._speed_sent_at = 0.0; self._speed_pending = None
+        self._speed_stats = dict(requested=0, sent=0, deduplicated=0, rate_limited=0, superseded=0)
         
-        self._recv_thread = None; self._conn_thread = None
-        self._g_info_thread = None; self._zoom_thread = None
+        self._commands = CommandQueue()
+        self._recv_thread = None; self._conn_thread = None; self._send_thread = None
+
+        # cmd_id -> (response layout, parser). Parsers receive the decoded fields, see PROTOCOL in siyi_message
+        handlers = {
+            COMMAND.ACQUIRE_FW_VER: self.parseFirmwareMsg, COMMAND.ACQUIRE_HW_ID: self.parseHardwareIDMsg,
+            COMMAND.ACQUIRE_GIMBAL_INFO: self.parseGimbalInfoMsg, COMMAND.ACQUIRE_GIMBAL_ATT: self.parseAttitudeMsg,
+            COMMAND.AUTO_FOCUS: self.parseAutoFocusMsg, COMMAND.CENTER: self.parseGimbalCenterMsg,
+            COMMAND.CURRENT_ZOOM_VALUE: self.parseCurrentZoomLevelMsg, COMMAND.REQUEST_MAX_ZOOM: self.parseMaxZoomValueMsg,
+            COMMAND.FORMAT_SD_CARD: self.parseFormatSDCardMsg, COMMAND.GIMBAL_SPEED: self.parseGimbalSpeedMsg,
+            COMMAND.MANUAL_ZOOM: self.parseManualZoomMsg, COMMAND.MANUAL_FOCUS: self.parseManualFocusMsg,
+            COMMAND.FUNC_FEEDBACK_INFO: self.parseFuncFeedbackInfoMsg, COMMAND.SET_GIMBAL_ATTITUDE: self.parseSetGimbalAttitudeMsg,
+            COMMAND.ABSOLUTE_ZOOM: self.parseAbsoluteZoomMsg, COMMAND.REQUEST_IMAGE_MODE: self.parseImageModeMsg,
+            COMMAND.SEND_IMAGE_MODE: self.parseImageModeMsg, COMMAND.REQUEST_WORKING_MODE: self.parseWorkingModeMsg,
+            COMMAND.REQUEST_CODEC_SPECS: self.parseCodecSpecsMsg, COMMAND.SET_CODEC_SPECS: self.parseSetCodecSpecsMsg,
+            COMMAND.SET_DATA_STREAM: self.parseDataStreamMsg, COMMAND.SET_UTC_TIME: self.parseUtcTimeMsg,
+        }
+        self._parsers = {cmd_id: (RESPONSES[cmd_id], parser) for cmd_id, parser in handlers.items()}
 
     def _initialize_socket(self):
         self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self._socket.settimeout(self._rcv_wait_t)
+        self._receiver = DatagramReceiver(self._socket)
 
     def resetVars(self):
         self._connected = False
@@ -51,77 +113,212 @@ class SIYISDK:
         self._att_msg = AttitdueMsg(); self._current_zoom_level_msg = CurrentZoomValueMsg()
         self._max_zoom_value_msg = MaxZoomValueMsg(); self._format_sd_card_msg = FormatSDCardMsg()
         self._center_msg = CenterMsg(); self._gimbalSpeed_msg = GimbalSpeedMsg()
+        self._manualZoom_msg = ManualZoomMsg(); self._manualFocus_msg = ManualFocusMsg()
+        self._func_feedback_msg = FuncFeedbackInfoMsg(); self._set_gimbal_angles_msg = SetGimbalAnglesMsg()
+        self._absolute_zoom_msg = AbsoluteZoomMsg(); self._image_mode_msg = ImageModeMsg()
+        self._working_mode_msg = WorkingModeMsg(); self._codec_specs_msg = CodecSpecsMsg()
+        self._data_stream_msg = RequestDataStreamMsg(); self._utc_time_msg = UtcTimeMsg()
+        # Timestamped history, about 5 s at the 100 Hz attitude stream and 20 Hz zoom polls
+        self._att_history = TelemetryRing(('yaw', 'pitch', 'roll', 'yaw_speed', 'pitch_speed', 'roll_speed'), 512, angles=('yaw',))
+        self._zoom_history = TelemetryRing(('level',), 128)
         return True
 
     def connect(self, maxWaitTime=5.0):
         self._stop = False
+        self._parser.reset()
         self._initialize_socket()
         
         try:
-            self._socket.bind((self._server_ip, self._port))
+            self._socket.bind((self._server_ip, self._local_port))
         except Exception as e:
-            self._logger.error(f"Failed to bind socket to {self._server_ip}:{self._port}. Error: {e}")
+            self._logger.error(f"Failed to bind socket to {self._server_ip}:{self._local_port}. Error: {e}")
             return False
             
         self._recv_thread = threading.Thread(target=self.recvLoop, daemon=True)
         self._conn_thread = threading.Thread(target=self.connectionLoop, daemon=True)
-        self._g_info_thread = threading.Thread(target=self.gimbalInfoLoop, daemon=True)
-        self._zoom_thread = threading.Thread(target=self.zoomLoop, daemon=True)
+        self._send_thread = threading.Thread(target=self.sendLoop, daemon=True)
+        self._startTimers()
 
         try:
             self._recv_thread.start()
             self._conn_thread.start()
+            self._send_thread.start()
         except RuntimeError: pass
         
+        req = self._startHandshake(maxWaitTime)
+        try: req.result(maxWaitTime)
+        except (TimeoutError, FutureTimeoutError, CancelledError): pass
+
+        return self._finishHandshake()
+
+    def _startHandshake(self, maxWaitTime):
+        """
+        Sends the hardware ID request that opens a connection, re-sent until `maxWaitTime`
+
+        Returns
+        --
+        [PendingRequest] Completed by the hardware ID response
+        """
         self._logger.info(f"Connecting to Gimbal at {self._gimbal_ip}...")
-        
-        t0 = time()
-        while time() - t0 < maxWaitTime:
-            self.requestHardwareID()
-
-            if self._hw_msg.cam_type_str and self._hw_msg.cam_type_str != "Unknown":
-                self._connected = True 
-                self._logger.info(f"Connection successful! Camera model: {self._hw_msg.cam_type_str}")
-                
-                if not self.requestDataStream(100):
-                    self._logger.warning("Failed to set attitude data stream rate.")
-                
-                if not self._g_info_thread.is_alive(): self._g_info_thread.start()
-                if not self._zoom_thread.is_alive(): self._zoom_thread.start()
-                
-                return True 
-                
-            sleep(0.5)
+        period = self.REQUEST_POLICIES[COMMAND.ACQUIRE_HW_ID].timeout
+        return self.sendRequest((self._out_msg.requestHardwareIDMsg(),), COMMAND.ACQUIRE_HW_ID,
+                                policy=RequestPolicy(period, max(0, int(maxWaitTime / period) - 1)))
+
+    def _finishHandshake(self):
+        """
+        Marks the connection up if a valid hardware ID was received, disconnects otherwise
+
+        Returns
+        --
+        [bool] True if connected
+        """
+        if self._hw_msg.cam_type_str and self._hw_msg.cam_type_str != "Unknown":
+            self._setConnected(True)
+            self._logger.info(f"Connection successful! Camera model: {self._hw_msg.cam_type_str}")
+            self._startPolls()
+            
+            if not self.requestDataStream(100):
+                self._logger.warning("Failed to set attitude data stream rate.")
+            return True 
 
         self._logger.error("Failed to connect. No valid Hardware ID received from the camera.")
         self.disconnect()
         return False
 
     def disconnect(self):
-        self._logger.info("Disconnecting..."); self._stop = True; self._connected = False
+        self._logger.info("Disconnecting..."); self._stop = True; self._setConnected(False)
+        self._wheel.clear()
+        self._pending.cancelAll()
+        # The sender thread is the only consumer of the command queue, it does the final drain itself
+        sender = self._send_thread
+        if sender and sender.is_alive():
+            if sender is not threading.current_thread():
+                deadline = monotonic() + 1.0
+                # wake() again in case it came before the sender reached wait()
+                while sender.is_alive() and monotonic() < deadline: self._commands.wake(); sender.join(0.05)
+        else: self.drainCommands()
+        self.stopCapture()
         if self._socket: self._socket.close()
         
     def checkConnection(self):
-        if not self._connected: return
-        if (time() - self._last_message_time) > self.CONNECTION_TIMEOUT:
+        silent = (time() - self._last_message_time) > self.CONNECTION_TIMEOUT
+        if self._connected and silent:
             self._logger.warning("Connection lost (timeout).")
-            self._connected = False
+            self._setConnected(False)
+        elif not self._connected and not silent and self._hw_msg.cam_type_str not in ('', 'Unknown'):
+            self._logger.info("Connection restored.")
+            self._setConnected(True)
+            self._startPolls()
     
+    def _setConnected(self, connected):
+        if connected == self._connected: return
+        self._connected = connected
+        self._link.resetStream()
+        self._bus.publish(LinkEvent(monotonic(), connected))
+
     def connectionLoop(self):
         while not self._stop:
-            self.checkConnection()
-            sleep(1)
+            wake_at = self.runDue()
+            self._pending.wait(None if wake_at is None else max(0.0, wake_at - monotonic()))
 
-    def gimbalInfoLoop(self):
-        while not self._stop:
-            if self._connected: self.requestGimbalInfo()
-            sleep(self._info_update_period)
+    def runDue(self, now=None):
+        """
+        Runs the timers and request retries that are due
+
+        Returns
+        --
+        [float] Monotonic time of the next due work, None if there is none
+        """
+        now = monotonic() if now is None else now
+        self._wheel.runDue(now)
+        self.serviceRequests(now)
+        return self.nextDeadline()
+
+    def nextDeadline(self):
+        deadlines = [d for d in (self._wheel.nextDeadline(), self._pending.nextDeadline()) if d is not None]
+        return min(deadlines, default=None)
+
+    def _schedule(self, key, when, callback):
+        if self._wheel.schedule(key, when, callback): self._wakeLoop()
+
+    def _wakeLoop(self): self._pending.wake()
+
+    def _startTimers(self):
+        self._wheel.clear(); self._fast_until.clear()
+        with self._speed_lock: self._speed_last = None; self._speed_pending = None
+        self._schedule('check', monotonic(), self._checkDue)
+
+    def _checkDue(self, now):
+        self.checkConnection()
+        self._schedule('check', now + self.CONNECTION_CHECK_PERIOD, self._checkDue)
+
+    def _startPolls(self):
+        now = monotonic()
+        for cmd_id in self._polls: self._schedule(cmd_id, now, lambda t, c=cmd_id: self._pollDue(c, t))
+
+    def _pollDue(self, cmd_id, now):
+        # Not re-armed while the link is down, checkConnection() restarts the polls
+        if not self._connected: return
+        self._polls[cmd_id]()
+        policy = self.POLL_POLICIES[cmd_id]
+        period = policy.fast if now < self._fast_until.get(cmd_id, 0.0) else policy.slow
+        self._schedule(cmd_id, now + period, lambda t: self._pollDue(cmd_id, t))
+
+    def boostPoll(self, cmd_id, hold=None):
+        """
+        Polls a telemetry value at its fast rate for a while
+
+        Params
+        --
+        - cmd_id [int] Polled command ID, a key of POLL_POLICIES
+        - hold [float] Seconds of fast polling, defaults to the policy hold. float('inf') keeps it until the next boost
+        """
+        now = monotonic(); policy = self.POLL_POLICIES[cmd_id]
+        self._fast_until[cmd_id] = now + (policy.hold if hold is None else hold)
+        when = self._wheel.when(cmd_id)
+        if self._connected and when is not None and when > now + policy.fast:
+            self._schedule(cmd_id, now + policy.fast, lambda t: self._pollDue(cmd_id, t))
+
+    def pollNow(self, cmd_id):
+        if self._connected and cmd_id in self._wheel:
+            self._schedule(cmd_id, monotonic(), lambda t: self._pollDue(cmd_id, t))
+
+    def serviceRequests(self, now=None):
+        """
+        Re-sends the pending requests whose response timed out, and fails those out of retries
+        """
+        for req in self._pending.expire(now):
+            if req.attempts <= req.policy.retries: self._sendAttempt(req)
+            elif not req.done():
+                req.set_exception(TimeoutError(f"No response {req.expect:02x} after {req.attempts} attempt(s)"))
+
+    def sendRequest(self, frames, expect, match=None, policy=None, once=()):
+        """
+        Sends a request and tracks its response
+
+        Params
+        --
+        - frames [tuple] Encoded frames sent on every attempt
+        - expect [int] Command ID of the response that completes the request
+        - match [callable] Optional predicate on the decoded response fields
+        - policy [RequestPolicy] Timeout and retries, defaults to REQUEST_POLICIES[expect]
+        - once [tuple] Encoded frames sent on the first attempt only, before `frames`
+
+        Returns
+        --
+        [PendingRequest] Future completed with the decoded response fields
+        """
+        policy = policy or self.REQUEST_POLICIES.get(expect, RequestPolicy())
+        first = (once + frames)[0] if once + frames else None
+        req = PendingRequest(frames, expect, match, policy, frameSeq(first) if first else None)
+        self._sendAttempt(req, once)
+        return req
+
+    def _sendAttempt(self, req, once=()):
+        # Registered first, the response can be dispatched before sendMsg() returns
+        self._pending.add(req)
+        for msg in once + req.frames: self.sendMsg(msg)
 
-    def zoomLoop(self):
-        while not self._stop:
-            if self._connected: self.requestCurrentZoomLevel()
-            sleep(self._zoom_update_period)
-            
     def requestDataStream(self, freq_hz):
         data_type = RequestDataStreamMsg.ATTITUDE_DATA
         freq_code = RequestDataStreamMsg.FREQ.get(freq_hz)
@@ -131,120 +328,353 @@ class SIYISDK:
             
     def isConnected(self): return self._connected
 
+    def subscribe(self, callback, types=EVENT_TYPES):
+        """
+        Calls callback(event) from the receive thread for each telemetry event, see siyi_telemetry
+
+        Params
+        --
+        - callback [callable] Must return quickly, it delays the dispatch of the next message
+        - types [tuple] Event types, e.g. (AttitudeEvent, LinkEvent)
+
+        Returns
+        --
+        [CallbackSubscription] close() it to unsubscribe
+        """
+        return self._bus.add(CallbackSubscription(self._bus, types, callback))
+
+    def subscribeQueue(self, types=EVENT_TYPES, maxsize=256):
+        """
+        Returns
+        --
+        [QueueSubscription] Queue of telemetry events, the oldest are dropped when it is full
+        """
+        return self._bus.add(QueueSubscription(self._bus, types, maxsize))
+
+    def subscribeLatest(self, types=EVENT_TYPES):
+        """
+        Returns
+        --
+        [LatestSubscription] Newest event of each type, with wait() for the next one
+        """
+        return self._bus.add(LatestSubscription(self._bus, types))
+
     def sendMsg(self, msg):
+        """
+        Queues an encoded frame for the sender thread, motion commands go first and polls last (see siyi_commands)
+        """
         if msg and self._socket:
-            b = bytes.fromhex(msg)
-            try:
-                self._socket.sendto(b, (self._gimbal_ip, self._port))
-                return True
-            except Exception as e:
-                self._logger.error(f"Error sending message: {e}")
+            if isinstance(msg, str): msg = bytes.fromhex(msg)
+            self._commands.put(msg)
+            self._kickSender()
+            return True
         return False
 
+    def _kickSender(self): pass   # the sender thread waits on the queue itself
+
+    def sendLoop(self):
+        self._logger.debug("Started data sending thread")
+        while not self._stop:
+            self._commands.wait()
+            self.drainCommands()
+        self.drainCommands()
+        self._logger.debug("Exiting data sending thread")
+
+    def drainCommands(self):
+        while True:
+            msg = self._commands.pop()
+            if msg is None: return
+            capture = self._capture
+            if capture: capture.write(TX, msg)
+            self._link.sent(frameCmd(msg), monotonic())
+            self._writeMsg(msg)
+
+    def _writeMsg(self, msg):
+        try: self._socket.sendto(msg, (self._gimbal_ip, self._port))
+        except Exception as e: self._logger.error(f"Error sending message: {e}")
+
+    def getCommandQueueStats(self): return self._commands.stats()
+
+    def getLinkStats(self):
+        """
+        Link quality snapshot: datagrams and frames received, CRC and length errors, resync bytes skipped,
+        sequence gaps, per command sends, responses, unanswered sends and RTT percentiles, and the
+        attitude stream inter-arrival times. See siyi_linkstats
+
+        Returns
+        --
+        [dict] Snapshot, cheap enough to poll at a few Hz
+        """
+        return self._link.snapshot(self._parser, self._receiver)
+
+    def resetLinkStats(self):
+        self._link.clear()
+        self._parser.crc_errors = self._parser.length_errors = self._parser.skipped_bytes = 0
+
     def recvLoop(self):
         self._logger.debug("Started data receiving thread")
         while not self._stop: self.bufferCallback()
         self._logger.debug("Exiting data receiving thread")
 
     def bufferCallback(self):
+        """
+        Waits for datagrams and dispatches the burst queued at wake-up, each stamped with its kernel receive time
+        """
+        rx = self._receiver
         try:
-            buff, addr = self._socket.recvfrom(self._BUFF_SIZE)
+            if not rx.wait(self._rcv_wait_t): return
         except Exception: return
-        
+        for _ in range(self.RECV_BATCH):
+            buf = self._parser.writable()
+            try: datagram = rx.receive(buf)
+            except Exception: return
+            if datagram is None: return
+            n, addr, t_ns = datagram
+
+            self._stampRx(t_ns)
+            self._link.datagram(n)
+            capture = self._capture
+            if capture: capture.write(RX, buf[:n], self._rx_time_ns)
+            self._parser.commit(n)
+            self.dispatchFrames()
+
+    def datagramReceived(self, data, addr=None, t_ns=None):
+        """
+        Feeds a datagram received by an external transport (asyncio, SIYIManager) or replayed from a capture
+
+        Params
+        --
+        - t_ns [int] Monotonic receive time [ns], defaults to now
+        """
+        self._stampRx(t_ns)
+        self._link.datagram(len(data))
+        capture = self._capture
+        if capture: capture.write(RX, data, self._rx_time_ns)
+        self._parser.feed(data)
+        self.dispatchFrames()
+
+    def _stampRx(self, t_ns=None):
         self._last_message_time = time()
+        self._rx_time_ns = monotonic_ns() if t_ns is None else t_ns; self._rx_time = self._rx_time_ns / 1e9
 
-        buff_str = buff.hex(); HEADER='5566'
-        while len(buff_str) >= 20:
-            if not buff_str.startswith(HEADER): buff_str = buff_str[2:]; continue
-            val = self._in_msg.decodeMsg(buff_str)
-            if val is None: buff_str = buff_str[2:]; continue
-            data, data_len, cmd_id, seq = val; packet_len = 10 + data_len; buff_str = buff_str[packet_len*2:]
-            
-            parser_map = {
-                COMMAND.ACQUIRE_FW_VER: self.parseFirmwareMsg, COMMAND.ACQUIRE_HW_ID: self.parseHardwareIDMsg,
-                COMMAND.ACQUIRE_GIMBAL_INFO: self.parseGimbalInfoMsg, COMMAND.ACQUIRE_GIMBAL_ATT: self.parseAttitudeMsg,
-                COMMAND.AUTO_FOCUS: self.parseAutoFocusMsg, COMMAND.CENTER: self.parseGimbalCenterMsg,
-                COMMAND.CURRENT_ZOOM_VALUE: self.parseCurrentZoomLevelMsg, COMMAND.REQUEST_MAX_ZOOM: self.parseMaxZoomValueMsg,
-                COMMAND.FORMAT_SD_CARD: self.parseFormatSDCardMsg, COMMAND.GIMBAL_SPEED: self.parseGimbalSpeedMsg,
-            }
-            
-            parser = parser_map.get(cmd_id)
-            if parser: parser(data, seq)
-            else: self._logger.debug(f"CMD ID '{cmd_id}' parser not implemented.")
+    def startCapture(self, path):
+        """
+        Writes every datagram received and sent to a new binary capture file, see siyi_capture.
+        Raises FileExistsError if `path` already holds a capture
+        """
+        self.stopCapture()
+        self._capture = CaptureWriter(path)
+        self._logger.info(f"Capturing traffic to {path}")
+
+    def stopCapture(self):
+        # The threads read self._capture once into a local, a write racing close() is ignored by the writer
+        capture, self._capture = self._capture, None
+        if capture: capture.close()
+
+    def dispatchFrames(self):
+        for cmd_id, seq, data in self._parser.frames():
+            self._link.received(cmd_id, seq, self._rx_time)
+            entry = self._parsers.get(cmd_id)
+            if entry is None: self._logger.debug(f"CMD ID '{cmd_id:02x}' parser not implemented."); continue
+            fields = entry[0].unpack(data)
+            if fields is None: self._logger.debug(f"CMD ID '{cmd_id:02x}' payload too short: {data.hex()}"); continue
+            entry[1](fields, seq)
+            self._pending.complete(cmd_id, seq, fields)
 
     def requestFirmwareVersion(self): return self.sendMsg(self._out_msg.requestFirmwareVersionMsg())
-    def requestHardwareID(self): return self.sendMsg(self._out_msg.requestHardwareIDMsg())
+    def requestHardwareID(self, confirm=False):
+        msg = self._out_msg.requestHardwareIDMsg()
+        return self.sendRequest((msg,), COMMAND.ACQUIRE_HW_ID) if confirm else self.sendMsg(msg)
     def requestGimbalInfo(self): return self.sendMsg(self._out_msg.requestGimbalInfoMsg())
+    def requestGimbalAttitude(self): return self.sendMsg(self._out_msg.requestGimbalAttitudeMsg())
     def requestAutoFocus(self, x=None, y=None): return self.sendMsg(self._out_msg.autoFocusMsg(x,y))
-    def requestManualZoom(self, direction): return self.sendMsg(self._out_msg.manualZoomMsg(direction))
+    def requestManualZoom(self, direction):
+        # Zoom level is polled fast while zooming, and for a while after the stop command (direction 0)
+        self.boostPoll(COMMAND.CURRENT_ZOOM_VALUE, float('inf') if direction else None)
+        return self.sendMsg(self._out_msg.manualZoomMsg(direction))
+    def requestAbsoluteZoom(self, level):
+        self.boostPoll(COMMAND.CURRENT_ZOOM_VALUE)
+        return self.sendMsg(self._out_msg.absoluteZoomMsg(level))
     def requestManualFocus(self, direction): return self.sendMsg(self._out_msg.manualFocusMsg(direction))
-    def requestCenterGimbal(self): return self.sendMsg(self._out_msg.centerGimbalMsg())
-    def setGimbalSpeed(self, yaw_speed, pitch_speed): return self.sendMsg(self._out_msg.setGimbalSpeedMsg(yaw_speed, pitch_speed))
+    def requestCenterGimbal(self, confirm=False):
+        msg = self._out_msg.centerGimbalMsg()
+        return self.sendRequest((msg,), COMMAND.CENTER, match=lambda f: f.sta == 1) if confirm else self.sendMsg(msg)
+    def setGimbalSpeed(self, yaw_speed, pitch_speed):
+        """
+        Sends a speed command through the coalescing stage:
+        - a command identical to the last one sent is only re-sent every SPEED_KEEPALIVE seconds
+        - at most SPEED_MAX_RATE commands are sent per second. A command arriving too early is sent as soon as
+          allowed, unless a newer one replaces it in the meantime. A stop (0, 0) is never delayed
+
+        Returns
+        --
+        [bool] False if sending failed
+        """
+        payload = REQUESTS[COMMAND.GIMBAL_SPEED].pack(yaw_speed, pitch_speed)
+        now = monotonic()
+        with self._speed_lock:
+            stats = self._speed_stats; stats['requested'] += 1
+            if self._speed_pending is not None: stats['superseded'] += 1; self._speed_pending = None
+            if payload == self._speed_last and now - self._speed_sent_at < self.SPEED_KEEPALIVE:
+                stats['deduplicated'] += 1
+                return True
+            due = self._speed_sent_at + 1.0 / self.SPEED_MAX_RATE
+            if now < due and payload != self._SPEED_STOP:
+                stats['rate_limited'] += 1; self._speed_pending = payload
+                if 'speed' not in self._wheel: self._schedule('speed', due, self._speedDue)
+                return True
+            return self._sendSpeed(payload, now)
+
+    def _speedDue(self, now):
+        with self._speed_lock:
+            payload = self._speed_pending; self._speed_pending = None
+            if payload is not None: self._sendSpeed(payload, now)
+
+    def _sendSpeed(self, payload, now):
+        self._speed_last = payload; self._speed_sent_at = now; self._speed_stats['sent'] += 1
+        return self.sendMsg(self._out_msg.encode(payload, COMMAND.GIMBAL_SPEED))
+
+    def getSpeedCommandStats(self):
+        """
+        Returns
+        --
+        [dict] Speed commands requested, sent, deduplicated, rate limited and superseded by a newer one before sending
+        """
+        with self._speed_lock: return dict(self._speed_stats)
+    def setGimbalAttitude(self, yaw_deg, pitch_deg): return self.sendMsg(self._out_msg.setGimbalAttitudeMsg(yaw_deg, pitch_deg))
     def requestCurrentZoomLevel(self): return self.sendMsg(self._out_msg.requestCurrentZoomMsg())
-    def takePhoto(self): return self.sendMsg(self._out_msg.takePhotoMsg())
-    def toggleRecording(self): return self.sendMsg(self._out_msg.recordMsg())
-    def setMotionMode(self, mode): return self.sendMsg(self._out_msg.setMotionModeMsg(mode))
+    def requestMaxZoomLevel(self): return self.sendMsg(self._out_msg.requestMaxZoomMsg())
+    def takePhoto(self, confirm=False):
+        msg = self._out_msg.takePhotoMsg()
+        if not confirm: return self.sendMsg(msg)
+        # Photo result is pushed as FUNC_FEEDBACK_INFO (0: success, 1: failed); never re-sent, that would take another photo
+        return self.sendRequest((), COMMAND.FUNC_FEEDBACK_INFO, match=lambda f: f.info_type in (0, 1), once=(msg,))
+    def toggleRecording(self, confirm=False):
+        msg = self._out_msg.recordMsg()
+        self.boostPoll(COMMAND.ACQUIRE_GIMBAL_INFO)
+        if not confirm: return self.sendMsg(msg)
+        # Confirmed by polling gimbal info until the record state changes; only the poll is re-sent
+        before = self._gimbal_info_msg.record_state
+        return self.sendRequest((self._out_msg.requestGimbalInfoMsg(),), COMMAND.ACQUIRE_GIMBAL_INFO,
+                                match=lambda f: f.record_sta != before, once=(msg,))
+    def setMotionMode(self, mode, confirm=False):
+        msg = self._out_msg.setMotionModeMsg(mode)
+        self.boostPoll(COMMAND.ACQUIRE_GIMBAL_INFO)
+        if not confirm: return self.sendMsg(msg)
+        # Modes 3/4/5 (lock/follow/FPV) are reported as 0/1/2 in gimbal info
+        return self.sendRequest((msg, self._out_msg.requestGimbalInfoMsg()), COMMAND.ACQUIRE_GIMBAL_INFO,
+                                match=lambda f: f.gimbal_motion_mode == mode - 3)
+    def requestImageMode(self): return self.sendMsg(self._out_msg.requestImageModeMsg())
+    def setImageMode(self, mode): return self.sendMsg(self._out_msg.setImageModeMsg(mode))
+    def requestWorkingMode(self): return self.sendMsg(self._out_msg.requestWorkingModeMsg())
+    def requestCodecSpecs(self, stream_type): return self.sendMsg(self._out_msg.requestCodecSpecsMsg(stream_type))
+    def setCodecSpecs(self, stream_type, video_enc_type, resolution_l, resolution_h, video_bitrate):
+        return self.sendMsg(self._out_msg.setCodecSpecsMsg(stream_type, video_enc_type, resolution_l, resolution_h, video_bitrate))
+    def setUtcTime(self, timestamp_us): return self.sendMsg(self._out_msg.setUtcTimeMsg(timestamp_us))
+    def formatSDCard(self): return self.sendMsg(self._out_msg.formatSDCardMsg())
+
+    @staticmethod
+    def _versionStr(ver): return f"{(ver >> 16) & 0xFF}.{(ver >> 8) & 0xFF}.{ver & 0xFF}"
 
-    def parseFirmwareMsg(self, msg, seq): self._fw_msg.seq = seq
+    def parseFirmwareMsg(self, msg, seq):
+        self._fw_msg.seq = seq
+        self._fw_msg.code_board_ver = self._versionStr(msg.code_board_ver)
+        self._fw_msg.gimbal_firmware_ver = self._versionStr(msg.gimbal_firmware_ver)
+        self._fw_msg.zoom_firmware_ver = self._versionStr(msg.zoom_firmware_ver) if msg.zoom_firmware_ver else ''
     
     def parseHardwareIDMsg(self, msg, seq):
         self._hw_msg.seq = seq
-        self._hw_msg.id = msg
-
-        if len(msg) >= 4:
-
-            model_code_hex = msg[0:4]
-            try:
-                model_code_bytes = bytes.fromhex(model_code_hex)
-                model_code_str = model_code_bytes.decode('ascii').upper()
-            except (ValueError, UnicodeDecodeError):
-                self._logger.error(f"Could not decode model code from hex: {model_code_hex}")
-                self._hw_msg.cam_type_str = "Unknown"
-                return
+        self._hw_msg.id = (msg.model + msg.serial).hex()
 
-            self._hw_msg.cam_type_str = HardwareIDMsg.CAM_DICT.get(model_code_str, "Unknown")
-            
-            if self._hw_msg.cam_type_str == "Unknown":
-                self._logger.warning(f"Unknown camera model string in dictionary: '{model_code_str}'")
-        else:
+        try:
+            model_code_str = msg.model.decode('ascii').upper()
+        except UnicodeDecodeError:
+            self._logger.error(f"Could not decode model code from hex: {msg.model.hex()}")
             self._hw_msg.cam_type_str = "Unknown"
-            self._logger.error(f"Malformed Hardware ID packet (too short): {msg}")
+            return
+
+        self._hw_msg.cam_type_str = HardwareIDMsg.CAM_DICT.get(model_code_str, "Unknown")
+        
+        if self._hw_msg.cam_type_str == "Unknown":
+            self._logger.warning(f"Unknown camera model string in dictionary: '{model_code_str}'")
+        if self._bus.wants(HardwareIDEvent): self._bus.publish(HardwareIDEvent(self._rx_time, self._hw_msg.id, self._hw_msg.cam_type_str))
 
     def parseGimbalInfoMsg(self, msg, seq):
-        try:
-            self._gimbal_info_msg.record_state = int(msg[6:8], 16); self._gimbal_info_msg.motion_mode = int(msg[8:10], 16)
-            self._gimbal_info_msg.mount_dir = int(msg[10:12], 16); self._gimbal_info_msg.hdr_sta = int(msg[2:4], 16)
-        except (IndexError, ValueError): pass 
+        info = self._gimbal_info_msg; info.seq = seq
+        info.record_state = msg.record_sta; info.motion_mode = msg.gimbal_motion_mode
+        info.mount_dir = msg.gimbal_mounting_dir; info.hdr_sta = msg.hdr_sta; info.video_output = msg.video_hdmi_or_cvbs
+        if self._bus.wants(GimbalInfoEvent):
+            self._bus.publish(GimbalInfoEvent(self._rx_time, info.record_state, info.motion_mode, info.mount_dir, info.hdr_sta, info.video_output))
     def parseAttitudeMsg(self, msg, seq):
-        try:
-            self._att_msg.yaw = toInt(msg[2:4] + msg[0:2]) / 10.0
-            self._att_msg.pitch = toInt(msg[6:8] + msg[4:6]) / 10.0
-            self._att_msg.roll = toInt(msg[10:12] + msg[8:10]) / 10.0
-        except (IndexError, ValueError): pass
-    def parseGimbalSpeedMsg(self, msg, seq): 
-        try: self._gimbalSpeed_msg.success = bool(int(msg, 16))
-        except (ValueError): pass
-    def parseAutoFocusMsg(self, msg, seq): 
-        try: self._autoFocus_msg.success = bool(int(msg, 16))
-        except (ValueError): pass
-    def parseGimbalCenterMsg(self, msg, seq): 
-        try: self._center_msg.success = bool(int(msg, 16))
-        except (ValueError): pass
+        att = self._att_msg; att.seq = seq
+        att.yaw = msg.yaw; att.pitch = msg.pitch; att.roll = msg.roll
+        att.yaw_speed = msg.yaw_velocity; att.pitch_speed = msg.pitch_velocity; att.roll_speed = msg.roll_velocity
+        self._att_history.append(self._rx_time, *msg)
+        if self._bus.wants(AttitudeEvent): self._bus.publish(AttitudeEvent(self._rx_time, *msg))
+    def parseSetGimbalAttitudeMsg(self, msg, seq):
+        self._set_gimbal_angles_msg.seq = seq; self._set_gimbal_angles_msg.yaw = msg.yaw; self._set_gimbal_angles_msg.pitch = msg.pitch
+    def parseGimbalSpeedMsg(self, msg, seq): self._gimbalSpeed_msg.seq = seq; self._gimbalSpeed_msg.success = bool(msg.sta)
+    def parseAutoFocusMsg(self, msg, seq): self._autoFocus_msg.seq = seq; self._autoFocus_msg.success = bool(msg.sta)
+    def parseManualFocusMsg(self, msg, seq): self._manualFocus_msg.seq = seq; self._manualFocus_msg.success = bool(msg.sta)
+    def parseGimbalCenterMsg(self, msg, seq): self._center_msg.seq = seq; self._center_msg.success = bool(msg.sta)
+    def parseManualZoomMsg(self, msg, seq): self._manualZoom_msg.seq = seq; self._manualZoom_msg.level = msg.zoom_multiple
+    def parseAbsoluteZoomMsg(self, msg, seq): self._absolute_zoom_msg.seq = seq; self._absolute_zoom_msg.success = bool(msg.ack)
     def parseCurrentZoomLevelMsg(self, msg, seq):
-        try:
-            int_part, float_part = int(msg[0:2], 16), int(msg[2:4], 16)
-            self._current_zoom_level_msg.level = int_part + (float_part / 10.0)
-        except (IndexError, ValueError): pass
+        level = msg.zoom_int + (msg.zoom_float / 10.0)
+        # Keep polling fast while the zoom keeps moving
+        if level != self._current_zoom_level_msg.level and self._fast_until.get(COMMAND.CURRENT_ZOOM_VALUE, 0.0) != float('inf'):
+            self.boostPoll(COMMAND.CURRENT_ZOOM_VALUE)
+        self._current_zoom_level_msg.seq = seq; self._current_zoom_level_msg.level = level
+        self._zoom_history.append(self._rx_time, self._current_zoom_level_msg.level)
+        if self._bus.wants(ZoomEvent): self._bus.publish(ZoomEvent(self._rx_time, self._current_zoom_level_msg.level))
     def parseMaxZoomValueMsg(self, msg, seq):
-        try:
-            int_part, float_part = int(msg[0:2], 16), int(msg[2:4], 16)
-            self._max_zoom_value_msg.level = int_part + (float_part / 10.0)
-        except (IndexError, ValueError): pass
-    def parseFormatSDCardMsg(self, msg, seq):
-        try: self._format_sd_card_msg.success = bool(int(msg[0:2], 16))
-        except (ValueError): pass
+        self._max_zoom_value_msg.seq = seq; self._max_zoom_value_msg.level = msg.zoom_max_int + (msg.zoom_max_float / 10.0)
+    def parseFuncFeedbackInfoMsg(self, msg, seq):
+        self._func_feedback_msg.seq = seq; self._func_feedback_msg.info_type = msg.info_type
+        # Pushed HDR state is applied directly, a record failure refreshes the gimbal info at once
+        if msg.info_type in (2, 3): self._gimbal_info_msg.hdr_sta = int(msg.info_type == 2)
+        elif msg.info_type == 4: self.pollNow(COMMAND.ACQUIRE_GIMBAL_INFO)
+    def parseImageModeMsg(self, msg, seq): self._image_mode_msg.seq = seq; self._image_mode_msg.mode = msg.vdisp_mode
+    def parseWorkingModeMsg(self, msg, seq): self._working_mode_msg.seq = seq; self._working_mode_msg.mode = msg.gimbal_mode
+    def parseCodecSpecsMsg(self, msg, seq):
+        specs = self._codec_specs_msg; specs.seq = seq
+        specs.stream_type = msg.stream_type; specs.video_enc_type = msg.video_enc_type
+        specs.resolution_l = msg.resolution_l; specs.resolution_h = msg.resolution_h; specs.video_bitrate = msg.video_bitrate
+    def parseSetCodecSpecsMsg(self, msg, seq):
+        self._codec_specs_msg.seq = seq; self._codec_specs_msg.stream_type = msg.stream_type; self._codec_specs_msg.success = bool(msg.sta)
+    def parseDataStreamMsg(self, msg, seq): self._data_stream_msg.seq = seq; self._data_stream_msg.data_type = msg.data_type
+    def parseUtcTimeMsg(self, msg, seq): self._utc_time_msg.seq = seq; self._utc_time_msg.success = msg.ack > 0
+    def parseFormatSDCardMsg(self, msg, seq): self._format_sd_card_msg.seq = seq; self._format_sd_card_msg.success = bool(msg.format_sta)
     
-    def getAttitude(self): return (self._att_msg.yaw, self._att_msg.pitch, self._att_msg.roll)
+    def getAttitude(self):
+        sample = self._att_history.latest()
+        return sample[1:4] if sample else (self._att_msg.yaw, self._att_msg.pitch, self._att_msg.roll)
+    def getAttitudeSample(self):
+        """
+        Returns
+        --
+        [tuple] (t, yaw, pitch, roll) of the newest attitude, t is its monotonic receive time. None before the first one
+        """
+        sample = self._att_history.latest()
+        return sample[:4] if sample else None
+    def getAttitudeAt(self, t):
+        """
+        Attitude interpolated at monotonic time `t`, e.g. the capture time of a video frame.
+        Clamped to the oldest/newest sample of the history.
+
+        Returns
+        --
+        [tuple] (yaw, pitch, roll), None before the first attitude
+        """
+        sample = self._att_history.at(t)
+        return sample[1:4] if sample else None
     def getGimbalInfo(self): return self._gimbal_info_msg
     def getCameraTypeString(self): return self._hw_msg.cam_type_str
-    def getCurrentZoomLevel(self): return self._current_zoom_level_msg.level
\ No newline at end of file
+    def getHardwareID(self): return self._hw_msg.id
+    def getFirmwareVersion(self): return self._fw_msg
+    def getCurrentZoomLevel(self): return self._current_zoom_level_msg.level
+    def getZoomLevelAt(self, t):
+        sample = self._zoom_history.at(t)
+        return sample[1] if sample else None
+    def getMaxZoomLevel(self): return self._max_zoom_value_msg.level
+    def getCodecSpecs(self): return self._codec_specs_msg
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+asyncio implementation of the SIYI SDK.
+Same requests, parsers and getters as SIYISDK, but driven by an event loop instead of threads,
+so several gimbals can share one loop.
+"""
+import asyncio
+from concurrent.futures import CancelledError
+from siyi_sdk import SIYISDK
+
+class _SIYIProtocol(asyncio.DatagramProtocol):
+    def __init__(self, sdk): self._sdk = sdk
+    def datagram_received(self, data, addr): self._sdk.datagramReceived(data, addr)
+    def error_received(self, exc): self._sdk._logger.debug(f"Socket error: {exc}")
+
+class AsyncSIYISDK(SIYISDK):
+    def __init__(self, server_ip="192.168.144.25", port=37260, local_ip="0.0.0.0", local_port=0, debug=False):
+        """
+        Params
+        --
+        - server_ip [str] Gimbal IP
+        - port [int] Gimbal UDP port
+        - local_ip, local_port Local address to bind. The default ephemeral port lets several
+          clients run side by side, the gimbal answers to the port a request came from.
+        - debug [bool] print debug messages
+        """
+        super().__init__(server_ip=server_ip, port=port, debug=debug)
+        self._local_addr = (local_ip, local_port)
+        self._loop = None; self._transport = None; self._service_handle = None; self._drain_scheduled = False
+
+    async def connect(self, maxWaitTime=5.0):
+        self._stop = False
+        self._parser.reset()
+        self._loop = asyncio.get_running_loop()
+        try:
+            self._transport, _ = await self._loop.create_datagram_endpoint(lambda: _SIYIProtocol(self), local_addr=self._local_addr)
+        except OSError as e:
+            self._logger.error(f"Failed to bind socket to {self._local_addr[0]}:{self._local_addr[1]}. Error: {e}")
+            return False
+
+        self._startTimers()
+        try: await self.wait(self._startHandshake(maxWaitTime), maxWaitTime)
+        except (asyncio.TimeoutError, TimeoutError, CancelledError, asyncio.CancelledError): pass
+
+        return self._finishHandshake()
+
+    def disconnect(self):
+        self._logger.info("Disconnecting..."); self._stop = True; self._setConnected(False)
+        self._wheel.clear()
+        if self._service_handle: self._service_handle.cancel(); self._service_handle = None
+        self._pending.cancelAll()
+        self.drainCommands()
+        self.stopCapture()
+        if self._transport: self._transport.close(); self._transport = None
+
+    async def wait(self, req, timeout=None):
+        """
+        Awaits a request handle returned by sendRequest() or a confirm=True command
+
+        Returns
+        --
+        Decoded response fields
+        """
+        return await asyncio.wait_for(asyncio.wrap_future(req), timeout)
+
+    def sendMsg(self, msg):
+        if msg and self._transport is not None:
+            if isinstance(msg, str): msg = bytes.fromhex(msg)
+            self._commands.put(msg)
+            self._kickSender()
+            return True
+        return False
+
+    def _kickSender(self):
+        # Frames queued during one loop iteration are written together, in priority order
+        if self._drain_scheduled or self._loop is None: return
+        self._drain_scheduled = True
+        self._loop.call_soon_threadsafe(self._drainDue)
+
+    def _drainDue(self):
+        self._drain_scheduled = False
+        self.drainCommands()
+
+    def _writeMsg(self, msg):
+        if self._transport is not None: self._transport.sendto(msg, (self._gimbal_ip, self._port))
+
+    def _sendAttempt(self, req, once=()):
+        # May run outside the loop thread (sync callers, retries), the timer is armed from the loop
+        super()._sendAttempt(req, once)
+        self._wakeLoop()
+
+    def _wakeLoop(self):
+        if self._loop is not None: self._loop.call_soon_threadsafe(self._scheduleService)
+
+    def _scheduleService(self):
+        # One loop timer armed at the nearest deadline replaces the connection thread of SIYISDK.
+        # Loop thread only, other threads go through _wakeLoop()
+        deadline = self.nextDeadline()
+        if self._loop is None or deadline is None: return
+        if self._service_handle:
+            if self._service_handle.when() <= deadline: return
+            self._service_handle.cancel()
+        self._service_handle = self._loop.call_at(deadline, self._serviceDue)
+
+    def _serviceDue(self):
+        self._service_handle = None
+        self.runDue()
+        self._scheduleService()
@@ -0,0 +1,216 @@
+"""
+Timestamped telemetry history and event publishing for the SIYI SDK
+"""
+import queue
+import threading
+import logging
+from abc import ABC, abstractmethod
+from array import array
+from collections import namedtuple
+from time import sleep
+
+def wrapAngle(deg):
+    """
+    Returns
+    --
+    Angle in [-180, 180)
+    """
+    return (deg + 180.0) % 360.0 - 180.0
+
+class TelemetryRing:
+    """
+    Fixed-size history of timestamped samples, stored row by row in one array('d').
+    There is a single writer (the receive thread); readers never lock, they retry while the
+    sequence counter is odd or has moved during their read.
+
+    Params
+    --
+    - fields [tuple] Sample field names
+    - size [int] Number of samples kept
+    - angles [tuple] Fields interpolated on the shortest arc, e.g. yaw across +-180
+    """
+    def __init__(self, fields, size=256, angles=()):
+        self.fields = tuple(fields)
+        self._stride = len(self.fields) + 1
+        self._size = size
+        self._data = array('d', bytes(8 * size * self._stride))
+        self._angles = tuple(self.fields.index(f) for f in angles)
+        self._count = 0
+        self._seq = 0
+
+    def __len__(self): return min(self._count, self._size)
+
+    def append(self, t, *values):
+        """
+        Stores a sample taken at monotonic time `t`
+        """
+        self._seq += 1
+        i = (self._count % self._size) * self._stride
+        self._data[i] = t
+        self._data[i + 1:i + self._stride] = array('d', values)
+        self._count += 1
+        self._seq += 1
+
+    def clear(self):
+        self._seq += 1; self._count = 0; self._seq += 1
+
+    def _read(self, fn):
+        while True:
+            seq = self._seq
+            if not seq & 1:
+                result = fn()
+                if seq == self._seq: return result
+            sleep(0)
+
+    def _row(self, n):
+        i = (n % self._size) * self._stride
+        return tuple(self._data[i:i + self._stride])
+
+    def latest(self):
+        """
+        Returns
+        --
+        [tuple] (t, *values) of the newest sample, None if empty
+        """
+        return self._read(lambda: self._row(self._count - 1) if self._count else None)
+
+    def samples(self, n=None):
+        """
+        Returns
+        --
+        [list] Up to `n` newest (t, *values) samples, oldest first
+        """
+        def read():
+            k = len(self) if n is None else min(n, len(self))
+            return [self._row(j) for j in range(self._count - k, self._count)]
+        return self._read(read)
+
+    def at(self, t):
+        """
+        Interpolates the sample at monotonic time `t`, clamped to the oldest/newest sample
+
+        Returns
+        --
+        [tuple] (t, *values), None if empty
+        """
+        def read():
+            if not self._count: return None
+            lo = self._count - len(self); hi = self._count - 1
+            if t <= self._data[(lo % self._size) * self._stride]: return self._row(lo)
+            if t >= self._data[(hi % self._size) * self._stride]: return self._row(hi)
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if self._data[(mid % self._size) * self._stride] <= t: lo = mid
+                else: hi = mid
+            return self._row(lo), self._row(hi)
+        rows = self._read(read)
+        if rows is None or not isinstance(rows[0], tuple): return rows
+        a, b = rows
+        k = (t - a[0]) / (b[0] - a[0]) if b[0] > a[0] else 0.0
+        values = [va + (vb - va) * k for va, vb in zip(a[1:], b[1:])]
+        for j in self._angles: values[j] = wrapAngle(a[j + 1] + wrapAngle(b[j + 1] - a[j + 1]) * k)
+        return (t, *values)
+
+# Telemetry events, t is the monotonic receive time of the message
+AttitudeEvent = namedtuple('AttitudeEvent', 't yaw pitch roll yaw_speed pitch_speed roll_speed')
+ZoomEvent = namedtuple('ZoomEvent', 't level')
+GimbalInfoEvent = namedtuple('GimbalInfoEvent', 't record_state motion_mode mount_dir hdr_sta video_output')
+HardwareIDEvent = namedtuple('HardwareIDEvent', 't id cam_type')
+LinkEvent = namedtuple('LinkEvent', 't connected')
+EVENT_TYPES = (AttitudeEvent, ZoomEvent, GimbalInfoEvent, HardwareIDEvent, LinkEvent)
+
+class Subscription(ABC):
+    """
+    Base of the TelemetryBus subscriptions, deliver() runs in the publishing (receive) thread
+    """
+    def __init__(self, bus, types):
+        self._bus = bus; self.types = types
+    @abstractmethod
+    def deliver(self, event): pass
+    def close(self): self._bus.unsubscribe(self)
+
+class CallbackSubscription(Subscription):
+    """
+    Calls callback(event) synchronously, the callback must return quickly
+    """
+    def __init__(self, bus, types, callback):
+        super().__init__(bus, types); self._callback = callback
+    def deliver(self, event): self._callback(event)
+
+class QueueSubscription(Subscription):
+    """
+    Queues events, the oldest is dropped when the queue is full
+    """
+    def __init__(self, bus, types, maxsize=256):
+        super().__init__(bus, types)
+        self.queue = queue.Queue(maxsize); self.dropped = 0
+    def deliver(self, event):
+        while True:
+            try: self.queue.put_nowait(event); return
+            except queue.Full:
+                try: self.queue.get_nowait(); self.dropped += 1
+                except queue.Empty: pass
+    def get(self, timeout=None):
+        """
+        Returns
+        --
+        Next event, None on timeout
+        """
+        try: return self.queue.get(timeout=timeout)
+        except queue.Empty: return None
+
+class LatestSubscription(Subscription):
+    """
+    Keeps only the newest event of each type
+    """
+    def __init__(self, bus, types):
+        super().__init__(bus, types)
+        self._cond = threading.Condition(); self._latest = {}; self._updates = 0
+    def deliver(self, event):
+        with self._cond:
+            self._latest[type(event)] = event; self._updates += 1
+            self._cond.notify_all()
+    def get(self, event_type):
+        """
+        Returns
+        --
+        Newest event of `event_type`, None if none was received
+        """
+        return self._latest.get(event_type)
+    def wait(self, timeout=None, since=None):
+        """
+        Blocks until an event newer than update count `since` arrives (any new event by default)
+
+        Returns
+        --
+        [int] Update count, pass it as `since` to the next call
+        """
+        with self._cond:
+            since = self._updates if since is None else since
+            self._cond.wait_for(lambda: self._updates != since, timeout)
+            return self._updates
+
+class TelemetryBus:
+    """
+    Publishes telemetry events to subscribers, by event type
+    """
+    def __init__(self):
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self._subs = {t: () for t in EVENT_TYPES}
+
+    def wants(self, event_type): return bool(self._subs.get(event_type))
+
+    def publish(self, event):
+        for sub in self._subs.get(type(event), ()):
+            try: sub.deliver(event)
+            except Exception as e: self._logger.error(f"Subscriber failed on {type(event).__name__}: {e}")
+
+    def add(self, sub):
+        with self._lock:
+            for t in sub.types: self._subs[t] = self._subs.get(t, ()) + (sub,)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            for t in sub.types: self._subs[t] = tuple(s for s in self._subs.get(t, ()) if s is not sub)
@@ -0,0 +1,270 @@
+"""
+Background binary telemetry log
+
+The producer (the engine thread) packs fixed-layout records into a preallocated ring, a writer thread
+writes them to disk in large chunks and fsyncs the file every `fsync_interval` seconds. The ring has one
+producer and one consumer and takes no lock: the producer only fills slots the consumer has released,
+the consumer only reads slots the producer has published. When the ring is full the record is dropped and
+counted, the producer never waits for the disk.
+
+File layout, little endian:
+- header: magic b'CCKTLM01', wall clock start [ns] Q, monotonic start [ns] Q, record size H, format length H,
+  names length H, then the record struct format and the space separated field names (ascii)
+- records, back to back, starting with their monotonic time [ns]. A truncated last record (e.g. after a
+  power loss) is ignored by the reader
+
+Values that rarely change (e.g. tuning parameters) are not repeated in every record, they are written as
+change events to a sidecar CSV file (<log>.events: t_ns, name, value) and joined back by TelemetryReader.wide().
+On close the writer adds its _dropped and _invalid record counts as events.
+
+    python telemetry_log.py info gimbal_log_20240101_120000.bin
+    python telemetry_log.py csv gimbal_log_20240101_120000.bin          # gimbal_log_*.csv, see Log_ReadMe.md
+"""
+import argparse
+import csv
+import mmap
+import os
+import struct
+import threading
+from collections import namedtuple
+from time import monotonic, monotonic_ns, time_ns
+
+MAGIC = b'CCKTLM01'
+FILE_HEADER = struct.Struct('<8sQQHHH')
+EVENTS_SUFFIX = '.events'
+
+class RecordRing:
+    """
+    Single producer, single consumer ring of packed records
+
+    Params
+    --
+    - record [struct.Struct] Record layout
+    - capacity [int] Number of records
+    """
+    def __init__(self, record, capacity=8192):
+        self.record = record; self.capacity = capacity
+        self._buf = bytearray(record.size * capacity)
+        self._head = 0   # records published by the producer
+        self._tail = 0   # records released by the consumer
+        self.dropped = 0; self.invalid = 0
+
+    def __len__(self): return self._head - self._tail
+
+    def put(self, *values):
+        """
+        Returns
+        --
+        [bool] False if the ring is full or the values do not fit the layout
+        """
+        head = self._head
+        if head - self._tail >= self.capacity: self.dropped += 1; return False
+        try: self.record.pack_into(self._buf, (head % self.capacity) * self.record.size, *values)
+        except struct.error: self.invalid += 1; return False
+        self._head = head + 1
+        return True
+
+    def drain(self, write):
+        """
+        Passes the pending records to `write` as at most two contiguous memoryviews, then releases them
+
+        Returns
+        --
+        [int] Number of records drained
+        """
+        head, tail = self._head, self._tail
+        n = head - tail
+        if not n: return 0
+        size = self.record.size; i = tail % self.capacity
+        first = min(n, self.capacity - i)
+        with memoryview(self._buf) as view:
+            write(view[i * size:(i + first) * size])
+            if n > first: write(view[:(n - first) * size])
+        self._tail = head
+        return n
+
+class TelemetryWriter:
+    """
+    Params
+    --
+    - path [str] Log file, created
+    - record [struct.Struct] Record layout
+    - fields [tuple] Record field names
+    - capacity [int] Ring size in records
+    - chunk [int] Wake the writer once this many records are pending
+    - flush_interval [float] Seconds between writes when fewer than `chunk` records are pending
+    - fsync_interval [float] Seconds between fsyncs
+    - events [bool] Create the <log>.events change event file
+    """
+    def __init__(self, path, record, fields, capacity=8192, chunk=512, flush_interval=1.0, fsync_interval=2.0, events=True):
+        fields = tuple(fields)
+        if len(fields) != len(record.unpack(bytes(record.size))): raise ValueError("field names do not match the record format")
+        fmt = record.format.encode('ascii'); names = ' '.join(fields).encode('ascii')
+        self.path = path
+        self._file = open(path, 'wb')
+        self._file.write(FILE_HEADER.pack(MAGIC, time_ns(), monotonic_ns(), record.size, len(fmt), len(names)) + fmt + names)
+        self._events = self._events_writer = None
+        if events:
+            self._events = open(path + EVENTS_SUFFIX, 'w', newline='', encoding='utf-8')
+            self._events_writer = csv.writer(self._events); self._events_writer.writerow(('t_ns', 'name', 'value'))
+        self._events_lock = threading.Lock(); self.events = 0
+        self._ring = RecordRing(record, capacity)
+        self._chunk = chunk; self._flush_interval = flush_interval; self._fsync_interval = fsync_interval
+        self.records = 0; self.chunks = 0; self.syncs = 0; self.errors = 0; self._invalid_reported = False
+        self._wake = threading.Event(); self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="TelemetryWriter")
+        self._thread.start()
+
+    def write(self, *values):
+        """
+        Queues one record, called by the producer thread only
+        """
+        ring = self._ring
+        if ring.put(*values):
+            if len(ring) == self._chunk: self._wake.set()
+        elif ring.invalid and not self._invalid_reported: self._report_invalid(values)
+
+    def reject(self, values=()):
+        """
+        Counts a record the producer could not build, as invalid
+        """
+        self._ring.invalid += 1
+        if not self._invalid_reported: self._report_invalid(values)
+
+    def _report_invalid(self, values):
+        self._invalid_reported = True
+        print(f"Veri kaydı: {self.path} kaydı yazılamadı (geçersiz değerler), sonraki hatalar sadece sayılır: {values}")
+
+    def event(self, name, value, t_ns=None):
+        """
+        Records that `name` changed to `value` [str] at monotonic time `t_ns`, from any thread
+        """
+        t_ns = monotonic_ns() if t_ns is None else t_ns
+        with self._events_lock:
+            if self._events is None or self._events.closed: return
+            self._events_writer.writerow((t_ns, name, value)); self._events.flush(); self.events += 1
+
+    def _run(self):
+        last_sync = monotonic()
+        while not self._stop.is_set():
+            self._wake.wait(self._flush_interval); self._wake.clear()
+            self._drain()
+            if monotonic() - last_sync >= self._fsync_interval: self._sync(); last_sync = monotonic()
+        self._drain(); self._sync()
+
+    def _drain(self):
+        try: n = self._ring.drain(self._file.write)
+        except OSError as e:
+            self.errors += 1; print(f"Veri kaydı yazılamadı: {e}")
+            n = self._ring.drain(lambda view: None)
+        if n: self.records += n; self.chunks += 1
+
+    def _sync(self):
+        try: self._file.flush(); os.fsync(self._file.fileno()); self.syncs += 1
+        except OSError: self.errors += 1
+
+    def close(self):
+        if self._file.closed: return
+        self._stop.set(); self._wake.set(); self._thread.join()
+        self._file.close()
+        if self._events: self.event('_dropped', self._ring.dropped); self.event('_invalid', self._ring.invalid)
+        with self._events_lock:
+            if self._events: self._events.close()
+
+    def stats(self):
+        return {"records": self.records, "pending": len(self._ring), "dropped": self._ring.dropped, "invalid": self._ring.invalid,
+                "events": self.events, "chunks": self.chunks, "syncs": self.syncs, "errors": self.errors}
+
+class TelemetryReader:
+    """
+    Memory-mapped reader of a telemetry log
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f: self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.wall_start_ns, self.mono_start_ns, size, fmt_len, names_len = FILE_HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC: raise ValueError(f"{path} is not a telemetry log")
+        offset = FILE_HEADER.size
+        self.record = struct.Struct(self._mm[offset:offset + fmt_len].decode('ascii')); offset += fmt_len
+        self.fields = tuple(self._mm[offset:offset + names_len].decode('ascii').split()); offset += names_len
+        if self.record.size != size: raise ValueError(f"{path}: record size {size} does not match its format")
+        self.Record = namedtuple('TelemetryRecord', self.fields)
+        self._offset = offset
+
+    def __len__(self): return (len(self._mm) - self._offset) // self.record.size
+
+    def close(self): self._mm.close()
+
+    def wall_ns(self, t_ns):
+        """
+        Returns
+        --
+        [int] Wall clock time [ns] of monotonic time `t_ns`
+        """
+        return self.wall_start_ns + t_ns - self.mono_start_ns
+
+    def records(self):
+        """
+        Yields the records as TelemetryRecord namedtuples
+        """
+        end = self._offset + len(self) * self.record.size
+        make = self.Record._make
+        for values in self.record.iter_unpack(self._mm[self._offset:end]): yield make(values)
+
+    def events(self):
+        """
+        Returns
+        --
+        [list] (t_ns, name, value) change events in time order, empty if the log has no event file
+        """
+        try:
+            with open(self.path + EVENTS_SUFFIX, newline='', encoding='utf-8') as f:
+                rows = list(csv.reader(f))[1:]
+        except FileNotFoundError: return []
+        return sorted(((int(t), name, value) for t, name, value in rows if t), key=lambda e: e[0])
+
+    def wide(self, names):
+        """
+        Joins the records with the change events
+
+        Yields
+        --
+        (record, values): values [tuple] is the latest value of each of `names` at the record time, '' before its first event
+        """
+        events = self.events(); i = 0
+        current = dict.fromkeys(names, ''); values = tuple(current.values())
+        for r in self.records():
+            changed = False
+            while i < len(events) and events[i][0] <= r[0]:
+                t, name, value = events[i]; i += 1
+                if name in current: current[name] = value; changed = True
+            if changed: values = tuple(current.values())
+            yield r, values
+
+def main():
+    parser = argparse.ArgumentParser(description="Binary telemetry log tools")
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('info', help="Print the layout and the record count"); p.add_argument('log')
+    p = sub.add_parser('csv', help="Convert a gimbal log to the gimbal_log_*.csv format")
+    p.add_argument('log'); p.add_argument('-o', '--output', default=None, help="CSV file (default: the log name with .csv)")
+    p.add_argument('--rate', type=float, default=10.0, help="CSV rows per second, 0 for every record")
+    args = parser.parse_args()
+
+    if args.cmd == 'info':
+        reader = TelemetryReader(args.log)
+        times = [r[0] for r in reader.records()]
+        duration = (times[-1] - times[0]) / 1e9 if len(times) > 1 else 0.0
+        print(f"{args.log}: {len(reader)} records of {reader.record.size} bytes, {duration:.1f} s"
+              + (f", {(len(times) - 1) / duration:.1f} Hz" if duration else ""))
+        print("fields: " + " ".join(reader.fields))
+        events = reader.events(); counts = {name: value for t, name, value in events if name.startswith('_')}
+        events = [e for e in events if not e[1].startswith('_')]
+        print(f"{len(events)} events: " + ", ".join(sorted({name for t, name, value in events})))
+        if counts: print(f"dropped {counts.get('_dropped')}, invalid {counts.get('_invalid')}")
+        reader.close()
+    else:
+        from tracking_engine import convert_log
+        print(convert_log(args.log, args.output, args.rate))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+@file test_async_print_attitude.py
+@Description: This is a test script shows how to get and print attitude data with the asyncio SDK
+@Author: Mohamed Abdelkader
+@Contact: mohamedashraf123@gmail.com
+All rights reserved 2024
+"""
+
+import sys
+import os
+import asyncio
+  
+current = os.path.dirname(os.path.realpath(__file__))
+parent_directory = os.path.dirname(current)
+  
+sys.path.append(parent_directory)
+
+from siyi_message import COMMAND
+from siyi_sdk_async import AsyncSIYISDK
+
+async def run():
+    cam = AsyncSIYISDK(server_ip="192.168.144.25", port=37260)
+
+    if not await cam.connect():
+        print("No connection ")
+        exit(1)
+
+    req = cam.sendRequest((cam._out_msg.requestGimbalAttitudeMsg(),), COMMAND.ACQUIRE_GIMBAL_ATT)
+    print("Attitude response:", await cam.wait(req, 1.0))
+
+    i =0
+    while i<10:
+        print(f"Attidue (yaw, pitch, roll): {cam.getAttitude()}")
+        await asyncio.sleep(0.5)
+        i += 1
+
+    print('DONE')
+    cam.disconnect()
+
+def test():
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,50 @@
+"""
+@file test_emulator.py
+@Description: This is a test script that runs the SDK against the local gimbal emulator, no hardware needed
+@Author: Mohamed Abdelkader
+@Contact: mohamedashraf123@gmail.com
+All rights reserved 2024
+"""
+
+import sys
+import os
+from time import sleep
+  
+current = os.path.dirname(os.path.realpath(__file__))
+parent_directory = os.path.dirname(current)
+  
+sys.path.append(parent_directory)
+
+from siyi_sdk import SIYISDK
+from siyi_emulator import SIYIEmulator
+
+def test():
+    emu = SIYIEmulator(ip="127.0.0.1", port=37260, latency=0.005, jitter=0.005)
+    emu.start()
+
+    cam = SIYISDK(server_ip="127.0.0.1", port=37260, local_port=37261)
+    if not cam.connect():
+        print("No connection ")
+        exit(1)
+
+    print("Camera:", cam.getCameraTypeString())
+
+    cam.setGimbalSpeed(50, -20)
+    sleep(1)
+    cam.setGimbalSpeed(0, 0)
+    sleep(0.3)
+    print("Attitude (yaw,pitch,roll) after rotation:", cam.getAttitude(), "emulator:", emu.getAttitude())
+
+    cam.requestAbsoluteZoom(3.5)
+    sleep(2)
+    print("Zoom level:", cam.getCurrentZoomLevel())
+
+    req = cam.requestCenterGimbal(confirm=True)
+    print("Center ack:", req.result(3))
+
+    cam.disconnect()
+    emu.stop()
+    print("Emulator stats:", emu.stats)
+
+if __name__ == "__main__":
+    test()
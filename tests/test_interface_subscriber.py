@@ -0,0 +1,39 @@
+"""
+@file test_interface_subscriber.py
+@Description: This is a test script that listens to the interface service, as a ground station or mission computer would, and prints the decoded JSON or binary messages
+@Author: Mohamed Abdelkader
+@Contact: mohamedashraf123@gmail.com
+All rights reserved 2024
+"""
+
+import sys
+import os
+import socket
+  
+current = os.path.dirname(os.path.realpath(__file__))
+parent_directory = os.path.dirname(current)
+  
+sys.path.append(parent_directory)
+
+from interface_publisher import decode_message
+
+def test():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("0.0.0.0", 8889))
+    sock.settimeout(2.0)
+
+    n = 0
+    while n<100:
+        try:
+            data = sock.recv(2048)
+        except socket.timeout:
+            print("No message"); continue
+        n += 1
+        msg = decode_message(data)
+        print(f"{len(data)} bytes: target ({msg.target_latitude:.7f}, {msg.target_longitude:.7f}, {msg.target_altitude:.1f} m) status {msg.target_status}, "
+              f"gimbal heading {msg.gimbal_heading:.0f}")
+
+    print('DONE')
+
+if __name__ == "__main__":
+    test()
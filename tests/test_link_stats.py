@@ -0,0 +1,46 @@
+"""
+@file test_link_stats.py
+@Description: This is a test script shows how to read the link quality counters
+@Author: Mohamed Abdelkader
+@Contact: mohamedashraf123@gmail.com
+All rights reserved 2024
+"""
+
+import sys
+import os
+from time import sleep
+  
+current = os.path.dirname(os.path.realpath(__file__))
+parent_directory = os.path.dirname(current)
+  
+sys.path.append(parent_directory)
+
+from siyi_sdk import SIYISDK
+
+def test():
+    cam = SIYISDK(server_ip="192.168.144.25", port=37260)
+
+    if not cam.connect():
+        print("No connection ")
+        exit(1)
+
+    i =0
+    while i<10:
+        cam.requestGimbalInfo()
+        stats = cam.getLinkStats()
+        rx = stats["rx"]
+        att = stats["attitude_interval_ms"]
+        print(f"Frames: {rx['frames']}, lost: {rx['frames_lost']}, CRC errors: {rx['crc_errors']}, skipped bytes: {rx['skipped_bytes']}")
+        if att["count"]:
+            print(f"Attitude interval: mean {att['mean']:.2f} ms, jitter {att['std']:.2f} ms, p99 {att['p99']} ms")
+        for name, cmd in stats["commands"].items():
+            rtt = cmd["rtt_ms"]
+            if rtt["count"]: print(f"  {name}: sent {cmd['sent']}, received {cmd['received']}, RTT p50 {rtt['p50']} ms, p99 {rtt['p99']} ms")
+        sleep(1)
+        i += 1
+
+    print('DONE')
+    cam.disconnect()
+
+if __name__ == "__main__":
+    test()
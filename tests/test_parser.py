@@ -0,0 +1,104 @@
+"""
+@file test_parser.py
+@Description: Offline checks of the frame codec and SIYIParser on in-memory frames, no gimbal or emulator needed.
+              Run directly or with pytest.
+"""
+
+import sys
+import os
+import struct
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent_directory = os.path.dirname(current)
+
+sys.path.append(parent_directory)
+
+import crc16_python
+from siyi_message import SIYIMESSAGE, SIYIParser, COMMAND, REQUESTS, RESPONSES, STX, CTRL_NEED_ACK, frameSeq
+
+def referenceFrame(payload, cmd_id, seq):
+    """
+    Frame built field by field from the protocol description, independent of SIYIMESSAGE
+    """
+    body = STX + bytes([CTRL_NEED_ACK]) + struct.pack('<HH', len(payload), seq) + bytes([cmd_id]) + payload
+    return body + struct.pack('<H', crc16_python.crc16(body))
+
+def attitudeFrame(msg, i):
+    return bytes(msg.encode(RESPONSES[COMMAND.ACQUIRE_GIMBAL_ATT].pack(i * 0.1, -i * 0.1, 0.0, 0, 0, 0), COMMAND.ACQUIRE_GIMBAL_ATT))
+
+def parse(parser):
+    # The payloads are views into the parser buffer, copy them right away
+    return [(cmd_id, seq, bytes(payload)) for cmd_id, seq, payload in parser.frames()]
+
+def test_cached_frames_match_fresh_frames():
+    msg = SIYIMESSAGE()
+    cases = [(b'', COMMAND.ACQUIRE_GIMBAL_ATT), (REQUESTS[COMMAND.CENTER].pack(1), COMMAND.CENTER),
+             (REQUESTS[COMMAND.MANUAL_ZOOM].pack(-1), COMMAND.MANUAL_ZOOM),
+             (REQUESTS[COMMAND.GIMBAL_SPEED].pack(25, -40), COMMAND.GIMBAL_SPEED),
+             (REQUESTS[COMMAND.SET_GIMBAL_ATTITUDE].pack(-12.5, 30.0), COMMAND.SET_GIMBAL_ATTITUDE)]
+    # Several rounds: the first call fills the cache, the next ones patch the seq of the cached frame
+    for _ in range(3):
+        for payload, cmd_id in cases:
+            frame = msg.encode(payload, cmd_id)
+            assert bytes(frame) == referenceFrame(payload, cmd_id, frameSeq(frame)), (cmd_id, frame.hex())
+    msg._seq = 0xFFFE
+    seqs = [frameSeq(msg.encode(b'', COMMAND.ACQUIRE_GIMBAL_ATT)) for _ in range(3)]
+    assert seqs == [0xFFFF, 0, 1], seqs
+
+def test_hex_api_round_trip():
+    msg = SIYIMESSAGE()
+    data, data_len, cmd_id, seq = msg.decodeMsg(msg.encodeMsg("0afb", COMMAND.GIMBAL_SPEED))
+    assert (data, data_len, cmd_id) == ("0afb", 2, "07"), (data, data_len, cmd_id)
+
+def test_frame_split_across_datagrams():
+    msg = SIYIMESSAGE(); frame = attitudeFrame(msg, 1)
+    # Every split point, including inside the STX bytes and the header
+    for cut in range(1, len(frame)):
+        parser = SIYIParser()
+        parser.feed(frame[:cut]); assert parse(parser) == [], cut
+        parser.feed(frame[cut:]); frames = parse(parser)
+        assert len(frames) == 1 and frames[0][0] == COMMAND.ACQUIRE_GIMBAL_ATT and frames[0][1] == frameSeq(frame), cut
+        assert parser.skipped_bytes == 0 and parser.crc_errors == 0 and parser.length_errors == 0, cut
+
+def test_received_into_writable():
+    msg = SIYIMESSAGE(); frame = attitudeFrame(msg, 2); parser = SIYIParser(recv_size=64)
+    for _ in range(100):
+        space = parser.writable(); space[:len(frame)] = frame; parser.commit(len(frame))
+        assert [f[1] for f in parse(parser)] == [frameSeq(frame)]
+
+def test_several_frames_in_one_datagram():
+    msg = SIYIMESSAGE(); frames = [attitudeFrame(msg, i) for i in range(8)]
+    parser = SIYIParser(); parser.feed(b''.join(frames))
+    parsed = parse(parser)
+    assert [seq for _, seq, _ in parsed] == [frameSeq(f) for f in frames]
+    decoded = [RESPONSES[COMMAND.ACQUIRE_GIMBAL_ATT].unpack(payload) for _, _, payload in parsed]
+    assert [round(d.yaw, 1) for d in decoded] == [round(i * 0.1, 1) for i in range(8)]
+
+def test_resync_after_garbage():
+    msg = SIYIMESSAGE(); a = attitudeFrame(msg, 3); b = attitudeFrame(msg, 4)
+    garbage = b'\x00\x55\x13\x37\x55'
+    parser = SIYIParser(); parser.feed(garbage + a + garbage + b)
+    assert [seq for _, seq, _ in parse(parser)] == [frameSeq(a), frameSeq(b)]
+    assert parser.skipped_bytes == 2 * len(garbage), parser.skipped_bytes
+    assert parser.crc_errors == 0 and parser.length_errors == 0
+
+def test_crc_errors():
+    msg = SIYIMESSAGE(); good = attitudeFrame(msg, 5); bad = bytearray(attitudeFrame(msg, 6)); bad[10] ^= 0x01
+    parser = SIYIParser(); parser.feed(bytes(bad) + good)
+    assert [seq for _, seq, _ in parse(parser)] == [frameSeq(good)]
+    assert parser.crc_errors == 1 and parser.length_errors == 0, (parser.crc_errors, parser.length_errors)
+
+def test_length_errors():
+    msg = SIYIMESSAGE(); good = attitudeFrame(msg, 7)
+    # Valid STX, but a data length beyond MAX_DATA_LEN: skipped without waiting for the missing bytes
+    bad = STX + bytes([CTRL_NEED_ACK]) + struct.pack('<HH', SIYIParser.MAX_DATA_LEN + 1, 0) + bytes([COMMAND.ACQUIRE_GIMBAL_ATT])
+    parser = SIYIParser(); parser.feed(bad + good)
+    assert [seq for _, seq, _ in parse(parser)] == [frameSeq(good)]
+    assert parser.length_errors == 1 and parser.crc_errors == 0, (parser.length_errors, parser.crc_errors)
+
+def main():
+    for name, check in sorted(globals().items()):
+        if name.startswith('test_') and callable(check): check(); print(f"{name}: OK")
+
+if __name__ == "__main__":
+    main()
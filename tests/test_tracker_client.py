@@ -0,0 +1,41 @@
+"""
+@file test_tracker_client.py
+@Description: This is a test script shows how an image tracker talks to the control panel with the binary tracker protocol
+@Author: Mohamed Abdelkader
+@Contact: mohamedashraf123@gmail.com
+All rights reserved 2024
+"""
+
+import sys
+import os
+import socket
+from time import sleep, monotonic_ns
+  
+current = os.path.dirname(os.path.realpath(__file__))
+parent_directory = os.path.dirname(current)
+  
+sys.path.append(parent_directory)
+
+from tracker_protocol import decode_reply, encode_sample
+
+def test():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.settimeout(0.1)
+    panel = ("127.0.0.1", 8888)
+
+    frame_id = 0
+    while frame_id<100:
+        frame_id += 1
+        sock.sendto(encode_sample(10.0, -5.0, 150.0, 1, frame_id, monotonic_ns()), panel)
+        try:
+            reply = decode_reply(sock.recv(1024))
+            latency = (monotonic_ns() - reply.capture_ns) / 1e6 if reply.capture_ns else 0.0
+            print(f"Frame {reply.frame_id}: focal length {reply.focal_length:.1f} mm, zoom {reply.zoom:.1f}, tracking {reply.gimbal_tracker_status}, latency {latency:.1f} ms")
+        except socket.timeout:
+            print("No reply")
+        sleep(0.033)
+
+    print('DONE')
+
+if __name__ == "__main__":
+    test()
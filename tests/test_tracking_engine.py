@@ -0,0 +1,43 @@
+"""
+@file test_tracking_engine.py
+@Description: This is a test script shows how to run the tracking engine without the GUI
+@Author: Mohamed Abdelkader
+@Contact: mohamedashraf123@gmail.com
+All rights reserved 2024
+"""
+
+import sys
+import os
+from time import sleep
+  
+current = os.path.dirname(os.path.realpath(__file__))
+parent_directory = os.path.dirname(current)
+  
+sys.path.append(parent_directory)
+
+from siyi_sdk import SIYISDK
+from tracking_engine import TrackingEngine
+
+def test():
+    cam = SIYISDK(server_ip="192.168.144.25", port=37260)
+
+    if not cam.connect():
+        print("No connection ")
+        exit(1)
+
+    engine = TrackingEngine(cam, rate_hz=50.0)
+    engine.start()
+
+    i =0
+    while i<10:
+        s = engine.snapshot
+        if s: print(f"Heading: {s.heading:.2f}, pitch: {s.pitch:.2f}, roll: {s.roll:.2f}, zoom: {s.zoom:.1f}, focal length: {s.focal_length:.1f} mm")
+        sleep(1)
+        i += 1
+
+    print('DONE')
+    engine.close()
+    cam.disconnect()
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,88 @@
+"""
+Wire formats of the image tracker link
+
+The tracker sends one sample per processed frame, the engine answers every tick. Both sides speak JSON or
+the fixed-layout binary format below; the engine answers a client in the format of its last datagram.
+Binary datagrams start with MAGIC and a version byte, all fields are little endian:
+
+- SAMPLE (tracker -> engine, 32 bytes): magic 2s, version B, kind B (1), frame_id I, dx f, dy f, dz f,
+  tracker_status B, 3 pad bytes, capture_ns Q (tracker clock)
+- REPLY (engine -> tracker, 32 bytes): magic 2s, version B, kind B (2), focal_length f, zoom f,
+  gimbal_tracker_status B, image_tracker_reset B, 2 pad bytes, frame_id I, capture_ns Q, hold_us I
+
+frame_id and capture_ns of the last sample used by the engine are echoed back, hold_us is the time the
+engine held it. The tracker gets its end to end latency as its clock minus capture_ns.
+"""
+import json
+import math
+import struct
+from collections import namedtuple
+
+MAGIC = b'CT'
+VERSION = 1
+KIND_SAMPLE = 1; KIND_REPLY = 2
+SAMPLE = struct.Struct('<2sBBIfffB3xQ')
+REPLY = struct.Struct('<2sBBffBB2xIQI')
+
+TrackerSample = namedtuple('TrackerSample', 'dx dy dz tracker_status frame_id capture_ns')
+TrackerReply = namedtuple('TrackerReply', 'focal_length zoom gimbal_tracker_status image_tracker_reset frame_id capture_ns hold_us')
+
+def is_binary(data): return data[:2] == MAGIC
+
+def decode_sample(data):
+    """
+    Params
+    --
+    - data [bytes-like] Binary or JSON datagram
+
+    Returns
+    --
+    [TrackerSample] dx, dy, dz as float, the other fields as int. JSON samples without frame_id / capture_ns get 0
+
+    Raises ValueError if the datagram is malformed or of another version
+    """
+    if data[:2] == MAGIC:
+        if len(data) < SAMPLE.size: raise ValueError(f"short tracker sample ({len(data)} bytes)")
+        magic, version, kind, frame_id, dx, dy, dz, status, capture_ns = SAMPLE.unpack_from(data)
+        if version != VERSION or kind != KIND_SAMPLE: raise ValueError(f"unsupported tracker sample v{version} kind {kind}")
+        sample = TrackerSample(dx, dy, dz, status, frame_id, capture_ns)
+    else:
+        try: d = json.loads(bytes(data).decode('utf-8'))
+        except UnicodeDecodeError as e: raise ValueError(str(e))
+        if not isinstance(d, dict): raise ValueError("tracker sample is not a JSON object")
+        try:
+            sample = TrackerSample(float(d.get('dx', 0)), float(d.get('dy', 0)), float(d.get('dz', 0.0)), int(d.get('tracker_status', 0)),
+                                   int(d.get('frame_id', 0)), int(d.get('capture_ns', 0)))
+        except (TypeError, ValueError, OverflowError) as e: raise ValueError(f"invalid tracker sample field: {e}")
+    if not all(math.isfinite(v) for v in sample[:3]): raise ValueError("non-finite tracker sample value")
+    return sample
+
+def encode_sample(dx, dy, dz, tracker_status, frame_id=0, capture_ns=0):
+    return SAMPLE.pack(MAGIC, VERSION, KIND_SAMPLE, frame_id & 0xFFFFFFFF, dx, dy, dz, tracker_status, capture_ns)
+
+def encode_reply(focal_length, zoom, gimbal_tracker_status, image_tracker_reset, frame_id=0, capture_ns=0, hold_us=0, binary=True):
+    """
+    Returns
+    --
+    [bytes] Binary REPLY, or the JSON reply if `binary` is False
+    """
+    if not binary:
+        return json.dumps({"focal_length": round(focal_length, 2), "zoom": round(zoom, 2), "gimbal_tracker_status": gimbal_tracker_status,
+                           "image_tracker_reset": image_tracker_reset}).encode('utf-8')
+    return REPLY.pack(MAGIC, VERSION, KIND_REPLY, focal_length, zoom, gimbal_tracker_status, image_tracker_reset,
+                      frame_id & 0xFFFFFFFF, capture_ns, min(hold_us, 0xFFFFFFFF))
+
+def decode_reply(data):
+    """
+    Returns
+    --
+    [TrackerReply] from a binary or JSON reply, JSON replies have no frame_id / capture_ns / hold_us (0)
+    """
+    if data[:2] == MAGIC:
+        if len(data) < REPLY.size: raise ValueError(f"short tracker reply ({len(data)} bytes)")
+        magic, version, kind, *fields = REPLY.unpack_from(data)
+        if version != VERSION or kind != KIND_REPLY: raise ValueError(f"unsupported tracker reply v{version} kind {kind}")
+        return TrackerReply(*fields)
+    d = json.loads(bytes(data).decode('utf-8'))
+    return TrackerReply(d.get('focal_length', 0.0), d.get('zoom', 0.0), d.get('gimbal_tracker_status', 0),
+                        d.get('image_tracker_reset', 0), 0, 0, 0)
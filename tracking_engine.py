@@ -0,0 +1,943 @@
+"""
+Qt-free tracking engine: tracker ingestion, heading filtering, PI control, target kinematics,
+interface service and logging, run at a fixed rate on its own thread.
+
+The GUI (gui.py) pushes settings and operator inputs into the engine and subscribes to its
+snapshots for display. The engine can also run from a script without a display:
+
+    python tracking_engine.py --ip 192.168.144.25 --tracker-port 8888 --interface 127.0.0.1:8889 --track
+
+More interface subscribers (see interface_publisher.py) are given as IP:PORT[,RATE_HZ[,ENCODING]], e.g.
+--interface 127.0.0.1:8889 --interface 10.0.0.2:9000,5,binary, or with "interface_subscribers" in the config.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+from interface_publisher import JSON, Deadband, InterfacePublisher, Subscriber, ServiceMessage
+from siyi_linkstats import LatencyHistogram
+from siyi_telemetry import AttitudeEvent
+from telemetry_log import TelemetryReader, TelemetryWriter
+from tracker_protocol import decode_sample, encode_reply, is_binary
+
+# Settings entered in the GUI, in log column order. None means the entered text is not a valid number
+TrackingParams = namedtuple('TrackingParams',
+    'kp_yaw ki_yaw kp_pitch ki_pitch pixel_filter_alpha pi_speed_limit gimbal_filter_alpha max_jump_distance '
+    'smoothing_alpha smoothing_beta gimbal_lat gimbal_lon gimbal_alt north_offset home_lat home_lon home_alt '
+    'min_speed max_speed',
+    defaults=(0.8, 0.01, 0.8, 0.01, 0.3, 100, 0.2, 50.0, 0.4, 0.2, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 5, 100))
+INT_PARAMS = frozenset(('pi_speed_limit', 'min_speed', 'max_speed'))
+# gui_config.json key of each parameter
+CONFIG_KEYS = {name: name for name in TrackingParams._fields}
+CONFIG_KEYS['pixel_filter_alpha'] = 'filter_alpha'
+# CSV log column of each parameter
+LOG_COLUMNS = {name: name for name in TrackingParams._fields}
+LOG_COLUMNS.update({name: name + '_input' for name in ('gimbal_lat', 'gimbal_lon', 'gimbal_alt', 'home_lat', 'home_lon',
+                                                       'home_alt', 'min_speed', 'max_speed')})
+LOG_COLUMNS['north_offset'] = 'north_offset_input'
+
+# State published after every tick
+EngineSnapshot = namedtuple('EngineSnapshot',
+    't raw_yaw raw_pitch raw_roll heading pitch roll zoom focal_length record_state motion_mode mount_dir hdr_sta '
+    'tracker_status tracker_dx tracker_dy tracker_dz tracking_enabled is_tracking target_valid target_lat target_lon '
+    'target_alt target_heading target_velocity yaw_error pitch_error yaw_integrator pitch_integrator gimbal_speed '
+    'image_tracker_reset deadline_misses tracker_seq tracker_age_ms')
+
+# Binary telemetry log record, one per tick: monotonic time [ns] and the measured and computed values of the
+# snapshot. The parameters are logged as change events (their entered text), see TrackingEngine.start_logging
+TELEMETRY_FIELDS = ('t_ns raw_yaw raw_pitch raw_roll heading pitch zoom focal_length record_state motion_mode mount_dir hdr_sta '
+                    'tracker_status tracker_dx tracker_dy tracker_dz tracking_enabled target_lat target_lon target_alt '
+                    'target_velocity target_heading yaw_error pitch_error yaw_integrator pitch_integrator').split()
+TELEMETRY_RECORD = struct.Struct('<Q7f5h2if?ddf6f')
+# Gimbal attitude log record, one per attitude message of the SDK (AttitudeEvent) at its arrival rate
+ATTITUDE_FIELDS = ('t_ns', 'yaw', 'pitch', 'roll', 'yaw_speed', 'pitch_speed', 'roll_speed')
+ATTITUDE_RECORD = struct.Struct('<Q6f')
+# gimbal_log_*.csv header, see Log_ReadMe.md
+LOG_HEADER = [
+    "time", "raw_yaw", "raw_pitch", "raw_roll", "filtered_heading", "filtered_pitch", "zoom_level",
+    "focal_length", "record_state", "motion_mode", "mount_dir", "hdr_state", "tracker_status",
+    "tracker_dx", "tracker_dy", "tracker_dz", "is_gui_tracking_enabled", "target_latitude",
+    "target_longitude", "target_altitude", "target_velocity", "target_heading", "yaw_pi_error",
+    "pitch_pi_error", "yaw_pi_integrator", "pitch_pi_integrator",
+] + [LOG_COLUMNS[name] for name in TrackingParams._fields]
+
+LOOP_RATES = (50, 100, 200)   # control loop rates offered by the GUI [Hz]
+SKIP = 'skip'; CATCH_UP = 'catchup'
+
+def parseParam(name, text):
+    """
+    Returns
+    --
+    Value of parameter `name` entered as `text`, None if it is not a valid number
+    """
+    try: return int(text) if name in INT_PARAMS else float(text)
+    except (ValueError, TypeError): return None
+
+def calculate_focal_length(zoom_level, curve_factor=1.0):
+    MIN_FOCAL_LENGTH = 4.5; MAX_FOCAL_LENGTH = 148.4; MAX_OPTICAL_ZOOM = 30.0; DIGITAL_ZOOM_DAMPENING_FACTOR = 0.5
+    if zoom_level > MAX_OPTICAL_ZOOM:
+        dampened_ratio = math.pow(zoom_level / MAX_OPTICAL_ZOOM, DIGITAL_ZOOM_DAMPENING_FACTOR)
+        return MAX_FOCAL_LENGTH * dampened_ratio
+    if zoom_level <= 1.0: return MIN_FOCAL_LENGTH
+    log_zoom_ratio = math.log(zoom_level) / math.log(MAX_OPTICAL_ZOOM)
+    curved_ratio = math.pow(log_zoom_ratio, curve_factor)
+    focal_length = MIN_FOCAL_LENGTH * math.pow(MAX_FOCAL_LENGTH / MIN_FOCAL_LENGTH, curved_ratio)
+    return focal_length
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    R = 6371000; lat1_rad, lon1_rad = math.radians(lat1), math.radians(lon1); lat2_rad, lon2_rad = math.radians(lat2), math.radians(lon2)
+    dlat, dlon = lat2_rad - lat1_rad, lon2_rad - lon1_rad
+    a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)); return R * c
+
+def calculate_bearing(lat1, lon1, lat2, lon2):
+    lat1_rad, lon1_rad = math.radians(lat1), math.radians(lon1); lat2_rad, lon2_rad = math.radians(lat2), math.radians(lon2)
+    dlon = lon2_rad - lon1_rad
+    y = math.sin(dlon) * math.cos(lat2_rad); x = math.cos(lat1_rad) * math.sin(lat2_rad) - math.sin(lat1_rad) * math.cos(lat2_rad) * math.cos(dlon)
+    bearing_rad = math.atan2(y, x); return (math.degrees(bearing_rad) + 360) % 360
+
+def calculate_target_coordinates(gimbal_lat, gimbal_lon, gimbal_alt, heading, pitch, distance):
+    if distance <= 0: return gimbal_lat, gimbal_lon, gimbal_alt
+    EARTH_RADIUS=6378137.0; heading_rad,pitch_rad,gimbal_lat_rad=math.radians(heading),math.radians(pitch),math.radians(gimbal_lat)
+    horizontal_distance,delta_up = distance*math.cos(pitch_rad),distance*math.sin(pitch_rad)
+    delta_north,delta_east = horizontal_distance*math.cos(heading_rad),horizontal_distance*math.sin(heading_rad)
+    delta_lat=math.degrees(delta_north/EARTH_RADIUS); delta_lon=math.degrees(delta_east/(EARTH_RADIUS*math.cos(gimbal_lat_rad)))
+    return gimbal_lat + delta_lat, gimbal_lon + delta_lon, gimbal_alt + delta_up
+
+class LoopStats:
+    """
+    Timing of the fixed-rate engine loop. Tick i is released at its deadline on the period grid and must
+    finish before the next release: a tick finishing later is a deadline miss, a tick whose own work takes
+    longer than a period is an overrun, a tick that raised is a failure. Written by the loop thread, snapshot() can be called from any thread.
+    """
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.ticks = 0; self.overruns = 0; self.deadline_misses = 0; self.skipped = 0; self.resyncs = 0; self.failures = 0
+        self.period_error = LatencyHistogram()   # |start-to-start interval - period| [ms]
+        self.lateness = LatencyHistogram()       # start - release [ms]
+        self.tick_time = LatencyHistogram()      # work per tick [ms]
+        self._last_start = None
+
+    def resync(self): self._last_start = None
+
+    def tick(self, release_ns, start_ns, end_ns, period_ns):
+        self.ticks += 1
+        self.lateness.add((start_ns - release_ns) / 1e6)
+        if self._last_start is not None: self.period_error.add(abs(start_ns - self._last_start - period_ns) / 1e6)
+        self._last_start = start_ns
+        self.tick_time.add((end_ns - start_ns) / 1e6)
+        if end_ns - start_ns > period_ns: self.overruns += 1
+        if end_ns > release_ns + period_ns: self.deadline_misses += 1
+
+    def snapshot(self):
+        """
+        Returns
+        --
+        [dict] ticks, overruns, deadline_misses, skipped (periods dropped by the skip policy), resyncs (catch-up
+        backlogs dropped), failures (ticks that raised), period_error_ms, lateness_ms, tick_time_ms
+        """
+        return {"ticks": self.ticks, "overruns": self.overruns, "deadline_misses": self.deadline_misses, "failures": self.failures,
+                "skipped": self.skipped, "resyncs": self.resyncs, "period_error_ms": self.period_error.snapshot(),
+                "lateness_ms": self.lateness.snapshot(), "tick_time_ms": self.tick_time.snapshot()}
+
+class TrackerMailbox:
+    """
+    Latest-value mailbox between the tracker receive thread and the engine. A new sample replaces an unread
+    one (counted as dropped), so the controller always acts on the newest dx/dy however fast the tracker sends.
+    Filters that need every sample can read the bounded history, samples are numbered to tell which are new.
+
+    Params
+    --
+    - history [int] Number of recent samples kept, 0 keeps none
+    """
+    def __init__(self, history=0):
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history) if history else None
+        self.seq = 0
+        self.clear()
+
+    def clear(self):
+        """
+        Forgets the samples and counters, the sequence numbers keep increasing
+        """
+        with self._lock:
+            self._latest = None; self._unread = False
+            if self._history is not None: self._history.clear()
+            self.received = 0; self.dropped = 0; self.stale = 0
+            self.age = LatencyHistogram()
+
+    def post(self, sample, t=None):
+        """
+        Stores `sample` received at monotonic time `t`
+
+        Returns
+        --
+        [int] Sequence number of the sample
+        """
+        t = time.monotonic() if t is None else t
+        with self._lock:
+            self.seq += 1; self.received += 1
+            if self._unread: self.dropped += 1
+            self._latest = (self.seq, t, sample); self._unread = True
+            if self._history is not None: self._history.append(self._latest)
+            return self.seq
+
+    def take(self, now=None):
+        """
+        Called once per tick: records the age of the newest sample and counts the tick as stale if no sample
+        arrived since the previous call
+
+        Returns
+        --
+        (seq, t, sample) if a sample arrived since the previous call, None otherwise
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            latest = self._latest
+            if latest is None: return None
+            self.age.add((now - latest[1]) * 1e3)
+            if not self._unread: self.stale += 1; return None
+            self._unread = False
+            return latest
+
+    def latest(self):
+        """
+        Returns
+        --
+        (seq, t, sample) of the newest sample, read or not, or None
+        """
+        return self._latest
+
+    def history(self, after_seq=0):
+        """
+        Returns
+        --
+        [list] (seq, t, sample) of the kept samples numbered after `after_seq`, oldest first
+        """
+        if self._history is None: return []
+        with self._lock: return [entry for entry in self._history if entry[0] > after_seq]
+
+    def stats(self):
+        return {"seq": self.seq, "received": self.received, "dropped": self.dropped, "stale_ticks": self.stale,
+                "age_ms": self.age.snapshot()}
+
+class TrackingEngine:
+    """
+    Gimbal control pipeline, ticked at `rate_hz` on its own thread while a connected camera is attached.
+    Public methods may be called from any thread, they take the engine lock that a tick holds.
+
+    Params
+    --
+    - cam [SIYISDK] Camera, can be attached later with set_camera()
+    - config [dict] gui_config.json style settings, see CONFIG_KEYS
+    - rate_hz [float] Control loop rate
+    - tracker_history [int] Tracker samples kept in the mailbox history, see TrackerMailbox
+    - policy [str] When ticks fall behind the period grid: SKIP drops all missed periods but the latest one and
+      runs it at once, later ticks stay on the grid. CATCH_UP runs the missed periods back to back (at most
+      MAX_CATCH_UP, then it skips like SKIP and counts a resync)
+    """
+    MEDIAN_FILTER_WINDOW_SIZE = 30
+    TRACKER_TIMEOUT = 2.0
+    SERVICE_RATE_HZ = 50.0 / 3   # default rate of an interface subscriber
+    LOG_RATE_HZ = 10.0           # CSV rows of a converted log
+    TRACKER_REPLY_RATE_HZ = 50.0 # replies to the tracker client, independent of rate_hz
+    MAX_CATCH_UP = 5
+
+    def __init__(self, cam=None, config=None, rate_hz=50.0, policy=SKIP, tracker_history=0):
+        self.cam = cam; self.policy = policy
+        self.loop_stats = LoopStats()
+        self._lock = threading.RLock()
+        self.set_rate(rate_hz)
+        self._thread = None; self._stop_event = threading.Event()
+        self._subscribers = ()
+        self.params = TrackingParams(); self.param_text = {name: str(value) for name, value in self.params._asdict().items()}
+        self.snapshot = None
+
+        self.tracker_socket=None; self.tracker_client_addr=None
+        self.tracker_handler_thread=None; self.tracker_thread_stop_flag=threading.Event()
+        self.interface=InterfacePublisher(); self.interface_subscriber=None
+        self.tracker_dx=0; self.tracker_dy=0; self.tracker_dz=0.0; self.tracker_status=0; self.tracking_enabled=False; self.is_manual_control=False
+        self.yaw_integral_error=0.0; self.pitch_integral_error=0.0; self.yaw_error = 0.0; self.pitch_error = 0.0
+        self.last_control_time=time.monotonic(); self.target_lat=0.0; self.target_lon=0.0; self.target_alt=0.0; self.target_valid=True
+        self.tracker_mailbox=TrackerMailbox(tracker_history); self.last_tracker_data_time = 0; self.tracker_seq = 0; self.tracker_age_ms = 0.0
+        self.tracker_frame = (0, 0, 0.0); self.tracker_binary = False; self._tracker_reply_next = 0.0
+        self.image_tracker_reset_flag = 0
+        self.gimbal_speed = 50; self.joystick_values = {}; self._joystick = None
+        self.loop_counter = 0
+
+        self.filtered_dx = 0.0; self.filtered_dy = 0.0
+        self.filtered_heading = 0.0; self.filtered_pitch = 0.0
+
+        self.prev_target_lat = 0.0; self.prev_target_lon = 0.0; self.prev_target_alt = 0.0
+        self.last_target_update_time = time.monotonic()
+        self.current_target_heading = 0.0; self.current_target_velocity = 0.0
+        self.velocity_buffer = []; self.heading_buffer = []
+
+        # Veri Kaydı (Loglama) Durumları
+        self.telemetry_log = None; self.attitude_log = None; self._attitude_subscription = None
+
+        # Yumuşatma Filtresi Değişkenleri
+        self.filter_initialized = False
+        self.smoothed_lat = 0.0; self.lat_trend = 0.0
+        self.smoothed_lon = 0.0; self.lon_trend = 0.0
+        self.smoothed_alt = 0.0; self.alt_trend = 0.0
+        if config: self.load_config(config); self.load_interface_subscribers(config.get("interface_subscribers", ()))
+
+    # --- Settings & Inputs ---
+    def load_config(self, config):
+        for name, key in CONFIG_KEYS.items():
+            if key in config: self.set_param(name, config[key])
+
+    def set_param(self, name, text):
+        """
+        Sets parameter `name` from the text entered by the operator, an invalid number is kept as None
+        """
+        with self._lock:
+            text = str(text)
+            if text == self.param_text.get(name): return
+            self.param_text[name] = text
+            self.params = self.params._replace(**{name: parseParam(name, text)})
+            if self.telemetry_log: self.telemetry_log.event(name, text)
+
+    def set_rate(self, rate_hz):
+        """
+        Sets the control loop rate [Hz], applied from the next tick. The interface rates do not change, the
+        telemetry log records every tick
+        """
+        with self._lock: self.rate_hz = float(rate_hz)
+
+    def set_camera(self, cam):
+        with self._lock: self.cam = cam
+
+    def set_gimbal_speed(self, speed):
+        with self._lock: self.gimbal_speed = speed
+
+    def set_manual_control(self, manual):
+        with self._lock: self.is_manual_control = manual
+
+    def set_joystick_config(self, config):
+        """
+        Enables joystick control with the axes of `config` (joystick_config.json), None disables it
+        """
+        def axis(key):
+            value = config.get(key)
+            return int(value.split(" ")[-1]) if isinstance(value, str) and value.startswith("Eksen ") else -1
+        with self._lock:
+            self._joystick = None if config is None else (axis("SPEED_AXIS"), axis("YAW_AXIS"), axis("PITCH_AXIS"),
+                bool(config.get("REVERSE_SPEED")), bool(config.get("REVERSE_YAW")), bool(config.get("REVERSE_PITCH")))
+
+    def set_joystick_axis(self, axis, value): self.joystick_values[axis] = value
+
+    def toggle_image_tracker_reset(self):
+        """
+        Returns
+        --
+        [int] New image tracker reset flag sent to the tracker
+        """
+        with self._lock:
+            self.image_tracker_reset_flag = 1 - self.image_tracker_reset_flag
+            return self.image_tracker_reset_flag
+
+    def subscribe(self, callback):
+        """
+        Calls callback(EngineSnapshot) from the engine thread after every tick, it must return quickly
+        """
+        with self._lock: self._subscribers = self._subscribers + (callback,)
+
+    def unsubscribe(self, callback):
+        with self._lock: self._subscribers = tuple(c for c in self._subscribers if c is not callback)
+
+    # --- Loop ---
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True); self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread(): self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        stats = self.loop_stats; rate = None
+        while not self._stop_event.is_set():
+            if self.rate_hz != rate:
+                rate = self.rate_hz; period_ns = int(1e9 / rate); release = time.monotonic_ns(); stats.resync()
+            start = time.monotonic_ns()
+            try: self.tick()
+            except Exception as e: stats.failures += 1; self._on_tick_failure(e, stats.failures)
+            end = time.monotonic_ns()
+            stats.tick(release, start, end, period_ns)
+            release += period_ns
+            if end >= release:
+                # Behind the grid: `due` releases have passed, the tick runs now without waiting
+                due = (end - release) // period_ns + 1
+                if self.policy == SKIP or due > self.MAX_CATCH_UP:
+                    release += (due - 1) * period_ns; stats.skipped += due - 1
+                    if self.policy != SKIP: stats.resyncs += 1
+                continue
+            self._stop_event.wait((release - end) / 1e9)
+
+    def _on_tick_failure(self, error, failures):
+        # The loop keeps running, but the gimbal must not keep the last commanded speed
+        if failures == 1 or failures % 100 == 0: print(f"Kontrol döngüsü hatası ({failures}): {error!r}")
+        cam = self.cam
+        try:
+            if cam and cam.isConnected(): cam.setGimbalSpeed(0, 0)
+        except Exception: pass
+
+    def get_loop_stats(self):
+        """
+        Returns
+        --
+        [dict] rate_hz, policy and the LoopStats counters and histograms
+        """
+        return dict(rate_hz=self.rate_hz, policy=self.policy, **self.loop_stats.snapshot())
+
+    def get_tracker_stats(self):
+        """
+        Returns
+        --
+        [dict] seq, received, dropped (replaced before a tick read them), stale_ticks (ticks without a new
+        sample), age_ms (age of the sample in use at each tick)
+        """
+        return self.tracker_mailbox.stats()
+
+    def tick(self):
+        """
+        Runs the control pipeline once and publishes the snapshot
+        """
+        cam = self.cam
+        if not(cam and cam.isConnected()): return
+        with self._lock:
+            if self.tracker_socket and self.tracker_client_addr and self.last_tracker_data_time != 0 and (time.monotonic() - self.last_tracker_data_time > self.TRACKER_TIMEOUT):
+                print("Tracker data timeout!"); self.reset_tracker_state()
+            self.loop_counter+=1
+            raw_yaw,raw_pitch,raw_roll,zoom,info=self._get_data_from_sources()
+            heading,pitch,roll=self._process_and_calculate_values(raw_yaw,raw_pitch,raw_roll)
+            focal_length = calculate_focal_length(zoom,curve_factor=1.25)
+            self._send_focal_length_response(focal_length, zoom, 1 if self.tracking_enabled else 0)
+            is_tracking=self.tracking_enabled and self.tracker_status==1
+            self._execute_control_logic(is_tracking)
+            self._update_target_kinematics(is_tracking)
+            self._update_target(heading, pitch, is_tracking)
+            if self.interface.due(): self._send_service_data(heading,is_tracking)
+            snapshot = self.snapshot = EngineSnapshot(time.monotonic(), raw_yaw, raw_pitch, raw_roll, heading, pitch, roll, zoom, focal_length,
+                info.record_state, info.motion_mode, info.mount_dir, info.hdr_sta, self.tracker_status, self.tracker_dx,
+                self.tracker_dy, self.tracker_dz, self.tracking_enabled, is_tracking, self.target_valid, self.target_lat,
+                self.target_lon, self.target_alt, self.current_target_heading, self.current_target_velocity, self.yaw_error,
+                self.pitch_error, self.yaw_integral_error, self.pitch_integral_error, self.gimbal_speed, self.image_tracker_reset_flag,
+                self.loop_stats.deadline_misses, self.tracker_seq, self.tracker_age_ms)
+            if self.telemetry_log: self._write_log_entry(snapshot)
+            subscribers = self._subscribers
+        for callback in subscribers:
+            try: callback(snapshot)
+            except Exception as e: print(f"Snapshot aboneliği hatası: {e}")
+
+    # --- Core Logic ---
+    def _get_data_from_sources(self):
+        now = time.monotonic()
+        sample = self.tracker_mailbox.take(now)
+        if sample is not None:
+            self.tracker_seq, t, tracker_data = sample
+            self.tracker_frame = (tracker_data.frame_id, tracker_data.capture_ns, t)
+            raw_dx = tracker_data.dx; raw_dy = tracker_data.dy
+            alpha = self.params.pixel_filter_alpha
+            alpha = 0.3 if alpha is None else max(0.0, min(1.0, alpha))
+            self.filtered_dx = (alpha * raw_dx) + (1 - alpha) * self.filtered_dx
+            self.filtered_dy = (alpha * raw_dy) + (1 - alpha) * self.filtered_dy
+            self.tracker_dx = int(self.filtered_dx); self.tracker_dy = int(self.filtered_dy)
+            raw_dz  = tracker_data.dz
+            self.tracker_dz = (alpha * raw_dz) + (1 - alpha) * self.tracker_dz
+            self.tracker_status = tracker_data.tracker_status
+            self.last_tracker_data_time = t
+        latest = self.tracker_mailbox.latest()
+        self.tracker_age_ms = (now - latest[1]) * 1e3 if latest else 0.0
+        raw_yaw, raw_pitch, raw_roll = self.cam.getAttitude()
+        zoom = self.cam.getCurrentZoomLevel(); info = self.cam.getGimbalInfo()
+        return raw_yaw, raw_pitch, raw_roll, zoom, info
+
+    def _process_and_calculate_values(self,raw_yaw,raw_pitch,raw_roll):
+        normalized_pitch=(raw_pitch+360)%360; raw_pitch_processed=180.0-normalized_pitch; raw_pitch_processed=max(-90.0,min(90.0,raw_pitch_processed)); roll=-raw_roll
+        true_north_offset = self.params.north_offset or 0.0
+        raw_heading=(raw_yaw+true_north_offset)%360
+        alpha = self.params.gimbal_filter_alpha
+        alpha = 0.2 if alpha is None else max(0.0, min(1.0, alpha))
+        if self.filtered_heading == 0.0 and self.filtered_pitch == 0.0:
+            self.filtered_heading, self.filtered_pitch = raw_heading, raw_pitch_processed
+        diff = (raw_heading - self.filtered_heading + 180) % 360 - 180
+        self.filtered_heading = (self.filtered_heading + alpha * diff + 360) % 360
+        self.filtered_pitch = (alpha * raw_pitch_processed) + (1 - alpha) * self.filtered_pitch
+        return self.filtered_heading,self.filtered_pitch,roll
+
+    def _execute_control_logic(self, is_tracking):
+        if self.is_manual_control: return
+        if not self.tracking_enabled:
+            if self._joystick is None: return
+            min_speed, max_speed = self.params.min_speed, self.params.max_speed
+            if min_speed is None or max_speed is None: min_speed, max_speed = 1, 100
+            speed_range = max_speed - min_speed
+            speed_axis_index, yaw_axis_index, pitch_axis_index, reverse_speed, reverse_yaw, reverse_pitch = self._joystick
+            speed_axis_val=self.joystick_values.get(speed_axis_index,-1.0);joystick_yaw_val=self.joystick_values.get(yaw_axis_index,0.0);joystick_pitch_val=self.joystick_values.get(pitch_axis_index,0.0)
+            if reverse_speed: speed_axis_val *= -1
+            if speed_axis_val > -0.99:
+                new_speed = int(min_speed + speed_range * ((speed_axis_val + 1.0) / 2.0))
+                if abs(new_speed - self.gimbal_speed) > 1: self.gimbal_speed = new_speed
+            if reverse_yaw: joystick_yaw_val *= -1
+            if reverse_pitch: joystick_pitch_val *= -1
+            if abs(joystick_yaw_val) > 0 or abs(joystick_pitch_val) > 0:
+                self.cam.setGimbalSpeed(int(self.gimbal_speed*joystick_yaw_val),int(-self.gimbal_speed*joystick_pitch_val)); return
+        self._run_pi_controller(is_tracking)
+
+    def _run_pi_controller(self, is_tracking):
+        if not is_tracking:
+            if self.cam and self.cam.isConnected(): self.cam.setGimbalSpeed(0, 0)
+            return
+        current_time=time.monotonic(); dt=current_time - self.last_control_time
+        if dt <= 0.001: return
+        self.last_control_time = current_time
+        p = self.params
+        if None in (p.kp_yaw, p.ki_yaw, p.kp_pitch, p.ki_pitch, p.pi_speed_limit): return
+        kp_yaw,ki_yaw,kp_pitch,ki_pitch = p.kp_yaw,p.ki_yaw,p.kp_pitch,p.ki_pitch
+        speed_limit = max(1, min(100, p.pi_speed_limit))
+        self.yaw_error,self.pitch_error = self.tracker_dx,self.tracker_dy
+        self.yaw_integral_error = max(-50,min(50,self.yaw_integral_error + self.yaw_error * dt))
+        yaw_speed = (kp_yaw * self.yaw_error) + (ki_yaw * self.yaw_integral_error)
+        self.pitch_integral_error = max(-50,min(50,self.pitch_integral_error + self.pitch_error * dt))
+        pitch_speed = (kp_pitch * self.pitch_error) + (ki_pitch * self.pitch_integral_error)
+        final_yaw_speed=int(max(-speed_limit,min(speed_limit,yaw_speed))); final_pitch_speed=int(max(-speed_limit,min(speed_limit,pitch_speed)))
+        self.cam.setGimbalSpeed(final_yaw_speed, final_pitch_speed)
+
+    def _apply_median_filter(self, new_value, buffer):
+        buffer.append(new_value)
+        if len(buffer) > self.MEDIAN_FILTER_WINDOW_SIZE: buffer.pop(0)
+        if not buffer: return 0.0
+        sorted_buffer, mid = sorted(buffer), len(buffer) // 2
+        return (sorted_buffer[mid - 1] + sorted_buffer[mid]) / 2 if len(sorted_buffer) % 2 == 0 else sorted_buffer[mid]
+
+    def _apply_angular_median_filter(self, new_value, buffer):
+        buffer.append(new_value)
+        if len(buffer) > self.MEDIAN_FILTER_WINDOW_SIZE: buffer.pop(0)
+        if not buffer: return 0.0
+        sorted_buffer = sorted(buffer)
+        if len(sorted_buffer) > 2 and (sorted_buffer[-1] - sorted_buffer[0]) > 180.0:
+            shifted_buffer = sorted([val + 360 if val < 180 else val for val in sorted_buffer])
+        else: shifted_buffer = sorted_buffer
+        mid = len(shifted_buffer) // 2
+        median = (shifted_buffer[mid - 1] + shifted_buffer[mid]) / 2.0 if len(shifted_buffer) % 2 == 0 else shifted_buffer[mid]
+        return median % 360.0
+
+    def _update_target_kinematics(self, is_tracking):
+        if is_tracking and self.target_lat != 0.0 and self.prev_target_lat != 0.0:
+            current_time = time.monotonic(); dt = current_time - self.last_target_update_time
+            if dt > 0.01:
+                horizontal_dist = haversine_distance(self.prev_target_lat, self.prev_target_lon, self.target_lat, self.target_lon)
+                raw_velocity = math.sqrt(horizontal_dist**2 + (self.target_alt-self.prev_target_alt)**2) / dt
+                self.current_target_velocity = self._apply_median_filter(raw_velocity, self.velocity_buffer)
+                raw_heading = calculate_bearing(self.prev_target_lat, self.prev_target_lon, self.target_lat, self.target_lon)
+                self.current_target_heading = self._apply_angular_median_filter(raw_heading, self.heading_buffer)
+            self.prev_target_lat,self.prev_target_lon,self.prev_target_alt=self.target_lat,self.target_lon,self.target_alt
+            self.last_target_update_time = current_time
+        elif is_tracking and self.target_lat != 0.0 and self.prev_target_lat == 0.0:
+            self.prev_target_lat,self.prev_target_lon,self.prev_target_alt = self.target_lat,self.target_lon,self.target_alt
+            self.last_target_update_time = time.monotonic()
+            self.current_target_velocity, self.current_target_heading = 0.0, 0.0
+            self.velocity_buffer.clear(); self.heading_buffer.clear()
+        elif not is_tracking:
+            self.prev_target_lat,self.prev_target_lon,self.prev_target_alt=0.0,0.0,0.0
+            self.current_target_heading, self.current_target_velocity = 0.0, 0.0
+            self.velocity_buffer.clear(); self.heading_buffer.clear()
+
+    def _update_target(self, heading, pitch, is_tracking):
+        if not is_tracking: self.reset_target_info(); return
+        p = self.params
+        # Gerekli verileri al
+        if None in (p.gimbal_lat, p.gimbal_lon, p.gimbal_alt, p.smoothing_alpha, p.smoothing_beta):
+            self.target_valid = False; return
+        self.target_valid = True
+
+        # Ham hedef koordinatlarını hesapla
+        raw_target_lat, raw_target_lon, raw_target_alt = calculate_target_coordinates(p.gimbal_lat,p.gimbal_lon,p.gimbal_alt,heading,pitch,self.tracker_dz)
+
+        if not self.filter_initialized:
+            self._initialize_smoothing(raw_target_lat, raw_target_lon, raw_target_alt)
+            self.filter_initialized = True
+        else:
+            self._apply_smoothing(raw_target_lat, raw_target_lon, raw_target_alt, p.smoothing_alpha, p.smoothing_beta)
+
+        # Nihai yumuşatılmış hedefi `self.target_*` değişkenlerine ata
+        self.target_lat, self.target_lon, self.target_alt = self.smoothed_lat, self.smoothed_lon, self.smoothed_alt
+
+    def _initialize_smoothing(self, lat, lon, alt):
+        """Çift Üstel Düzeltme filtresini ilk geçerli veriyle başlatır."""
+        self.smoothed_lat = lat
+        self.smoothed_lon = lon
+        self.smoothed_alt = alt
+        # Trend (hız) başlangıçta sıfırdır.
+        self.lat_trend = 0.0
+        self.lon_trend = 0.0
+        self.alt_trend = 0.0
+
+    def _apply_smoothing(self, raw_lat, raw_lon, raw_alt, alpha, beta):
+        """Verilen ham koordinatlara Holt's Method'u uygular ve sınıf değişkenlerini günceller."""
+
+        # Enlem için hesaplama
+        last_smoothed_lat = self.smoothed_lat
+        self.smoothed_lat = alpha * raw_lat + (1 - alpha) * (last_smoothed_lat + self.lat_trend)
+        self.lat_trend = beta * (self.smoothed_lat - last_smoothed_lat) + (1 - beta) * self.lat_trend
+
+        # Boylam için hesaplama
+        last_smoothed_lon = self.smoothed_lon
+        self.smoothed_lon = alpha * raw_lon + (1 - alpha) * (last_smoothed_lon + self.lon_trend)
+        self.lon_trend = beta * (self.smoothed_lon - last_smoothed_lon) + (1 - beta) * self.lon_trend
+
+        # İrtifa için hesaplama
+        last_smoothed_alt = self.smoothed_alt
+        self.smoothed_alt = alpha * raw_alt + (1 - alpha) * (last_smoothed_alt + self.alt_trend)
+        self.alt_trend = beta * (self.smoothed_alt - last_smoothed_alt) + (1 - beta) * self.alt_trend
+
+    def reset_target_info(self):
+        """Hedef bilgilerini ve filtre durumlarını sıfırlar."""
+        self.target_lat, self.target_lon, self.target_alt = 0.0, 0.0, 0.0; self.target_valid = True
+        self.filter_initialized = False
+        self.smoothed_lat, self.lat_trend = 0.0, 0.0
+        self.smoothed_lon, self.lon_trend = 0.0, 0.0
+        self.smoothed_alt, self.alt_trend = 0.0, 0.0
+
+    # --- Tracking ---
+    def start_tracking(self):
+        with self._lock:
+            self.tracking_enabled = True; self.is_manual_control = False
+            self.yaw_integral_error, self.pitch_integral_error = 0.0, 0.0
+            self.last_control_time = time.monotonic()
+            if self.cam and self.cam.isConnected(): self.cam.setGimbalSpeed(0, 0)
+
+    def stop_tracking(self):
+        with self._lock:
+            self.tracking_enabled = False
+            self.yaw_error, self.pitch_error = 0.0, 0.0
+            self.yaw_integral_error, self.pitch_integral_error = 0.0, 0.0
+            if self.cam and self.cam.isConnected(): self.cam.setGimbalSpeed(0, 0)
+
+    def reset_tracker_state(self):
+        with self._lock:
+            self.tracker_status=0;self.tracker_dx=0;self.tracker_dy=0;self.tracker_dz=0.0
+            self.tracker_client_addr = None; self.last_tracker_data_time = 0
+            if self.tracking_enabled: self.stop_tracking()
+            self.tracker_mailbox.clear(); self.tracker_age_ms = 0.0; self.tracker_frame = (0, 0, 0.0); self.tracker_binary = False
+
+            self.reset_target_info() # Filtreleri temizler
+
+            self.filtered_heading, self.filtered_pitch = 0.0, 0.0
+            self.prev_target_lat, self.prev_target_lon, self.prev_target_alt = 0.0, 0.0, 0.0
+            self.last_target_update_time = time.monotonic()
+            self.current_target_heading, self.current_target_velocity = 0.0, 0.0
+            self.velocity_buffer.clear(); self.heading_buffer.clear()
+
+    # --- Service & Communication Methods ---
+    def start_tracker_service(self, listen_ip, port):
+        """
+        Listens for image tracker datagrams on listen_ip:port
+
+        Returns
+        --
+        [bool] True if the service started
+        """
+        with self._lock:
+            if self.tracker_socket: return True
+            try:
+                self.tracker_socket=socket.socket(socket.AF_INET, socket.SOCK_DGRAM); self.tracker_socket.bind((listen_ip, port))
+                self.tracker_thread_stop_flag.clear(); self.tracker_handler_thread=threading.Thread(target=self.receive_tracker_data_loop,daemon=True); self.tracker_handler_thread.start()
+                print(f"UDP Tracker servisi {listen_ip}:{port} üzerinde başlatıldı."); return True
+            except Exception as e:
+                print(f"UDP Tracker servisi başlatılamadı: {e}")
+                if self.tracker_socket: self.tracker_socket.close(); self.tracker_socket=None
+                return False
+
+    def stop_tracker_service(self):
+        with self._lock:
+            if self.tracker_socket is None: return
+            self.tracker_thread_stop_flag.set(); self.tracker_socket.close()
+            thread = self.tracker_handler_thread
+        if thread and thread.is_alive(): thread.join(timeout=0.2)
+        with self._lock:
+            self.tracker_socket, self.tracker_handler_thread = None, None
+            self.reset_tracker_state(); print("UDP Tracker servisi durduruldu.")
+
+    def receive_tracker_data_loop(self):
+        buf = bytearray(1024); view = memoryview(buf)
+        while not self.tracker_thread_stop_flag.is_set():
+            try:
+                n, addr = self.tracker_socket.recvfrom_into(buf)
+                if not n: continue
+                data = view[:n]
+                if self.tracker_client_addr != addr:
+                    print(f"Görüntü işleme istemcisinden ilk veri alındı: {addr}")
+                    self.tracker_client_addr=addr; self.last_tracker_data_time=time.monotonic()
+                try:
+                    self.tracker_mailbox.post(decode_sample(data))
+                    self.tracker_binary = is_binary(data)   # cevap istemcinin son kullandığı formatta gönderilir
+                except ValueError as e: print(f"Hatalı tracker verisi: {e}. Alınan: {bytes(data)}")
+            except (socket.error, AttributeError):
+                if self.tracker_thread_stop_flag.is_set(): break
+                else: print(f"Tracker soket hatası."); break
+            except Exception as e: print(f"Tracker dinleme döngüsünde beklenmedik hata: {e}"); break
+        print("Tracker dinleme döngüsü durdu.")
+
+    def _send_focal_length_response(self, focal_length, zoom, gimbal_tracker_status):
+        if self.tracker_socket and self.tracker_client_addr:
+            now = time.monotonic(); period = 1.0 / self.TRACKER_REPLY_RATE_HZ
+            if now < self._tracker_reply_next: return
+            # Keep the reply schedule, or restart it after a pause
+            self._tracker_reply_next = self._tracker_reply_next + period if now - self._tracker_reply_next < period else now + period
+            try:
+                frame_id, capture_ns, t = self.tracker_frame
+                hold_us = int((now - t) * 1e6) if t else 0
+                response = encode_reply(focal_length, zoom, gimbal_tracker_status, self.image_tracker_reset_flag, frame_id, capture_ns, hold_us, self.tracker_binary)
+                self.tracker_socket.sendto(response, self.tracker_client_addr)
+            except (socket.error, Exception): pass
+
+    def start_interface_service(self, target_ip=None, target_port=None):
+        """
+        Starts sending the target and gimbal positions to the interface subscribers, target_ip:target_port
+        becomes the main subscriber (compact JSON at SERVICE_RATE_HZ)
+        """
+        with self._lock:
+            if target_ip is not None: self.set_interface_target(target_ip, target_port)
+            try: return self.interface.open()
+            except Exception as e: print(f"Arayüz servisi başlatılamadı: {e}"); return False
+
+    def set_interface_target(self, target_ip, target_port):
+        try: addr = (target_ip, int(target_port))
+        except (ValueError, TypeError): addr = None
+        with self._lock:
+            if self.interface_subscriber: self.interface.remove(self.interface_subscriber)
+            self.interface_subscriber = self.interface.add(Subscriber(addr, self.SERVICE_RATE_HZ)) if addr else None
+
+    def add_interface_subscriber(self, target_ip, target_port, rate_hz=None, encoding=JSON, deadband=None, keepalive=1.0):
+        """
+        Params
+        --
+        - rate_hz [float] Message rate, default SERVICE_RATE_HZ
+        - encoding [str] interface_publisher.JSON or BINARY
+        - deadband [Deadband or dict] Only send changes larger than this, None sends every period
+        - keepalive [float] With a dead-band, resend an unchanged message after this many seconds
+
+        Returns
+        --
+        [Subscriber] to pass to remove_interface_subscriber
+        """
+        if isinstance(deadband, dict): deadband = Deadband(**deadband)
+        return self.interface.add(Subscriber((target_ip, int(target_port)), rate_hz or self.SERVICE_RATE_HZ, encoding, deadband, keepalive))
+
+    def remove_interface_subscriber(self, subscriber): self.interface.remove(subscriber)
+
+    def load_interface_subscribers(self, subscribers):
+        """
+        Adds the subscribers of a config list, e.g.
+        [{"ip": "10.0.0.2", "port": 9000, "rate_hz": 5, "encoding": "binary", "deadband": {"position_m": 1.0}}]
+        """
+        for sub in subscribers:
+            try: self.add_interface_subscriber(sub["ip"], sub["port"], sub.get("rate_hz"), sub.get("encoding", JSON),
+                                               sub.get("deadband"), sub.get("keepalive", 1.0))
+            except (KeyError, TypeError, ValueError) as e: print(f"Hatalı arayüz abonesi {sub}: {e}")
+
+    def get_interface_stats(self): return self.interface.stats()
+
+    def stop_interface_service(self):
+        with self._lock: self.interface.close()
+
+    def _send_service_data(self,heading,is_tracking):
+        p = self.params
+        if None in (p.gimbal_lat, p.gimbal_lon, p.gimbal_alt): return
+        if is_tracking:
+            target = (round(self.target_lat,7), round(self.target_lon,7), round(self.target_alt,2) - 5, 1,
+                      round(self.current_target_heading,2), round(self.current_target_velocity,2))
+        else:
+            if None in (p.home_lat, p.home_lon, p.home_alt): target = (0.0, 0.0, 0.0, 0, 0.0, 0.0)
+            else: target = (p.home_lat, p.home_lon, p.home_alt, 0, 0.0, 0.0)
+        msg = ServiceMessage(*target, round(p.gimbal_lat,14), round(p.gimbal_lon,14), round(p.gimbal_alt,2), round(heading,0))
+        self.interface.publish(msg)
+
+    # --- Veri Kaydı (Loglama) Metodları ---
+    def start_logging(self, filename=None):
+        """
+        Starts the binary telemetry log: one record per tick of the measured and computed values, see
+        telemetry_log.py and convert_log(). The parameters are recorded as events now and on every change.
+        The gimbal attitude is also logged at the rate it arrives from the SDK, to attitude_log_path(filename)
+
+        Returns
+        --
+        [str] Log file name, None if it could not be created
+        """
+        with self._lock:
+            if self.telemetry_log: return self.telemetry_log.path
+            try:
+                if filename is None:
+                    timestamp=datetime.now().strftime("%Y%m%d_%H%M%S");filename=f"gimbal_log_{timestamp}.bin"
+                self.telemetry_log=TelemetryWriter(filename, TELEMETRY_RECORD, TELEMETRY_FIELDS);print(f"Veri kaydı başlatıldı: {filename}")
+                t_ns = time.monotonic_ns()
+                for name in TrackingParams._fields: self.telemetry_log.event(name, self.param_text[name], t_ns)
+                if self.cam and hasattr(self.cam, 'subscribe'):
+                    self.attitude_log = TelemetryWriter(attitude_log_path(filename), ATTITUDE_RECORD, ATTITUDE_FIELDS, events=False)
+                    self._attitude_subscription = self.cam.subscribe(self._write_attitude_entry, (AttitudeEvent,))
+                return filename
+            except Exception as e:
+                print(f"Veri kaydı başlatılamadı: {e}"); self.telemetry_log = None
+                return None
+
+    def stop_logging(self):
+        with self._lock:
+            log, self.telemetry_log = self.telemetry_log, None
+            attitude, self.attitude_log = self.attitude_log, None
+            subscription, self._attitude_subscription = self._attitude_subscription, None
+        if subscription: subscription.close()
+        if attitude:
+            attitude.close(); stats = attitude.stats()
+            print(f"Açı kaydı: {stats['records']} kayıt, {stats['dropped']} kayıp, {stats['invalid']} geçersiz ({attitude.path})")
+        if log:
+            log.close(); stats = log.stats()
+            print(f"Veri kaydı durduruldu: {stats['records']} kayıt, {stats['dropped']} kayıp, {stats['invalid']} geçersiz. "
+                  f"CSV için: python telemetry_log.py csv {log.path}")
+
+    def is_logging(self): return self.telemetry_log is not None
+
+    def get_log_stats(self):
+        """
+        Returns
+        --
+        [dict] TelemetryWriter stats of the tick log with the attitude log stats as "attitude", None if not logging
+        """
+        log, attitude = self.telemetry_log, self.attitude_log
+        if not log: return None
+        return dict(log.stats(), attitude=attitude.stats() if attitude else None)
+
+    def _write_attitude_entry(self, e):
+        # Receive thread of the SDK, the only producer of the attitude log
+        log = self.attitude_log
+        if log: log.write(int(e.t * 1e9), e.yaw, e.pitch, e.roll, e.yaw_speed, e.pitch_speed, e.roll_speed)
+
+    def _write_log_entry(self, s):
+        # Integer columns are converted here, e.g. a JSON tracker may send tracker_status 1.0
+        try:
+            ints = (int(s.record_state), int(s.motion_mode), int(s.mount_dir), int(s.hdr_sta), int(s.tracker_status),
+                    int(s.tracker_dx), int(s.tracker_dy))
+        except (TypeError, ValueError): self.telemetry_log.reject(s); return
+        self.telemetry_log.write(int(s.t * 1e9), s.raw_yaw, s.raw_pitch, s.raw_roll, s.heading, s.pitch, s.zoom, s.focal_length,
+            *ints, s.tracker_dz, s.tracking_enabled, s.target_lat, s.target_lon, s.target_alt, s.target_velocity, s.target_heading,
+            s.yaw_error, s.pitch_error, s.yaw_integrator, s.pitch_integrator)
+
+    def close(self):
+        """
+        Stops the loop and every service
+        """
+        self.stop(); self.stop_logging(); self.stop_tracker_service(); self.stop_interface_service()
+
+def attitude_log_path(path):
+    """
+    Returns
+    --
+    [str] Attitude log of telemetry log `path`, e.g. gimbal_log_X.attitude.bin
+    """
+    root, ext = os.path.splitext(path)
+    return root + '.attitude' + (ext or '.bin')
+
+def _log_row(time_text, s, settings):
+    row = [time_text,
+        # --- Sensör ve Hesaplanan Veriler ---
+        f"{s.raw_yaw:.2f}", f"{s.raw_pitch:.2f}", f"{s.raw_roll:.2f}", f"{s.heading:.2f}", f"{s.pitch:.2f}",
+        f"{s.zoom:.1f}", f"{s.focal_length:.1f}", s.record_state, s.motion_mode, s.mount_dir, s.hdr_sta,
+        s.tracker_status, s.tracker_dx, s.tracker_dy, f"{s.tracker_dz:.2f}", s.tracking_enabled,
+        f"{s.target_lat:.7f}", f"{s.target_lon:.7f}", f"{s.target_alt:.2f}", f"{s.target_velocity:.2f}",
+        f"{s.target_heading:.2f}", f"{s.yaw_error:.2f}", f"{s.pitch_error:.2f}", f"{s.yaw_integrator:.2f}",
+        f"{s.pitch_integrator:.2f}"]
+    # --- Arayüzden Girilen Değerler ---
+    return row + settings
+
+def convert_log(path, csv_path=None, rate_hz=TrackingEngine.LOG_RATE_HZ):
+    """
+    Writes a binary telemetry log as a gimbal_log_*.csv file (Log_ReadMe.md)
+
+    Params
+    --
+    - csv_path [str] Default: `path` with a .csv extension
+    - rate_hz [float] Rows per second, 0 writes every record
+
+    Returns
+    --
+    [str] CSV file name
+    """
+    reader = TelemetryReader(path)
+    csv_path = csv_path or os.path.splitext(path)[0] + '.csv'
+    period = int(1e9 / rate_hz) if rate_hz else 0; next_t = None
+    try:
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f); writer.writerow(LOG_HEADER)
+            for r, settings in reader.wide(TrackingParams._fields):
+                if period:
+                    if next_t is not None and r.t_ns < next_t: continue
+                    next_t = r.t_ns + period if next_t is None or r.t_ns - next_t >= period else next_t + period
+                time_text = datetime.fromtimestamp(reader.wall_ns(r.t_ns) / 1e9).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+                writer.writerow(_log_row(time_text, r, list(settings)))
+    finally:
+        reader.close()
+    return csv_path
+
+def main():
+    from siyi_sdk import SIYISDK
+    parser = argparse.ArgumentParser(description="Headless gimbal tracking engine")
+    parser.add_argument('--ip', default="192.168.144.25", help="Gimbal IP")
+    parser.add_argument('--port', type=int, default=37260, help="Gimbal UDP port")
+    parser.add_argument('--config', default="gui_config.json", help="GUI settings file")
+    parser.add_argument('--tracker-port', type=int, default=None, help="Listen for the image tracker on this UDP port")
+    parser.add_argument('--interface', action='append', default=[], help="Send the interface service data to IP:PORT[,RATE_HZ[,ENCODING]], repeatable")
+    parser.add_argument('--track', action='store_true', help="Start tracking right away")
+    parser.add_argument('--log', action='store_true', help="Write a binary telemetry log (convert with: python telemetry_log.py csv FILE)")
+    parser.add_argument('--rate', type=float, default=None, help="Control loop rate [Hz], e.g. 50, 100, 200 (default: control_rate_hz of the config)")
+    parser.add_argument('--policy', choices=(SKIP, CATCH_UP), default=SKIP, help="What to do with missed periods")
+    args = parser.parse_args()
+
+    try:
+        with open(args.config) as f: config = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError): config = {}
+    cam = SIYISDK(server_ip=args.ip, port=args.port)
+    if not cam.connect(): print("No connection"); return 1
+    engine = TrackingEngine(cam, config, args.rate or float(config.get("control_rate_hz", 50)), args.policy)
+    if args.tracker_port: engine.start_tracker_service(config.get("tracker_listen_ip", "0.0.0.0"), args.tracker_port)
+    for spec in args.interface:
+        addr, *options = spec.split(','); ip, port = addr.rsplit(':', 1)
+        engine.add_interface_subscriber(ip, port, float(options[0]) if options else None, *options[1:2])
+    if args.interface or engine.interface.subscribers(): engine.start_interface_service()
+    if args.log: engine.start_logging()
+    if args.track: engine.start_tracking()
+    engine.start()
+    try:
+        while True:
+            time.sleep(10.0); loop = engine.get_loop_stats()
+            print(f"Loop {loop['rate_hz']:.0f} Hz: ticks {loop['ticks']}, failures {loop['failures']}, deadline misses {loop['deadline_misses']}, "
+                  f"overruns {loop['overruns']}, period error p99 {loop['period_error_ms'].get('p99')} ms")
+            if engine.tracker_socket:
+                tracker = engine.get_tracker_stats()
+                print(f"Tracker: received {tracker['received']}, dropped {tracker['dropped']}, stale ticks {tracker['stale_ticks']}, "
+                      f"age p50 {tracker['age_ms'].get('p50')} ms")
+            log = engine.get_log_stats()
+            if log:
+                print(f"Log: records {log['records']}, dropped {log['dropped']}, invalid {log['invalid']}, pending {log['pending']}, fsyncs {log['syncs']}")
+                if log['attitude']: print(f"Attitude log: records {log['attitude']['records']}, dropped {log['attitude']['dropped']}, invalid {log['attitude']['invalid']}")
+            for sub in engine.get_interface_stats():
+                print(f"Interface {sub['addr']} ({sub['encoding']}): sent {sub['sent']}, suppressed {sub['suppressed']}, errors {sub['errors']}")
+    except KeyboardInterrupt: pass
+    finally:
+        engine.close(); cam.disconnect()
+
+if __name__ == "__main__":
+    main()